@@ -251,3 +251,50 @@ def sql_helper(sql: str, **kwargs) -> TextClause:
     for key, value in kwargs.items():
         args[key] = SQL(value)
     return text(SQL(sql).format(**args).as_string())
+
+
+def executemany_rowcounts(cursor, sql, params: list) -> list[int]:
+    """Run ``executemany`` and return the affected row count per statement.
+
+    psycopg pipelines ``executemany``, so this is one network round trip
+    for what would otherwise be ``len(params)`` execute calls.
+
+    Args:
+        cursor (psycopg.Cursor): database cursor.
+        sql (str): the statement to run.
+        params (list): the parameter sets, one per statement.
+
+    Returns:
+        list[int] of rowcounts in the order of ``params``.
+    """
+    if not params:
+        return []
+    # returning=True keeps each statement's result, so we get rowcounts
+    cursor.executemany(sql, params, returning=True)
+    counts = [cursor.rowcount]
+    while cursor.nextset():
+        counts.append(cursor.rowcount)
+    return counts
+
+
+def execute_pipelined(cursor, statements: list) -> list[int]:
+    """Run statements within one psycopg pipeline, returning rowcounts.
+
+    Each statement gets its own cursor, so that the rowcount of each is
+    available once the pipeline is synced.
+
+    Args:
+        cursor (psycopg.Cursor): database cursor, whose connection is used.
+        statements (list): ``(sql, args)`` tuples to run in order.
+
+    Returns:
+        list[int] of rowcounts in the order of ``statements``.
+    """
+    conn = cursor.connection
+    cursors = []
+    with conn.pipeline():
+        for sql, args in statements:
+            cur = conn.cursor()
+            cur.execute(sql, args)
+            cursors.append(cur)
+    return [cur.rowcount for cur in cursors]
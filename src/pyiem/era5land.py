@@ -9,6 +9,7 @@ import numpy as np
 from affine import Affine
 
 from pyiem import iemre
+from pyiem.models.gridnav import CartesianGridNavigation
 
 DX = 0.1
 DY = 0.1
@@ -67,3 +68,29 @@ def find_ij(
     i = int((lon - _meta["WEST_EDGE"]) / DX)
     j = int((lat - _meta["SOUTH_EDGE"]) / DY)
     return i, j
+
+
+def find_ij_many(
+    lons: np.ndarray, lats: np.ndarray, domain: str = "conus"
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find the grid cells for many provided lon/lats.
+
+    Args:
+      lons (array_like): longitudes of the points.
+      lats (array_like): latitudes of the points.
+      domain (str): domain to use.
+
+    Returns:
+      (i, j, inbounds) arrays, see
+      `pyiem.models.gridnav.CartesianGridNavigation.find_ij_many`.
+    """
+    _meta = DOMAINS[domain]
+    gridnav = CartesianGridNavigation(
+        left_edge=_meta["WEST_EDGE"],
+        bottom_edge=_meta["SOUTH_EDGE"],
+        dx=DX,
+        dy=DY,
+        nx=_meta["NX"],
+        ny=_meta["NY"],
+    )
+    return gridnav.find_ij_many(lons, lats)
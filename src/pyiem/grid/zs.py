@@ -1,9 +1,14 @@
 """Utility class to help with fast zonal_stats work"""
 
+import hashlib
+import os
+import tempfile
 from collections import namedtuple
 
 import numpy as np
+import shapely
 from rasterstats import gen_zonal_stats
+from scipy import sparse
 
 from pyiem.util import LOG
 
@@ -13,7 +18,7 @@ GRIDINFO = namedtuple("GridInfo", ["x0", "y0", "xsz", "ysz", "mask"])
 class CachingZonalStats:
     """Implements a cache to speed up zonal_stats computation"""
 
-    def __init__(self, affine):
+    def __init__(self, affine, cachedir=None):
         """constructor
 
         Note: This library assumes that *you* enforce grid(0,0) is upper-left,
@@ -22,9 +27,16 @@ class CachingZonalStats:
 
         Args:
           affine (Affine): The base affine used to define the grid
+          cachedir (str, optional): directory to persist the computed grid
+            navigation to, keyed by a hash of the geometries, affine, and
+            grid shape.  Subsequent processes then load it from disk.
         """
         self.affine = affine
+        self.cachedir = cachedir
         self.gridnav = []
+        # Cached sparse weight matrices of the gridnav above, keyed by the
+        # grid shape and area_weighted
+        self._weights = {}
 
     def compute_gridnav(self, geometries, grid):
         """Figure out how these geometries map to our grid
@@ -39,6 +51,19 @@ class CachingZonalStats:
                 "Cowardly refusing to compute gridnav with None geometries"
             )
             return
+        # The navigation is replaced, so are the weights computed from it
+        self.gridnav = []
+        self._weights = {}
+        cachefn = None
+        if self.cachedir is not None:
+            cachefn = os.path.join(
+                self.cachedir,
+                f"czs_{self.cache_key(geometries, grid.shape)}.npz",
+            )
+            if os.path.isfile(cachefn):
+                LOG.info("Loading gridnav from %s", cachefn)
+                self.load_gridnav(cachefn)
+                return
         # TODO: check nodata usage here
         zs = gen_zonal_stats(
             geometries,
@@ -87,6 +112,90 @@ class CachingZonalStats:
             self.gridnav.append(
                 GRIDINFO(x0=x0, y0=y0, xsz=xsz, ysz=ysz, mask=mask)
             )
+        if cachefn is not None:
+            self.save_gridnav(cachefn)
+
+    def cache_key(self, geometries, grid_shape) -> str:
+        """Compute a hash of the inputs that define the grid navigation.
+
+        Args:
+          geometries (geopandas.GeoSeries): geometries to compute over.
+          grid_shape (tuple): the (ny, nx) shape of the grid.
+
+        Returns:
+          str hex digest
+        """
+        hasher = hashlib.sha256()
+        hasher.update(repr((tuple(self.affine)[:6], grid_shape)).encode())
+        for wkb in shapely.to_wkb(np.asarray(geometries)):
+            hasher.update(b"" if wkb is None else wkb)
+        return hasher.hexdigest()
+
+    def save_gridnav(self, filename):
+        """Persist the grid navigation to a compressed numpy npz file.
+
+        The masks are packed into bits and concatenated, so the file is
+        compact and loads without any python loop over the masks.
+
+        Args:
+          filename (str): the file to write, which is done atomically.
+        """
+        size = len(self.gridnav)
+        dims = np.full((size, 4), -1, dtype=np.int64)
+        masks = []
+        for idx, nav in enumerate(self.gridnav):
+            if nav is None:
+                continue
+            dims[idx] = [nav.x0, nav.y0, nav.xsz, nav.ysz]
+            masks.append(np.asarray(nav.mask, dtype=bool).ravel())
+        bits = (
+            np.packbits(np.concatenate(masks))
+            if masks
+            else np.array([], dtype=np.uint8)
+        )
+        tmpfd, tmpfn = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(filename)), suffix=".npz"
+        )
+        with os.fdopen(tmpfd, "wb") as fh:
+            np.savez_compressed(
+                fh,
+                affine=np.array(tuple(self.affine)[:6]),
+                dims=dims,
+                bits=bits,
+            )
+        os.replace(tmpfn, filename)
+
+    def load_gridnav(self, filename):
+        """Load the grid navigation saved by `save_gridnav`.
+
+        Args:
+          filename (str): the npz file to read.
+        """
+        with np.load(filename) as npz:
+            if not np.allclose(npz["affine"], tuple(self.affine)[:6]):
+                raise ValueError(f"{filename} affine does not match")
+            dims = npz["dims"]
+            valid = dims[:, 0] > -1
+            sizes = dims[:, 2] * dims[:, 3] * valid
+            masks = np.unpackbits(npz["bits"], count=int(sizes.sum()))
+        offsets = np.concatenate([[0], np.cumsum(sizes)])
+        self.gridnav = [
+            (
+                GRIDINFO(
+                    x0=int(x0),
+                    y0=int(y0),
+                    xsz=int(xsz),
+                    ysz=int(ysz),
+                    mask=masks[offsets[idx] : offsets[idx + 1]]
+                    .astype(bool)
+                    .reshape((ysz, xsz)),
+                )
+                if valid[idx]
+                else None
+            )
+            for idx, (x0, y0, xsz, ysz) in enumerate(dims)
+        ]
+        self._weights = {}
 
     def gen_stats(self, grid, geometries=None, stat=np.ma.mean):
         """Compute the zonal_stats for the provided geometries and grid
@@ -121,3 +230,111 @@ class CachingZonalStats:
                 )
             )
         return res
+
+    def compute_weights(
+        self, grid_shape, geometries=None, area_weighted=False
+    ):
+        """Convert the grid navigation into a sparse weight matrix.
+
+        The matrix has a row per geometry and a column per raveled grid
+        cell, so that zonal stats over all geometries is a single sparse
+        matrix multiply.  The result is cached on this object until the
+        grid navigation is computed or loaded again.
+
+        Args:
+          grid_shape (tuple): the (ny, nx) shape of the grid.
+          geometries (geopandas.GeoSeries): geometries used to compute the
+            grid navigation, required when ``area_weighted``.
+          area_weighted (bool): weight each grid cell by the fraction of the
+            cell covered by the geometry, otherwise each touched cell has a
+            weight of one.
+
+        Returns:
+          scipy.sparse.csr_array
+        """
+        key = (tuple(grid_shape), area_weighted)
+        if key in self._weights:
+            return self._weights[key]
+        (_gridysz, gridxsz) = grid_shape
+        rows = []
+        cols = []
+        weights = []
+        cellarea = abs(self.affine.a * self.affine.e)
+        for idx, nav in enumerate(self.gridnav):
+            if nav is None:
+                continue
+            (yy, xx) = np.nonzero(~nav.mask)
+            yy = yy + nav.y0
+            xx = xx + nav.x0
+            if area_weighted:
+                if geometries is None:
+                    raise ValueError("area_weighted requires geometries")
+                (left, top) = self.affine * (xx, yy)
+                (right, bottom) = self.affine * (xx + 1, yy + 1)
+                boxes = shapely.box(left, bottom, right, top)
+                frac = (
+                    shapely.area(
+                        shapely.intersection(boxes, geometries.iloc[idx])
+                    )
+                    / cellarea
+                )
+            else:
+                frac = np.ones(yy.size)
+            rows.append(np.full(yy.size, idx))
+            cols.append(yy * gridxsz + xx)
+            weights.append(frac)
+        if rows:
+            (rows, cols, weights) = (
+                np.concatenate(rows),
+                np.concatenate(cols),
+                np.concatenate(weights),
+            )
+        matrix = sparse.csr_array(
+            (weights, (rows, cols)),
+            shape=(len(self.gridnav), grid_shape[0] * grid_shape[1]),
+        )
+        self._weights[key] = matrix
+        return matrix
+
+    def gen_stats_sparse(
+        self, grid, geometries=None, stat="mean", area_weighted=False
+    ):
+        """Compute the zonal_stats with a sparse matrix multiply.
+
+        Note: the passed `grid` should have (0,0) in upper-left, np.flipud()
+
+        Args:
+          grid (numpy.ndarray): the (y, x) array or (time, y, x) stack of
+            arrays to sample values for, masked and NaN values are ignored.
+          geometries (geopandas.GeoSeries): geometries to compute over, this
+            should not change over the lifetime of this object
+          stat (str): one of ``mean``, ``sum``, or ``count``.
+          area_weighted (bool): see `compute_weights`.
+
+        Returns:
+          numpy.ndarray of shape (geometries,) or (time, geometries), with
+          NaN for a mean over no valid grid cells.
+        """
+        if stat not in ("mean", "sum", "count"):
+            raise ValueError(f"Unknown stat: {stat}")
+        if not self.gridnav:
+            self.compute_gridnav(
+                geometries, grid if grid.ndim == 2 else grid[0]
+            )
+        matrix = self.compute_weights(
+            grid.shape[-2:], geometries, area_weighted
+        )
+        ncells = grid.shape[-2] * grid.shape[-1]
+        invalid = np.ma.getmaskarray(grid) | np.isnan(np.ma.getdata(grid))
+        # (cells, time) so that the results are (geometries, time)
+        values = np.where(invalid, 0, np.ma.getdata(grid)).reshape(-1, ncells)
+        values = values.T
+        counts = matrix @ (~invalid).reshape(-1, ncells).T.astype(float)
+        if stat == "count":
+            res = counts
+        else:
+            res = matrix @ values
+            if stat == "mean":
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    res = np.where(counts > 0, res / counts, np.nan)
+        return res[:, 0] if grid.ndim == 2 else res.T
@@ -1,17 +1,21 @@
 """Support library for the IEM Reanalysis code."""
 
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional, Tuple
 from zoneinfo import ZoneInfo
 
 import numpy as np
+import pandas as pd
 import pyproj
 import xarray as xr
 from affine import Affine
 from psycopg.sql import SQL, Identifier
+from rasterio.crs import CRS
 from rasterio.warp import Resampling, reproject
 
 from pyiem.database import get_dbconn
+from pyiem.grid.nav import get_nav
 from pyiem.util import LOG, utc
 
 # Legacy constants prior to addition of other IEMRE domains
@@ -124,7 +128,115 @@ def get_table(valid):
     return table
 
 
-def set_grids(valid, ds, table: str | None = None, domain: str = "conus"):
+# Binary COPY file signature, flags and header extension length
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + bytes(8)
+
+
+def _copy_payload(columns: list[np.ndarray]) -> bytes:
+    """Build the binary COPY stream of a gid int4 and float8 columns.
+
+    This is the reverse of `_copy_columns`, each row has a fixed width, so
+    numpy writes the whole stream without a python loop.  Missing values
+    are sent as ``NaN``, as a null would need a variable width row.
+
+    Returns:
+      bytes of the stream, with the ``gid`` being the row index.
+    """
+    fields = [("nfields", ">i2"), ("gidlen", ">i4"), ("gid", ">i4")]
+    for i in range(len(columns)):
+        fields.extend([(f"l{i}", ">i4"), (f"v{i}", ">f8")])
+    size = columns[0].size if columns else 0
+    rows = np.empty(size, dtype=np.dtype(fields))
+    rows["nfields"] = 1 + len(columns)
+    rows["gidlen"] = 4
+    rows["gid"] = np.arange(size)
+    for i, col in enumerate(columns):
+        rows[f"l{i}"] = 8
+        rows[f"v{i}"] = col.ravel()
+    # The stream is terminated by a int16 -1
+    return COPY_HEADER + rows.tobytes() + b"\xff\xff"
+
+
+def _set_grids_copy(pgconn, cursor, valid, ds, table, is_new: bool):
+    """Bulk load the grids via a binary COPY into a temporary table.
+
+    Args:
+      pgconn (psycopg.Connection): database connection
+      cursor (psycopg.Cursor): database cursor
+      valid (datetime or date): timestamp of the data
+      ds (xarray.Dataset): The xarray dataset to save
+      table (psycopg.sql.Identifier): database table to save data to
+      is_new (bool): are there no database rows yet for this valid
+    """
+    cols = SQL(",").join(Identifier(col) for col in ds)
+    # float8 columns for a fixed width stream, with NaN for missing values
+    # that are set to null when applied below
+    cursor.execute(
+        SQL(
+            "CREATE TEMPORARY TABLE iemre_set_grids(gid int4, {}) "
+            "ON COMMIT DROP"
+        ).format(
+            SQL(",").join(SQL("{} float8").format(Identifier(c)) for c in ds)
+        )
+    )
+    sts = utc()
+    size = ds[next(iter(ds))].size
+    with cursor.copy(
+        SQL(
+            "COPY iemre_set_grids(gid, {}) FROM STDIN WITH (FORMAT BINARY)"
+        ).format(cols)
+    ) as copy:
+        copy.write(_copy_payload([ds[v].values for v in ds]))
+    LOG.info("copy timing %.2f/s", size / (utc() - sts).total_seconds())
+    sts = utc()
+    if is_new:
+        cursor.execute(
+            SQL(
+                "INSERT into {}(gid, valid, {}) SELECT g.gid, %s, {} "
+                "from iemre_grid g LEFT JOIN iemre_set_grids s "
+                "on (g.gid = s.gid)"
+            ).format(
+                table,
+                cols,
+                SQL(",").join(
+                    SQL("nullif(s.{}, 'NaN')").format(Identifier(col))
+                    for col in ds
+                ),
+            ),
+            (valid,),
+        )
+    else:
+        cursor.execute(
+            SQL(
+                "UPDATE {} t SET {} from iemre_set_grids s "
+                "WHERE t.valid = %s and t.gid = s.gid"
+            ).format(
+                table,
+                SQL(",").join(
+                    SQL("{} = nullif(s.{}, 'NaN')").format(
+                        Identifier(col), Identifier(col)
+                    )
+                    for col in ds
+                ),
+            ),
+            (valid,),
+        )
+    LOG.info(
+        "%s timing %.2f/s",
+        "insert" if is_new else "update",
+        cursor.rowcount / max((utc() - sts).total_seconds(), 1e-6),
+    )
+    cursor.close()
+    pgconn.commit()
+
+
+def set_grids(
+    valid,
+    ds,
+    table: str | None = None,
+    domain: str = "conus",
+    bulk: bool = False,
+):
     """Update the database with a given ``xarray.Dataset``.
 
     Args:
@@ -133,6 +245,9 @@ def set_grids(valid, ds, table: str | None = None, domain: str = "conus"):
       table (str,optional): hard coded database table to use to set the data
         on.  Usually dynamically computed.
       domain (str,optional): IEMRE domain to save data to
+      bulk (bool,optional): stream the grids with a binary ``COPY`` into a
+        temporary table and apply them with a single set based statement,
+        which is much faster than the default per grid cell update.
     """
     table = Identifier(table if table is not None else get_table(valid))
     dom = DOMAINS[domain]
@@ -143,6 +258,9 @@ def set_grids(valid, ds, table: str | None = None, domain: str = "conus"):
         SQL("SELECT valid from {} WHERE valid = %s LIMIT 1").format(table),
         (valid,),
     )
+    if bulk:
+        _set_grids_copy(pgconn, cursor, valid, ds, table, cursor.rowcount == 0)
+        return
     if cursor.rowcount == 0:
         # Create entries
         cursor.execute(
@@ -180,6 +298,71 @@ def set_grids(valid, ds, table: str | None = None, domain: str = "conus"):
     )
 
 
+# Cache of (database, table) to available data columns
+_TABLE_COLUMNS: dict[tuple[str, str], list[str]] = {}
+
+
+def _get_table_columns(cursor, table: str) -> list[str]:
+    """Return the data columns of the given table, cached per process."""
+    key = (cursor.connection.info.dbname, table)
+    if key not in _TABLE_COLUMNS:
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = 'public' AND table_name = %s and "
+            "column_name not in ('gid', 'valid') ORDER by ordinal_position",
+            (table,),
+        )
+        columns = [row[0] for row in cursor]
+        if not columns:
+            # Do not cache a table that does not exist (yet)
+            return columns
+        _TABLE_COLUMNS[key] = columns
+    return _TABLE_COLUMNS[key]
+
+
+def _copy_columns(cursor, query, params, ncols: int) -> np.ndarray:
+    """Fetch rows of int4 and float8 columns via a binary COPY.
+
+    The query needs to generate a ``gid`` and ``tidx`` int4 column, followed
+    by ``ncols`` of not null float8 columns, so that each row in the binary
+    stream has a fixed width that numpy can read without a python loop.
+
+    Returns:
+      numpy structured array with ``gid``, ``tidx`` and ``v{i}`` fields.
+    """
+    with cursor.copy(query, params) as copy:
+        buf = b"".join(bytes(chunk) for chunk in copy)
+    # 11 byte signature, 4 byte flags, 4 byte header extension length
+    offset = 19 + int.from_bytes(buf[15:19], "big")
+    fields = [
+        ("nfields", ">i2"),
+        ("gidlen", ">i4"),
+        ("gid", ">i4"),
+        ("tidxlen", ">i4"),
+        ("tidx", ">i4"),
+    ]
+    for i in range(ncols):
+        fields.extend([(f"l{i}", ">i4"), (f"v{i}", ">f8")])
+    # The stream is terminated by a int16 -1
+    return np.frombuffer(buf[offset:-2], dtype=np.dtype(fields))
+
+
+def _float8_columns(columns: list[str]) -> SQL:
+    """Generate the select of not null float8 columns."""
+    return SQL(",").join(
+        SQL("coalesce({}::float8, 'NaN')").format(Identifier(col))
+        for col in columns
+    )
+
+
+def _grid_coords(dom: dict) -> dict:
+    """Return the lon/lat coordinates for a xarray of this domain."""
+    return {
+        "lon": (["x"], np.arange(dom["west"], dom["east"] + 0.001, DX)),
+        "lat": (["y"], np.arange(dom["south"], dom["north"] + 0.001, DY)),
+    }
+
+
 def get_grids(
     valid, varnames=None, cursor=None, table=None, domain: str = "conus"
 ):
@@ -204,35 +387,128 @@ def get_grids(
     # rectify varnames
     if isinstance(varnames, str):
         varnames = [varnames]
-    # Compute variable names
-    cursor.execute(
-        "SELECT column_name FROM information_schema.columns "
-        "WHERE table_schema = 'public' AND table_name = %s and "
-        "column_name not in ('gid', 'valid')",
-        (table,),
-    )
-    use_columns = []
-    for row in cursor:
-        if not varnames or row[0] in varnames:
-            use_columns.append(row[0])  # noqa
-    colsql = ",".join(use_columns)
-    cursor.execute(
-        f"SELECT (gid / %s)::int as y, gid %% %s as x, {colsql} "
-        f"from {table} WHERE valid = %s",
-        (dom["nx"], dom["nx"], valid),
-    )
+    use_columns = [
+        col
+        for col in _get_table_columns(cursor, table)
+        if not varnames or col in varnames
+    ]
     data = {
         key: np.full((dom["ny"], dom["nx"]), np.nan) for key in use_columns
     }
-    for row in cursor:
+    if use_columns:
+        rows = _copy_columns(
+            cursor,
+            SQL(
+                "COPY (SELECT gid::int4, 0::int4, {} from {} "
+                "WHERE valid = %s) "
+                "TO STDOUT WITH (FORMAT BINARY)"
+            ).format(_float8_columns(use_columns), Identifier(table)),
+            (valid,),
+            len(use_columns),
+        )
         for i, col in enumerate(use_columns):
-            data[col][row[0], row[1]] = row[2 + i]
+            data[col].ravel()[rows["gid"]] = rows[f"v{i}"]
     return xr.Dataset(
         dict((key, (["y", "x"], data[key])) for key in data),
-        coords={
-            "lon": (["x"], np.arange(dom["west"], dom["east"] + 0.001, DX)),
-            "lat": (["y"], np.arange(dom["south"], dom["north"] + 0.001, DY)),
-        },
+        coords=_grid_coords(dom),
+    )
+
+
+def get_grids_range(
+    sts,
+    ets,
+    varnames=None,
+    cursor=None,
+    table=None,
+    domain: str = "conus",
+):
+    """Fetch an inclusive range of grid(s) from the database, returning xarray.
+
+    This is done in one database round trip, with the ``UNION ALL`` of the
+    tables (by year for daily, by month for hourly) that cover the period.
+
+    Args:
+      sts (datetime or date): If datetime, load hourly, if date, load daily
+      ets (datetime or date): inclusive end time.
+      varnames (str or list,optional): Which variables to fetch from database,
+        defaults to all available
+      cursor (database cursor,optional): cursor to use for query
+      table (str,optional): Hard coded table to fetch data from.
+      domain (str,optional): IEMRE domain to fetch data from
+
+    Returns:
+      ``xarray.Dataset`` with dimensions of (time, y, x)"""
+    dom = DOMAINS[domain]
+    hourly = isinstance(sts, datetime)
+    if hourly:
+        times = pd.date_range(
+            sts.astimezone(timezone.utc),
+            ets.astimezone(timezone.utc),
+            freq="h",
+        )
+        step = 3600
+    else:
+        times = pd.date_range(sts, ets, freq="D")
+        step = 86400
+    if table is not None:
+        tables = [table]
+    else:
+        # dict for ordered uniqueness
+        tables = list(
+            {
+                get_table(t.to_pydatetime() if hourly else t.date()): None
+                for t in times
+            }
+        )
+    if cursor is None:
+        pgconn = get_dbconn(d2l(domain))
+        cursor = pgconn.cursor()
+    if isinstance(varnames, str):
+        varnames = [varnames]
+    table_columns = {tbl: _get_table_columns(cursor, tbl) for tbl in tables}
+    # Tables that do not exist (yet) have nothing to union
+    tables = [tbl for tbl in tables if table_columns[tbl]]
+    use_columns = []
+    if tables:
+        # Only the columns found within all of the tables can be unioned
+        common = set.intersection(*[set(table_columns[t]) for t in tables])
+        use_columns = [
+            col
+            for col in table_columns[tables[0]]
+            if col in common and (not varnames or col in varnames)
+        ]
+    data = {
+        key: np.full((len(times), dom["ny"], dom["nx"]), np.nan)
+        for key in use_columns
+    }
+    if use_columns and len(times) > 0:
+        # Compute the time index from the epoch seconds of valid
+        basesql = SQL(
+            "SELECT gid::int4, ((extract(epoch from valid) - %s) / %s)::int4, "
+            "{} "
+            "from {} WHERE valid >= %s and valid <= %s"
+        )
+        query = SQL(" UNION ALL ").join(
+            basesql.format(_float8_columns(use_columns), Identifier(tbl))
+            for tbl in tables
+        )
+        epoch = times[0].timestamp() if hourly else times[0].value / 1e9
+        params = [epoch, step, sts, ets] * len(tables)
+        rows = _copy_columns(
+            cursor,
+            SQL("COPY ({}) TO STDOUT WITH (FORMAT BINARY)").format(query),
+            params,
+            len(use_columns),
+        )
+        for i, col in enumerate(use_columns):
+            data[col].reshape(len(times), -1)[rows["tidx"], rows["gid"]] = (
+                rows[f"v{i}"]
+            )
+    coords = _grid_coords(dom)
+    coords["time"] = (["time"], times.tz_localize(None) if hourly else times)
+    return xr.Dataset(
+        dict((key, (["time", "y", "x"], data[key])) for key in data),
+        coords=coords,
     )
 
 
@@ -309,6 +585,23 @@ def find_ij(
     return i, j
 
 
+def find_ij_many(
+    lons: np.ndarray, lats: np.ndarray, domain: str = "conus"
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the i, j grid indices (based 0) for many lon/lat points.
+
+    Args:
+      lons (array_like): longitudes of the points.
+      lats (array_like): latitudes of the points.
+      domain (str): IEMRE domain to use.
+
+    Returns:
+      (i, j, inbounds) arrays, see
+      `pyiem.models.gridnav.CartesianGridNavigation.find_ij_many`.
+    """
+    return get_nav("iemre", domain).find_ij_many(lons, lats)
+
+
 def get_domain(lon: float, lat: float) -> Optional[str]:
     """Compute the domain that contains the given point."""
     for domain, dom in DOMAINS.items():
@@ -328,7 +621,9 @@ def get_gid(lon, lat, domain: str = "conus") -> Optional[int]:
     return j * DOMAINS[domain]["nx"] + i
 
 
-def grb2iemre(grb, resampling=None, domain: str = "conus") -> np.ndarray:
+def grb2iemre(
+    grb, resampling=None, domain: str = "conus", use_plan: bool = False
+) -> np.ndarray:
     """Reproject a grib message onto the IEMRE grid.
 
     A helper frontend to ``reproject2iemre``.
@@ -337,6 +632,7 @@ def grb2iemre(grb, resampling=None, domain: str = "conus") -> np.ndarray:
         grb (pygrib.gribmessage): single message to reproject
         resampling (rasterio.warp.Resampling,optional): defaults to nearest
         domain (str): IEMRE domain to reproject onto
+        use_plan (bool,optional): see ``reproject2iemre``.
 
     Returns:
         numpy.ma.array of reprojected grid oriented S to N like IEMRE
@@ -376,11 +672,59 @@ def grb2iemre(grb, resampling=None, domain: str = "conus") -> np.ndarray:
             lly + grb["DyInMetres"] * grb["Ny"] + grb["DyInMetres"] / 2.0,
         )
         vals = np.flipud(grb.values)
-    return reproject2iemre(vals, aff, pparams, resampling, domain)
+    return reproject2iemre(vals, aff, pparams, resampling, domain, use_plan)
+
+
+@lru_cache(maxsize=16)
+def _get_reprojection_plan(
+    affine_in: tuple, crs_in: str, shape: tuple, domain: str
+) -> dict:
+    """Compute the nearest source grid cell for each IEMRE grid cell.
+
+    Args:
+        affine_in (tuple): the six coefficients of the source affine.
+        crs_in (str): WKT of the source grid projection.
+        shape (tuple): (ny, nx) shape of the source grid.
+        domain (str): IEMRE domain to reproject onto.
+
+    Returns:
+        dict with ``index`` array into the raveled source grid and a
+        ``valid`` mask, both of shape (ny, nx).
+    """
+    dom = DOMAINS[domain]
+    affine_in = Affine(*affine_in)
+    dst_affine = dom["affine"] if affine_in.e < 0 else dom["affine_native"]
+    cols, rows = np.meshgrid(
+        np.arange(dom["nx"]) + 0.5, np.arange(dom["ny"]) + 0.5
+    )
+    x, y = pyproj.Transformer.from_crs(
+        "EPSG:4326", crs_in, always_xy=True
+    ).transform(*(dst_affine * (cols, rows)))
+    col, row = ~affine_in * (x, y)
+    (ny, nx) = shape
+    valid = (col >= 0) & (col < nx) & (row >= 0) & (row < ny)
+    index = np.where(
+        valid,
+        np.floor(row).astype(int) * nx + np.floor(col).astype(int),
+        0,
+    )
+    return {"index": index, "valid": valid}
+
+
+def _apply_reprojection_plan(plan: dict, grid: np.ndarray) -> np.ndarray:
+    """Apply a plan from `_get_reprojection_plan` to the provided grid."""
+    data = np.asarray(grid, dtype=float).ravel()[plan["index"]]
+    data[~plan["valid"]] = np.nan
+    return data
 
 
 def reproject2iemre(
-    grid, affine_in, crs_in: str, resampling=None, domain: str = "conus"
+    grid,
+    affine_in,
+    crs_in: str,
+    resampling=None,
+    domain: str = "conus",
+    use_plan: bool = False,
 ):
     """Reproject the given grid to IEMRE grid, returning S to N oriented grid.
 
@@ -392,16 +736,34 @@ def reproject2iemre(
         crs_in (pyproj.Proj): projection of input grid
         resampling (rasterio.warp.Resampling,optional): defaults to nearest
         domain (str): IEMRE domain to reproject onto
+        use_plan (bool,optional): for nearest resampling, cache the source
+          grid cell used for each IEMRE cell, keyed by the input affine,
+          projection, and shape, so that subsequent calls with the same
+          source grid are pure numpy indexing.  Cell centers are projected
+          exactly, whereas GDAL approximates the transform, so a small
+          fraction of cells (about 3% for Stage IV) can pick a neighboring
+          source cell.  Other resampling methods always use ``reproject``.
 
     Returns:
         numpy.ma.array of reprojected grid oriented S to N like IEMRE
     """
     dom = DOMAINS[domain]
-    data = np.zeros((dom["ny"], dom["nx"]), float)
     # If source is a masked array, we need to fill it
     src_is_masked = hasattr(grid, "mask")
     if src_is_masked:
         grid = grid.filled(np.nan)
+    resampling = resampling if resampling is not None else Resampling.nearest
+    if use_plan and resampling == Resampling.nearest:
+        plan = _get_reprojection_plan(
+            tuple(affine_in)[:6],
+            CRS.from_user_input(crs_in).to_wkt(),
+            grid.shape,
+            domain,
+        )
+        data = _apply_reprojection_plan(plan, grid)
+        data = np.ma.array(data, mask=np.isnan(data))
+        return data if affine_in.e > 0 else np.flipud(data)
+    data = np.zeros((dom["ny"], dom["nx"]), float)
     reproject(
         grid,
         data,
@@ -412,9 +774,7 @@ def reproject2iemre(
         ),
         dst_crs={"init": "EPSG:4326"},
         dst_nodata=np.nan,
-        resampling=(
-            resampling if resampling is not None else Resampling.nearest
-        ),
+        resampling=resampling,
     )
     data = np.ma.array(data, mask=np.isnan(data))
     return data if affine_in.e > 0 else np.flipud(data)
@@ -1,11 +1,18 @@
 """Grid Navigation Metadata."""
 
+from functools import lru_cache
 from typing import Optional, Union, cast
 
 import numpy as np
 from affine import Affine
 from pydantic import BaseModel, ConfigDict, Field, model_validator
-from pyproj import CRS, Proj
+from pyproj import CRS, Proj, Transformer
+
+
+@lru_cache(maxsize=32)
+def _get_transformer(src, dst) -> Transformer:
+    """Cache the construction of transformers, which is not cheap."""
+    return Transformer.from_crs(src, dst, always_xy=True)
 
 
 class CartesianGridNavigation(BaseModel):
@@ -183,3 +190,49 @@ class CartesianGridNavigation(BaseModel):
         i = int((x - self.left_edge) / self.dx)
         j = int((y - self.bottom_edge) / self.dy)
         return i, j
+
+    def find_ij_many(
+        self,
+        lons: np.ndarray,
+        lats: np.ndarray,
+        crs: Optional[Union[str, CRS]] = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Find the grid cells that contain many points in one call.
+
+        Args:
+          lons (array_like): longitudes or x coordinates of the points.
+          lats (array_like): latitudes or y coordinates of the points.
+          crs (str or CRS, optional): the coordinate reference system of the
+            provided points, defaults to EPSG:4326.
+
+        Returns:
+          (i, j, inbounds) arrays, the ``i`` and ``j`` indices are set to -1
+          for points not within the grid, so use the ``inbounds`` mask.
+        """
+        lons = np.atleast_1d(np.asarray(lons, dtype=float))
+        lats = np.atleast_1d(np.asarray(lats, dtype=float))
+        src = "EPSG:4326" if crs is None else crs
+        if CRS.from_user_input(src) == CRS.from_user_input(self.crs):
+            x, y = lons, lats
+        else:
+            x, y = _get_transformer(src, self.crs).transform(lons, lats)
+        inbounds = (
+            (x >= self.left_edge)
+            & (x < cast(float, self.right_edge))
+            & (y >= self.bottom_edge)
+            & (y < cast(float, self.top_edge))
+        )
+        i = np.full(x.shape, -1, dtype=np.int64)
+        j = np.full(y.shape, -1, dtype=np.int64)
+        # Match the int() of the quotient within `find_ij`, as float floor
+        # division can land a cell lower, ie 1.0 // 0.1 is 9
+        i[inbounds] = np.floor(
+            (x[inbounds] - self.left_edge) / cast(float, self.dx)
+        )
+        j[inbounds] = np.floor(
+            (y[inbounds] - self.bottom_edge) / cast(float, self.dy)
+        )
+        # Protect against floating point rounding at the top/right edge
+        np.minimum(i, cast(int, self.nx) - 1, out=i)
+        np.minimum(j, cast(int, self.ny) - 1, out=j)
+        return i, j, inbounds
@@ -13,6 +13,7 @@ import httpx
 import numpy as np
 from affine import Affine
 
+from pyiem.grid.nav import get_nav
 from pyiem.util import LOG
 
 # NOTE: This is the info for the MRMS grib products, NOT the IEM netcdf
@@ -75,6 +76,22 @@ def find_ij(lon: float, lat: float) -> tuple[Optional[int], Optional[int]]:
     return i, j
 
 
+def find_ij_many(
+    lons: np.ndarray, lats: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """CAUTION: This is for the netcdf files, not grib2 files.
+
+    Args:
+      lons (array_like): longitudes of the points.
+      lats (array_like): latitudes of the points.
+
+    Returns:
+      (i, j, inbounds) arrays, see
+      `pyiem.models.gridnav.CartesianGridNavigation.find_ij_many`.
+    """
+    return get_nav("MRMS_IEMRE").find_ij_many(lons, lats)
+
+
 def is_gzipped(text):
     """Check that we have gzipped content."""
     return text[:2] == b"\x1f\x8b"
@@ -187,8 +204,33 @@ def make_colorramp():
     return tuple(c.ravel())
 
 
-def reader(fn):
-    """Return metadata and the data."""
+def _set_corner_metadata(metadata, ul_lon_cc, ul_lat_cc, dx, dy, ny):
+    """Compute the corner metadata for the given upper left grid cell."""
+    metadata["ul_lon_cc"] = ul_lon_cc
+    metadata["ul_lat_cc"] = ul_lat_cc
+    # Calculate
+    metadata["ll_lon_cc"] = metadata["ul_lon_cc"]
+    metadata["ll_lat_cc"] = metadata["ul_lat_cc"] - dy * (ny - 1)
+    metadata["ll_lat"] = metadata["ll_lat_cc"] - dy / 2.0
+    metadata["ul_lat"] = metadata["ul_lat_cc"] - dy / 2.0
+    metadata["ll_lon"] = metadata["ll_lon_cc"] - dx / 2.0
+    metadata["ul_lon"] = metadata["ul_lon_cc"] - dx / 2.0
+
+
+def reader(fn, dtype=np.float64, bounds=None):
+    """Return metadata and the data.
+
+    Args:
+      fn (str): gzipped legacy MRMS binary file to read.
+      dtype (numpy.dtype, optional): dtype of the scaled data, defaults to
+        float64.  Use float32 to halve the memory usage.
+      bounds (list, optional): [west, south, east, north] window to read,
+        the returned metadata then describes this window.  Defaults to the
+        full grid.
+
+    Returns:
+      metadata (dict), data (np.ndarray)
+    """
     fp = gzip.open(fn, "rb")
     metadata = {}
     (
@@ -217,24 +259,26 @@ def reader(fn):
         grid_scale,
     ) = struct.unpack("9i4c10i", fp.read(80))
 
-    metadata["ul_lon_cc"] = ul_lon_cc / float(scale_lon)
-    metadata["ul_lat_cc"] = ul_lat_cc / float(scale_lat)
-    # Calculate
-    metadata["ll_lon_cc"] = metadata["ul_lon_cc"]
-    metadata["ll_lat_cc"] = metadata["ul_lat_cc"] - (
-        (scale_lat / float(grid_scale)) * (ny - 1)
-    )
-    metadata["ll_lat"] = (
-        metadata["ll_lat_cc"] - (scale_lat / float(grid_scale)) / 2.0
-    )
-    metadata["ul_lat"] = (
-        metadata["ul_lat_cc"] - (scale_lat / float(grid_scale)) / 2.0
-    )
-    metadata["ll_lon"] = (
-        metadata["ll_lon_cc"] - (scale_lon / float(grid_scale)) / 2.0
-    )
-    metadata["ul_lon"] = (
-        metadata["ul_lon_cc"] - (scale_lon / float(grid_scale)) / 2.0
+    dx = scale_lon / float(grid_scale)
+    dy = scale_lat / float(grid_scale)
+    ul_lon_cc = ul_lon_cc / float(scale_lon)
+    ul_lat_cc = ul_lat_cc / float(scale_lat)
+    (i0, i1, j0, j1) = (0, nx, 0, ny)
+    if bounds is not None:
+        # Grid edges are a half grid cell west and north of the centers
+        i0 = int(np.floor((bounds[0] - (ul_lon_cc - dx / 2.0)) / dx))
+        i1 = int(np.ceil((bounds[2] - (ul_lon_cc - dx / 2.0)) / dx))
+        j0 = int(np.floor(((ul_lat_cc + dy / 2.0) - bounds[3]) / dy))
+        j1 = int(np.ceil(((ul_lat_cc + dy / 2.0) - bounds[1]) / dy))
+        (i0, i1) = (min(max(i0, 0), nx), min(max(i1, 0), nx))
+        (j0, j1) = (min(max(j0, 0), ny), min(max(j1, 0), ny))
+    _set_corner_metadata(
+        metadata,
+        ul_lon_cc + i0 * dx,
+        ul_lat_cc - j0 * dy,
+        dx,
+        dy,
+        j1 - j0,
     )
 
     metadata["valid"] = datetime(
@@ -248,11 +292,12 @@ def reader(fn):
     metadata["unit"] = struct.unpack("6c", fp.read(6))
     var_scale, _, num_radars = struct.unpack("3i", fp.read(12))
     struct.unpack(f"{num_radars * 4}c", fp.read(num_radars * 4))  # rad_list
-    sz = nx * ny * nz
-    data = struct.unpack(f"{sz}h", fp.read(sz * 2))
-    data = np.reshape(np.array(data), (ny, nx)) / float(var_scale)
-
+    # Skip the rows north of our window, without holding them in memory
+    fp.seek(j0 * nx * 2, os.SEEK_CUR)
+    raw = np.frombuffer(fp.read((j1 - j0) * nx * 2), dtype=np.int16)
     fp.close()
+    data = raw.reshape((j1 - j0, nx))[:, i0:i1].astype(dtype)
+    data /= var_scale
     return metadata, data
 
 
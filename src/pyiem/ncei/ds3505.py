@@ -6,14 +6,26 @@ https://www1.ncdc.noaa.gov/pub/data/ish/ish-format-document.pdf
 import json
 import re
 import warnings
+from collections.abc import Generator
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
+from itertools import islice
+from typing import Optional, Union
 
+import numpy as np
+import pandas as pd
 from metpy.units import units
 
 # Local
 from pyiem.datatypes import pressure, speed
 from pyiem.util import LOG
 
+# Parsing unit expressions is slow, so do it once
+METER = units("meter")
+MILE = units("mile")
+FEET = units("feet")
+MM = units("mm")
+INCH = units("inch")
 MISSING_RE = re.compile(r"^\+?\-?9+$")
 EQD_RE = re.compile(r"^[QPRCDN][0-9][0-9]$")
 QNN_RE = re.compile(r"^[A-Z][0-9][0-9][A-Z ][0-9]$")
@@ -53,6 +65,52 @@ DS3505_RE = re.compile(
 """,
     re.VERBOSE,
 )
+# The mandatory section of DS3505_RE as (name, width, kind), with the kind
+# being None for text, "+" for a signed number, else the unsigned digits.
+# Numbers are divided by the scale found in MANDATORY_SCALE.
+MANDATORY_FIELDS = [
+    ("chars", 4, "0"),
+    ("stationid", 6, None),
+    ("wban", 5, None),
+    ("yyyymmdd", 8, "0"),
+    ("hhmi", 4, "0"),
+    ("srcflag", 1, None),
+    ("lat", 6, "+"),
+    ("lon", 7, "+"),
+    ("report_type", 5, None),
+    ("elevation", 5, "+"),
+    ("call_id", 5, None),
+    ("qc_process", 4, None),
+    ("drct", 3, "0"),
+    ("drct_qc", 1, None),
+    ("wind_code", 1, None),
+    ("wind_speed_mps", 4, "0"),
+    ("wind_speed_mps_qc", 1, None),
+    ("ceiling_m", 5, "0"),
+    ("ceiling_m_qc", 1, None),
+    ("ceiling_m_how", 1, None),
+    ("ceiling_m_cavok", 1, None),
+    ("vsby_m", 6, "0"),
+    ("vsby_m_qc", 1, None),
+    ("vsby_m_variable", 1, None),
+    ("vsby_m_variable_qc", 1, None),
+    ("airtemp_c", 5, "+"),
+    ("airtemp_c_qc", 1, None),
+    ("dewpointtemp_c", 5, "+"),
+    ("dewpointtemp_c_qc", 1, None),
+    ("mslp_hpa", 5, "0"),
+    ("mslp_hpa_qc", 1, None),
+]
+MANDATORY_SCALE = {
+    "lat": 1000.0,
+    "lon": 1000.0,
+    "wind_speed_mps": 10.0,
+    "airtemp_c": 10.0,
+    "dewpointtemp_c": 10.0,
+    "mslp_hpa": 10.0,
+}
+MANDATORY_SIZE = 105
+REM_CODES = ["SYN", "AWY", "MET", "SOD", "SOM", "HPD"]
 
 
 def _tonumeric(val, scale_factor=1.0):
@@ -1213,6 +1271,20 @@ ADDITIONAL = {
         ["water_level_code", 1],
     ],
 }
+ADDITIONAL_SIZE = {
+    code: sum(token[1] for token in tokens)
+    for code, tokens in ADDITIONAL.items()
+}
+# The additional data codes used by gen_metar
+METAR_CODES = [
+    "OC1",
+    *[f"AU{i}" for i in range(1, 10)],
+    *[f"GD{i}" for i in range(1, 7)],
+    "MA1",
+    *[f"AA{i}" for i in range(1, 5)],
+    *[f"KA{i}" for i in range(1, 5)],
+    "MD1",
+]
 SLP = "Sea Level PressureIn"
 ERROR_RE = re.compile("Unparsed groups in body '(?P<msg>.*)' while processing")
 
@@ -1267,7 +1339,7 @@ def gen_metar(data):
         mtr += "KT "
     # vis
     if data["vsby_m"] is not None:
-        val = (units("meter") * data["vsby_m"]).to(units("mile")).m
+        val = (METER * data["vsby_m"]).to(MILE).m
         mtr += f"{vsbyfmt(val)}SM "
     # Present Weather Time
     combocode = ""
@@ -1307,7 +1379,7 @@ def gen_metar(data):
         elif height is None:
             continue
         else:
-            hft = (units("meter") * height).to(units("feet")).m / 100.0
+            hft = (METER * height).to(FEET).m / 100.0
             mtr += f"{skycode}{hft:03.0f} "
     # temperature
     tgroup = None
@@ -1357,7 +1429,7 @@ def gen_metar(data):
         else:
             warnings.warn(f"Unknown precip hours {hours}", stacklevel=1)
             continue
-        amount = (units("mm") * depth).to(units("inch")).m
+        amount = (MM * depth).to(INCH).m
         rmk.append(f"{prefix}{(amount * 100):04.0f}")
     if data["mslp_hpa"] is not None:
         _v = data["mslp_hpa"] * 10 % 1000
@@ -1410,6 +1482,100 @@ def gen_metar(data):
     data["metar"] = mtr.strip()
 
 
+def _frame_records(df: pd.DataFrame) -> list[dict]:
+    """Convert `read_file` output into `parser` like dictionaries."""
+    groups = {}
+    for col in df.columns:
+        if col[:3] in ADDITIONAL and col[3:4] == "_":
+            groups.setdefault(col[:3], []).append(col)
+    nulls = df.isna()
+    values = {}
+    for col in df.columns:
+        values[col] = np.array(df[col].to_numpy(dtype=object))
+        values[col][nulls[col].to_numpy()] = None
+    extra_cols = [col for cols in groups.values() for col in cols]
+    mandatory = [col for col in df.columns if col not in extra_cols]
+    records = [
+        dict(zip(mandatory, row, strict=True))
+        for row in zip(
+            *[values[col].tolist() for col in mandatory], strict=True
+        )
+    ]
+    for data in records:
+        data["extra"] = {}
+    for code, cols in groups.items():
+        names = [col[4:] for col in cols]
+        present = np.flatnonzero(~nulls[cols].all(axis=1).to_numpy())
+        rows = zip(
+            *[values[col][present].tolist() for col in cols], strict=True
+        )
+        for i, row in zip(present.tolist(), rows, strict=True):
+            records[i]["extra"][code] = dict(zip(names, row, strict=True))
+    return records
+
+
+def _gen_metar_chunk(chunk) -> list[Optional[str]]:
+    """Generate the METARs for a chunk of records."""
+    if isinstance(chunk, pd.DataFrame):
+        chunk = _frame_records(chunk)
+    res = []
+    for data in chunk:
+        # gen_metar sets the metar within the dict, which is not ours
+        data = dict(data)
+        try:
+            gen_metar(data)
+        except Exception as exp:
+            LOG.info("gen_metar failed for %s: %s", data.get("valid"), exp)
+            res.append(None)
+            continue
+        res.append(data["metar"])
+    return res
+
+
+def gen_metar_many(
+    records: Union[list[dict], pd.DataFrame],
+    workers: int = 1,
+    chunksize: int = 1000,
+) -> list[Optional[str]]:
+    """Generate METARs for many records, optionally with worker processes.
+
+    The records are split into chunks of ``chunksize``, which are handed
+    to a pool of worker processes, and the results are returned in the
+    order provided.  A record that `gen_metar` fails on gets a ``None``.
+    The provided records are not modified.
+
+    Args:
+      records (list or pandas.DataFrame): The dictionaries from `parser` or
+        a DataFrame from `read_file`, which should include the
+        `METAR_CODES` additional data codes.
+      workers (int): Number of worker processes, ``1`` generates within
+        this process.
+      chunksize (int): The number of records per chunk of work.
+
+    Returns:
+      list of METAR strings or None
+    """
+    if isinstance(records, pd.DataFrame):
+        chunks = [
+            records.iloc[i : i + chunksize]
+            for i in range(0, len(records.index), chunksize)
+        ]
+    else:
+        chunks = [
+            records[i : i + chunksize]
+            for i in range(0, len(records), chunksize)
+        ]
+    res = []
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            res.extend(_gen_metar_chunk(chunk))
+        return res
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for metars in pool.map(_gen_metar_chunk, chunks):
+            res.extend(metars)
+    return res
+
+
 def parser(msg, call_id, add_metar=False):
     """Parse the message(single line) into a dict
 
@@ -1478,7 +1644,7 @@ def parse_extra(data, extra):
         if code == "REM":
             data["extra"]["REM"] = {}
             code = extra[pos : pos + 3]
-            while code in ["SYN", "AWY", "MET", "SOD", "SOM", "HPD"]:
+            while code in REM_CODES:
                 pos += 3
                 sz = int(extra[pos : pos + 3])
                 pos += 3
@@ -1510,3 +1676,200 @@ def parse_extra(data, extra):
             else:
                 data["extra"][code][token[0]] = extra[pos : pos + token[1]]
             pos += token[1]
+
+
+def _locate_extra(extra: str, codes: set) -> dict[str, int]:
+    """Find where the values of the given additional codes start.
+
+    This walks the groups like `parse_extra` does, without decoding them,
+    and stops once all codes are found or the section can not be parsed.
+    """
+    found = {}
+    pos = 0
+    while pos < len(extra) and len(found) < len(codes):
+        code = extra[pos : pos + 3]
+        pos += 3
+        if code == "ADD":
+            continue
+        if code == "QNN":
+            while QNN_RE.match(extra[pos : pos + 5]):
+                pos += 11
+            continue
+        if code == "REM":
+            while extra[pos : pos + 3] in REM_CODES:
+                try:
+                    pos += 6 + int(extra[pos + 3 : pos + 6])
+                except ValueError:
+                    return found
+            continue
+        if code == "EQD":
+            while EQD_RE.match(extra[pos : pos + 3]):
+                pos += 16
+            continue
+        if code not in ADDITIONAL:
+            break
+        if code in codes:
+            found[code] = pos
+        pos += ADDITIONAL_SIZE[code]
+    return found
+
+
+def _mandatory_frame(lines: list[bytes], call_id: str) -> pd.DataFrame:
+    """Decode the mandatory section of the lines into columns."""
+    lengths = np.fromiter(map(len, lines), dtype=np.int64, count=len(lines))
+    starts = np.cumsum(lengths) - lengths
+    buf = np.frombuffer(b"".join(lines), dtype=np.uint8)
+    # Lines too short for the mandatory section would not match DS3505_RE
+    ok = lengths >= MANDATORY_SIZE
+    fixed = buf[starts[ok, None] + np.arange(MANDATORY_SIZE)]
+    rows = np.flatnonzero(ok)
+    isdigit = (fixed >= 48) & (fixed <= 57)
+    columns = {}
+    offset = 0
+    for name, width, kind in MANDATORY_FIELDS:
+        sl = slice(offset, offset + width)
+        offset += width
+        if kind is None:
+            columns[name] = fixed[:, sl]
+            continue
+        if kind == "+":
+            sign = fixed[:, sl.start]
+            ok = (sign == 43) | (sign == 45)
+            sl = slice(sl.start + 1, sl.stop)
+        else:
+            ok = np.ones(len(fixed), dtype=bool)
+        ok &= isdigit[:, sl].all(axis=1)
+        if not ok.all():
+            fixed, isdigit, rows = fixed[ok], isdigit[ok], rows[ok]
+            columns = {k: v[ok] for k, v in columns.items()}
+        if name == "chars":
+            columns[name] = fixed[:, sl]
+            continue
+        digits = fixed[:, sl].astype(np.int64) - 48
+        val = digits @ (10 ** np.arange(digits.shape[1] - 1, -1, -1))
+        val = val.astype(np.float64)
+        if kind == "+":
+            val[fixed[:, sl.start - 1] == 45] *= -1
+        if name in ["yyyymmdd", "hhmi"]:
+            columns[name] = val
+            continue
+        # Values of all nines are missing
+        val[(digits == 9).all(axis=1)] = np.nan
+        columns[name] = val / MANDATORY_SCALE.get(name, 1.0)
+    # Seems like these obs with this flag are 'bad'
+    ok = (columns["srcflag"][:, 0] != ord("A")) & (
+        columns["srcflag"][:, 0] != ord("B")
+    )
+    data = {"_row": rows[ok]}
+    for name, val in columns.items():
+        val = val[ok]
+        if val.ndim == 2:
+            # Decode as latin-1 by widening the bytes to unicode code points
+            val = val.astype(np.uint32).view(f"U{val.shape[1]}")[:, 0]
+        data[name] = val
+    yyyymmdd = data.pop("yyyymmdd").astype(np.int64)
+    hhmi = data.pop("hhmi").astype(np.int64)
+    df = pd.DataFrame(data)
+    df["valid"] = pd.to_datetime(
+        pd.DataFrame(
+            {
+                "year": yyyymmdd // 10000,
+                "month": yyyymmdd // 100 % 100,
+                "day": yyyymmdd % 100,
+                "hour": hhmi // 100,
+                "minute": hhmi % 100,
+            }
+        ),
+        errors="coerce",
+        utc=True,
+    )
+    df["call_id"] = call_id
+    return df[df["valid"].notna()].reset_index(drop=True)
+
+
+def _extra_frame(
+    df: pd.DataFrame, lines: list[bytes], codes: list
+) -> pd.DataFrame:
+    """Decode the requested additional data codes into columns."""
+    wanted = set(codes)
+    groups = {code: [None] * len(df.index) for code in codes}
+    for i, row in enumerate(df["_row"].to_numpy()):
+        line = lines[row]
+        if len(line) <= MANDATORY_SIZE:
+            continue
+        extra = line[MANDATORY_SIZE:].decode("latin-1")
+        for code, pos in _locate_extra(extra, wanted).items():
+            groups[code][i] = extra[pos : pos + ADDITIONAL_SIZE[code]]
+    columns = {}
+    for code in codes:
+        group = pd.Series(groups[code], dtype=object)
+        pos = 0
+        for token in ADDITIONAL[code]:
+            name = f"{code}_{token[0]}"
+            columns[name] = group.str.slice(pos, pos + token[1])
+            pos += token[1]
+            if len(token) == 3:
+                columns[name] = _tonumeric_many(columns[name], token[2])
+    return pd.DataFrame(columns).set_index(df.index)
+
+
+def _tonumeric_many(values: list, func) -> np.ndarray:
+    """Vectorized version of the given additional data converter."""
+    scale, truncate = {
+        _tonumeric: (1.0, False),
+        _d10: (10.0, False),
+        _d1000: (1000.0, False),
+        _i: (1.0, True),
+        _i10: (10.0, True),
+    }[func]
+    ser = pd.Series(values, dtype=object)
+    valid = ser.notna() & (ser != "")
+    strs = ser[valid].astype(str)
+    missing = strs.str.match(MISSING_RE.pattern) | (strs == "D0")
+    res = np.full(len(values), np.nan)
+    res[valid.to_numpy()] = np.where(
+        missing, np.nan, pd.to_numeric(strs, errors="coerce") / scale
+    )
+    return np.trunc(res) if truncate else res
+
+
+def read_file(
+    filename: str,
+    call_id: str,
+    codes: Optional[list[str]] = None,
+    chunksize: int = 100_000,
+) -> Generator[pd.DataFrame]:
+    """Read a DS3505 file into DataFrames with vectorized decoding.
+
+    The mandatory section of each line is decoded into columns of the same
+    name and value as `parser` provides, with missing numbers as ``NaN``
+    and the ``yyyymmdd`` and ``hhmi`` combined into a ``valid`` column.
+    The additional data section is only decoded for the requested codes,
+    into ``<code>_<name>`` columns, for example ``AA1_depth``.  Lines that
+    `parser` would skip are skipped here as well.
+
+    Args:
+      filename (str): The DS3505 file to read.
+      call_id (str): hard coded call_id as the data can't be trusted, sigh
+      codes (list, optional): The additional data codes to decode, ie
+        ``["AA1", "MD1"]``.
+      chunksize (int): The number of lines to decode per DataFrame.
+
+    Yields:
+      pandas.DataFrame for each chunk of lines with any data.
+    """
+    codes = [] if codes is None else list(codes)
+    for code in codes:
+        if code not in ADDITIONAL:
+            raise ValueError(f"Unknown additional data code {code}")
+    with open(filename, "rb") as fh:
+        while True:
+            lines = [line.rstrip(b"\r\n") for line in islice(fh, chunksize)]
+            if not lines:
+                break
+            df = _mandatory_frame(lines, call_id)
+            if df.empty:
+                continue
+            if codes:
+                df = pd.concat([df, _extra_frame(df, lines, codes)], axis=1)
+            yield df.drop(columns="_row")
@@ -2,8 +2,12 @@
 
 from collections import defaultdict
 from collections.abc import Generator
-from typing import Optional
+from itertools import islice
+from operator import itemgetter
+from typing import Optional, Union
 
+import numpy as np
+import pandas as pd
 from metpy.units import units
 
 from pyiem.nws.products.metarcollect import normalize_temp
@@ -21,6 +25,27 @@ MILE = units("mile")
 M = units("meter")
 FT = units("feet")
 
+# The present weather sources, in order of preference
+SRCS = ["mw", "au", "aw"]
+WXKEYS = [f"pres_wx_{src}{i}" for i in range(1, 4) for src in SRCS]
+# The dialect columns parsed by parse_packet
+PACKETS = [
+    "tmpc",
+    "dwpc",
+    "alti_mb",
+    "mslp",
+    "drct",
+    "smps",
+    "gmps",
+    "vsby_km",
+    "p01m",
+    "p03m",
+    "p06m",
+    "p24m",
+    "skyl1",
+    "skyl2",
+    "skyl3",
+]
 # For those we don't take verbatim
 PRESWX_TO_METAR = {
     "FG:44": "FG",
@@ -186,7 +211,7 @@ def process_line(line: str, dialect: dict[str, int]) -> dict:
 
     wxcodes = []
     for i in range(1, 4):
-        for src in ["mw", "au", "aw"]:
+        for src in SRCS:
             val = tokens[dialect[f"pres_wx_{src}{i}"]]
             if val not in ["", "00", "9999"]:
                 code = PRESWX_TO_METAR.get(
@@ -201,14 +226,148 @@ def process_line(line: str, dialect: dict[str, int]) -> dict:
     return ob
 
 
-def process_file(filename: str) -> Generator[dict]:
-    """Process the provided file."""
+def _parse_packets(value, measure, qc) -> np.ndarray:
+    """Vectorized `parse_packet` over token arrays from many lines."""
+    res = np.full(len(value), np.nan)
+    ok = (value != "") & (value != "9999") & (qc != "3") & (qc != "7")
+    trace = ok & (measure == "2-Trace")
+    res[trace] = TRACE_VALUE
+    ok &= ~trace
+    vrb = ok & (value == "VRB")
+    res[vrb] = VARIABLE_WIND_DIRECTION
+    ok &= ~vrb
+    res[ok] = value[ok].astype(float)
+    return res
+
+
+def _normalize_temps(val: np.ndarray) -> np.ndarray:
+    """Vectorized `normalize_temp`."""
+    rounded = np.round(val, 0)
+    return np.where(np.abs(val - rounded) < 0.199, rounded, np.round(val, 1))
+
+
+def _to_inches(val: np.ndarray) -> np.ndarray:
+    """Convert precipitation, maintaining the trace sentinel."""
+    inches = np.round((MM * val).to(INCH).m, 2)
+    return np.where(val == TRACE_VALUE, TRACE_VALUE, inches)
+
+
+def _find_raw(remark: str) -> Optional[str]:
+    """Find the METAR within the remarks."""
+    for prefix in ["METAR", "SPECI"]:
+        if (pos := remark.find(prefix)) > -1:
+            return clean_metar(remark[pos + 5 :])
+    return None
+
+
+def _find_wxcodes(*tokens) -> Optional[list[str]]:
+    """Find the present weather codes."""
+    wxcodes = []
+    for val in tokens:
+        if val not in ["", "00", "9999"]:
+            code = PRESWX_TO_METAR.get(val, val.split(":")[0])
+            if code not in wxcodes:
+                wxcodes.append(code)
+    return wxcodes or None
+
+
+def process_lines(lines: list[str], dialect: dict[str, int]) -> pd.DataFrame:
+    """Process many lines into a DataFrame, see `process_line`.
+
+    The columns are those `process_line` provides, with missing values
+    as ``NaN`` or ``None``.
+    """
+    plain = ["year", "month", "day", "hour", "minute", "remarks"]
+    plain.extend(f"skyc{i}" for i in range(1, 4))
+    plain.extend(WXKEYS)
+    indices = [dialect[key] for key in plain]
+    for key in PACKETS:
+        indices.extend(dialect[key] + i for i in range(3))
+    getter = itemgetter(*indices)
+    columns = [
+        np.array(col, dtype=object)
+        for col in zip(
+            *[getter(line.strip().split("|")) for line in lines], strict=True
+        )
+    ]
+    tokens = dict(zip(plain, columns, strict=False))
+    # The value, measure and qc of each packet
+    packets = {
+        key: _parse_packets(
+            *columns[len(plain) + 3 * i : len(plain) + 3 * i + 3]
+        )
+        for i, key in enumerate(PACKETS)
+    }
+    df = pd.DataFrame(
+        {
+            "valid": pd.to_datetime(
+                pd.DataFrame(
+                    {
+                        key: tokens[key].astype(int)
+                        for key in ["year", "month", "day", "hour", "minute"]
+                    }
+                ),
+                utc=True,
+            )
+        }
+    )
+    tmpc = packets["tmpc"]
+    df["tmpf"] = _normalize_temps(c2f(tmpc))
+    # Require a temperature to proceed
+    dwpc = np.where(np.isnan(tmpc), np.nan, packets["dwpc"])
+    df["dwpf"] = _normalize_temps(c2f(dwpc))
+    df["alti"] = np.round((MB * packets["alti_mb"]).to(HG).m, 2)
+    # No unit conversion needed for these
+    df["mslp"] = packets["mslp"]
+    df["drct"] = packets["drct"]
+    df["sknt"] = _normalize_temps((MPS * packets["smps"]).to(KTS).m)
+    df.loc[df["sknt"] == 0, "drct"] = 0
+    df["gust"] = _normalize_temps((MPS * packets["gmps"]).to(KTS).m)
+    val = packets["vsby_km"]
+    # Arbitrary limit of 100km
+    val[~((val >= 0) & (val < 100))] = np.nan
+    vsby = (KM * val).to(MILE).m
+    df["vsby"] = np.where(vsby > 2.9, np.round(vsby, 0), vsby)
+    df["phour"] = _to_inches(packets["p01m"])
+    for hr in [3, 6, 24]:
+        df[f"p{hr:02.0f}i"] = _to_inches(packets[f"p{hr:02.0f}m"])
+    for i in range(1, 4):
+        skyc = pd.Series(tokens[f"skyc{i}"], dtype=object)
+        df[f"skyc{i}"] = (
+            skyc.str.split(":").str[0].where(skyc.str.find(":") > 0, None)
+        )
+        df[f"skyl{i}"] = np.trunc((M * packets[f"skyl{i}"]).to(FT).m)
+    df["raw"] = [_find_raw(remark) for remark in tokens["remarks"]]
+    df["wxcodes"] = [
+        _find_wxcodes(*vals)
+        for vals in zip(*[tokens[key] for key in WXKEYS], strict=True)
+    ]
+    return df
+
+
+def process_file(
+    filename: str, chunksize: Optional[int] = None
+) -> Generator[Union[dict, pd.DataFrame]]:
+    """Process the provided file.
+
+    Args:
+      filename (str): The GHCNh pipe separated file.
+      chunksize (int, optional): When provided, yield DataFrames of up to
+        this many lines via `process_lines` instead of a dict per line.
+
+    Yields:
+      dict or pandas.DataFrame
+    """
     with open(filename) as fh:  # skipcq
-        for linenum, line in enumerate(fh):
-            if linenum == 0:
-                dialect = build_dialect(line)
-                continue
-            # Skip lines that are woefully short
-            if len(line) < 10:
-                continue
-            yield process_line(line, dialect)
+        header = next(fh, None)
+        if header is None:
+            return
+        dialect = build_dialect(header)
+        # Skip lines that are woefully short
+        lines = (line for line in fh if len(line) >= 10)
+        if chunksize is None:
+            for line in lines:
+                yield process_line(line, dialect)
+            return
+        while chunk := list(islice(lines, chunksize)):
+            yield process_lines(chunk, dialect)
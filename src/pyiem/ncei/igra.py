@@ -44,16 +44,56 @@ WSPD           47- 51   Integer
 -------------------------------
 """
 
+import mmap
+import os
 from datetime import datetime, timedelta
-from io import StringIO
-from typing import Optional
+from functools import partial
+from typing import Iterator, Optional, Union
 
+import numpy as np
+from psycopg.sql import SQL, Identifier
 from pydantic import ValidationError
 from shapely.geometry import Point
 
 from pyiem.models.igra import SoundingHeader, SoundingModel, SoundingRecord
 from pyiem.reference import igra2icao
-from pyiem.util import LOG, utc
+from pyiem.util import LOG, pool_imap, utc
+
+PROFILE_COLUMNS = (
+    "fid, ts, levelcode, pressure, height, tmpc, dwpc, drct, smps"
+)
+# The data records are fixed width, with missing values as NaN / NaT
+RECORD_SIZE = 52
+RECORD_DTYPE = np.dtype(
+    [
+        ("lvltyp1", np.int8),
+        ("lvltyp2", np.int8),
+        ("valid", "datetime64[s]"),
+        ("press", np.float64),
+        ("pflag", "U1"),
+        ("gph", np.float64),
+        ("zflag", "U1"),
+        ("temp", np.float64),
+        ("tflag", "U1"),
+        ("rh", np.float64),
+        ("dewp", np.float64),
+        ("wdir", np.float64),
+        ("wspd", np.float64),
+    ]
+)
+
+
+def _levelcode(record: SoundingRecord) -> int:
+    """Compute the levelcode, which came from the rucsounding days."""
+    # 9 is surface data
+    # 4 is mandatory level
+    # 5 is unsure
+    levelcode = 5
+    if record.lvltyp2 == 1:
+        levelcode = 9
+    if record.lvltyp1 == 1:
+        levelcode = 4
+    return levelcode
 
 
 class Sounding:
@@ -66,13 +106,40 @@ class Sounding:
             records=records,
         )
 
-    def sql(self, txn, overwrite=False):
+    def profile_row(self, fid: int, record: SoundingRecord) -> tuple:
+        """Return the raob_profile columns for the given record."""
+        return (
+            fid,
+            record.valid,
+            _levelcode(record),
+            record.press,
+            record.gph,
+            record.temp,
+            record.dewp,
+            record.wdir,
+            record.wspd,
+        )
+
+    @property
+    def tropo_level(self) -> Optional[float]:
+        """The pressure of the last tropopause level, if any."""
+        tropo_level = None
+        for record in self.model.records:
+            if record.lvltyp2 == 2:  # tropopause
+                tropo_level = record.press
+        return tropo_level
+
+    def sql(self, txn, overwrite=False, copy=False):
         """Do the database insert.
 
         Args:
             txn (psycopg2.cursor): Database cursor
             overwrite (bool): Should we overwrite existing data?
+            copy (bool): Write the levels with a COPY, see `sql_many`.
         """
+        if copy:
+            sql_many(txn, [self], overwrite=overwrite)
+            return
         icao = igra2icao[self.model.header.station]
         txn.execute(
             "select fid from raob_flights where station = %s and valid = %s",
@@ -98,41 +165,19 @@ class Sounding:
             f"DELETE from {table} where fid = %s",
             (fid,),
         )
-        tropo_level = None
         for record in self.model.records:
-            # levelcode came from the rucsounding days
-            # 9 is surface data
-            # 4 is mandatory level
-            # 5 is unsure
-            levelcode = 5
-            if record.lvltyp2 == 1:
-                levelcode = 9
-            if record.lvltyp1 == 1:
-                levelcode = 4
-            if record.lvltyp2 == 2:  # tropopause
-                tropo_level = record.press
             txn.execute(
                 f"""
-    INSERT into {table} (fid, ts, levelcode, pressure, height, tmpc, dwpc,
-    drct, smps) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    INSERT into {table} ({PROFILE_COLUMNS})
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
     """,
-                (
-                    fid,
-                    record.valid,
-                    levelcode,
-                    record.press,
-                    record.gph,
-                    record.temp,
-                    record.dewp,
-                    record.wdir,
-                    record.wspd,
-                ),
+                self.profile_row(fid, record),
             )
         txn.execute(
             """
     UPDATE raob_flights SET release_time = %s, ingested_at = now(),
     tropo_level = %s, computed = 'f' WHERE fid = %s""",
-            (self.model.header.release_valid, tropo_level, fid),
+            (self.model.header.release_valid, self.tropo_level, fid),
         )
         LOG.info(
             "Added %s records for %s[%s][fid:%s]",
@@ -143,6 +188,104 @@ class Sounding:
         )
 
 
+def _flight_fids(txn, soundings: list, overwrite: bool) -> list:
+    """Find or create the raob_flights entries for the soundings.
+
+    Returns:
+      list of (fid, sounding) to be written
+    """
+    # Like repeated Sounding.sql calls, the first one wins unless overwrite
+    keyed = {}
+    for sounding in soundings:
+        header = sounding.model.header
+        key = (igra2icao[header.station], header.valid)
+        if overwrite or key not in keyed:
+            keyed[key] = sounding
+    stations = [key[0] for key in keyed]
+    valids = [key[1] for key in keyed]
+    txn.execute(
+        "select f.fid, f.station, f.valid from raob_flights f, "
+        "unnest(%s::text[], %s::timestamptz[]) as k(station, valid) "
+        "where f.station = k.station and f.valid = k.valid",
+        (stations, valids),
+    )
+    fids = {(row["station"], row["valid"]): row["fid"] for row in txn}
+    res = []
+    for key in list(keyed):
+        if key not in fids:
+            continue
+        sounding = keyed.pop(key)
+        if not overwrite:
+            LOG.info("Skipping %s[%s] as record exists", *key)
+            continue
+        res.append((fids[key], sounding))
+    if keyed:
+        txn.execute(
+            "INSERT into raob_flights(station, valid) "
+            "select * from unnest(%s::text[], %s::timestamptz[]) "
+            "RETURNING fid, station, valid",
+            ([key[0] for key in keyed], [key[1] for key in keyed]),
+        )
+        res.extend(
+            (row["fid"], keyed[(row["station"], row["valid"])]) for row in txn
+        )
+    return res
+
+
+def sql_many(txn, soundings: list, overwrite: bool = False) -> int:
+    """Write many soundings to the database, with a COPY of the levels.
+
+    This does the same as `Sounding.sql` for each sounding, with a handful
+    of statements per ``raob_profile_YYYY`` table instead of one per level.
+
+    Args:
+        txn (psycopg.cursor): Database cursor, with dictionary rows.
+        soundings (list): The `Sounding` objects to write.
+        overwrite (bool): Should we overwrite existing data?
+
+    Returns:
+        int number of levels written
+    """
+    if not soundings:
+        return 0
+    bytable = {}
+    for fid, sounding in _flight_fids(txn, soundings, overwrite):
+        table = f"raob_profile_{sounding.model.header.valid.year}"
+        bytable.setdefault(table, []).append((fid, sounding))
+    rows = 0
+    for table, todo in bytable.items():
+        fids = [fid for fid, _ in todo]
+        # Delete any existing data
+        txn.execute(
+            SQL("DELETE from {} where fid = ANY(%s)").format(
+                Identifier(table)
+            ),
+            (fids,),
+        )
+        with txn.copy(
+            SQL("COPY {} ({}) FROM STDIN").format(
+                Identifier(table), SQL(PROFILE_COLUMNS)
+            )
+        ) as copy:
+            for fid, sounding in todo:
+                for record in sounding.model.records:
+                    copy.write_row(sounding.profile_row(fid, record))
+                    rows += 1
+        txn.execute(
+            "UPDATE raob_flights f SET release_time = u.release_time, "
+            "ingested_at = now(), tropo_level = u.tropo_level, computed = 'f' "
+            "from unnest(%s::int[], %s::timestamptz[], %s::float8[]) "
+            "as u(fid, release_time, tropo_level) WHERE f.fid = u.fid",
+            (
+                fids,
+                [s.model.header.release_valid for _, s in todo],
+                [s.tropo_level for _, s in todo],
+            ),
+        )
+    LOG.info("Added %s records for %s soundings", rows, len(soundings))
+    return rows
+
+
 def parse_header(text: str) -> SoundingHeader:
     """Compute all the things."""
     station = text[1:12].strip()
@@ -260,34 +403,215 @@ def process_sounding(text: str) -> Sounding:
     return Sounding(header, records)
 
 
-def process_ytd(filename: str):
-    """Process the YTD file on NCEI's webserver."""
+def process_sounding_array(text: str) -> tuple[SoundingHeader, np.recarray]:
+    """Process the IGRA sounding text into a typed record array.
 
-    def _parser(text: str):
-        """Protect the parser."""
-        try:
-            return process_sounding(text)
-        except Exception:
-            LOG.exception(
-                "Failed to process %s, first line: %s",
-                filename,
-                text.split("\n")[0],
-            )
-        return None
+    This is a vectorized alternative to `process_sounding`, which skips the
+    per record pydantic validation.  The same conversions are done and the
+    same records are dropped for being out of bounds, but missing values
+    are ``NaN`` and the ``valid`` times are naive UTC ``datetime64``.
+
+    Args:
+        text (str): The sounding text, starting with the header line.
+
+    Returns:
+        (SoundingHeader, numpy.recarray) with the `RECORD_DTYPE` records
+    """
+    lines = text.strip().split("\n")
+    header = parse_header(lines[0])
+    fixed = np.array(
+        [line[:RECORD_SIZE].ljust(RECORD_SIZE) for line in lines[1:]],
+        dtype=f"S{RECORD_SIZE}",
+    )
+    chars = fixed.view(np.uint8).reshape(len(fixed), RECORD_SIZE)
+
+    def _int(start: int, stop: int) -> np.ndarray:
+        """Convert the columns to integers."""
+        return (
+            chars[:, start:stop]
+            .copy()
+            .view(f"S{stop - start}")[:, 0]
+            .astype(np.int64)
+        )
+
+    def _missing(val: np.ndarray, bad: np.ndarray) -> np.ndarray:
+        """Set the bad values to missing."""
+        val = val.astype(np.float64)
+        val[bad] = np.nan
+        return val
+
+    def _float(start: int, stop: int) -> np.ndarray:
+        """Mirror `convert_float`."""
+        val = _int(start, stop) / 10.0
+        return _missing(val, val < -100)
+
+    def _flag(col: int) -> np.ndarray:
+        """Return the single character column."""
+        return chars[:, col].astype(np.uint32).view("U1")
 
-    sio = None
-    with open(filename) as fh:
-        for line in fh:
-            if line.strip() == "":
-                continue
-            if line.startswith("#"):
-                if sio is not None:
-                    res = _parser(sio.getvalue())
-                    if res is not None:
-                        yield res
-                sio = StringIO()
-            sio.write(line)
-    if sio is not None:
-        res = _parser(sio.getvalue())
-        if res is not None:
-            yield res
+    records = np.empty(len(fixed), dtype=RECORD_DTYPE)
+    records["lvltyp1"] = _int(0, 1)
+    records["lvltyp2"] = _int(1, 2)
+    # etime is MMMSS with a negative number being missing
+    etime = _int(3, 8)
+    release = np.datetime64(header.release_valid.replace(tzinfo=None), "s")
+    valid = release + (etime // 100 * 60 + etime % 100).astype(
+        "timedelta64[s]"
+    )
+    valid[etime < 0] = np.datetime64("NaT")
+    records["valid"] = valid
+    press = _int(9, 15) / 100.0
+    records["press"] = _missing(press, press < 0)
+    records["pflag"] = _flag(15)
+    gph = _int(16, 21)
+    records["gph"] = _missing(gph, gph < 0)
+    records["zflag"] = _flag(21)
+    records["temp"] = _float(22, 27)
+    records["tflag"] = _flag(27)
+    rh = _float(28, 33)
+    records["rh"] = _missing(rh, (rh <= 0) | (rh >= 104))
+    records["dewp"] = records["temp"] - _float(34, 39)
+    wdir = _int(40, 45)
+    records["wdir"] = _missing(wdir, wdir < 0)
+    records["wspd"] = _float(46, 51)
+    # Mirror the SoundingRecord validation, NaN compares as False
+    ok = (
+        (records["lvltyp1"] >= 0)
+        & (records["lvltyp1"] <= 3)
+        & (records["lvltyp2"] >= 0)
+        & (records["lvltyp2"] <= 2)
+        & ~(records["dewp"] < -100)
+        & ~(records["wdir"] > 360)
+        & ~(records["wspd"] < 0)
+    )
+    if not ok.all():
+        LOG.info(
+            "%s[%s] %s records failed validation",
+            header.station,
+            header.valid,
+            (~ok).sum(),
+        )
+    return header, records[ok].view(np.recarray)
+
+
+def _find_soundings(buf) -> list[tuple[int, int]]:
+    """Return the (start, end) byte offsets of each sounding in the buffer."""
+    data = np.frombuffer(buf, dtype=np.uint8)
+    starts = np.flatnonzero(data == ord("#"))
+    # The header lines start with a #
+    starts = starts[(starts == 0) | (data[starts - 1] == ord("\n"))]
+    ends = np.append(starts[1:], len(data))
+    return list(zip(starts.tolist(), ends.tolist(), strict=True))
+
+
+def _process_text(filename: str, raw: bytes, as_array: bool):
+    """Protect the parser."""
+    text = ""
+    try:
+        # Blank lines are not records
+        text = "\n".join(
+            line for line in raw.decode("utf-8").splitlines() if line.strip()
+        )
+        if as_array:
+            return process_sounding_array(text)
+        return process_sounding(text)
+    except Exception:
+        LOG.exception(
+            "Failed to process %s, first line: %s",
+            filename,
+            text.split("\n")[0],
+        )
+    return None
+
+
+def _process_offsets(
+    filename: str, offsets: list[tuple[int, int]], as_array: bool
+) -> list:
+    """Process the soundings found at the given offsets within the file."""
+    with (
+        open(filename, "rb") as fh,
+        mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+    ):
+        return [
+            _process_text(filename, mm[start:end], as_array)
+            for start, end in offsets
+        ]
+
+
+def process_ytd(
+    filename: str,
+    workers: int = 1,
+    as_array: bool = False,
+    batchsize: int = 100,
+) -> Iterator[Union[Sounding, tuple[SoundingHeader, np.recarray]]]:
+    """Process the YTD file on NCEI's webserver.
+
+    The file is memory mapped and the offsets of the sounding headers found
+    in one pass, so that the soundings can be split amongst a pool of worker
+    processes, which map the file themselves.  The soundings are yielded in
+    file order and those that fail to parse are skipped.
+
+    Args:
+        filename (str): The IGRA2 file to process.
+        workers (int): Number of worker processes, ``1`` parses within this
+          process.
+        as_array (bool): Yield `process_sounding_array` results instead of
+          `Sounding` objects, skipping the pydantic record validation.
+        batchsize (int): Number of soundings sent to a worker at once.
+
+    Yields:
+        Sounding or (SoundingHeader, numpy.recarray)
+    """
+    if os.path.getsize(filename) == 0:
+        return
+    with (
+        open(filename, "rb") as fh,
+        mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+    ):
+        offsets = _find_soundings(mm)
+        if workers <= 1:
+            for start, end in offsets:
+                res = _process_text(filename, mm[start:end], as_array)
+                if res is not None:
+                    yield res
+            return
+    batches = [
+        offsets[i : i + batchsize] for i in range(0, len(offsets), batchsize)
+    ]
+    func = partial(_process_offsets, filename, as_array=as_array)
+    for future in pool_imap(func, batches, workers, max_pending=2 * workers):
+        for res in future.result():
+            if res is not None:
+                yield res
+
+
+def load_ytd(pgconn, filename: str, overwrite=False, batchsize=500) -> int:
+    """Load a YTD file into the database, committing in batches.
+
+    The soundings from `process_ytd` are written with `sql_many` and the
+    transaction committed after each ``batchsize`` soundings, so that a
+    failure only loses the current batch.
+
+    Args:
+        pgconn (psycopg.Connection): Database connection, with dictionary
+          rows.
+        filename (str): The IGRA2 file to load.
+        overwrite (bool): Should we overwrite existing data?
+        batchsize (int): Number of soundings per transaction.
+
+    Returns:
+        int number of levels written
+    """
+    rows = 0
+    batch = []
+    cursor = pgconn.cursor()
+    for sounding in process_ytd(filename):
+        batch.append(sounding)
+        if len(batch) >= batchsize:
+            rows += sql_many(cursor, batch, overwrite=overwrite)
+            pgconn.commit()
+            batch = []
+    rows += sql_many(cursor, batch, overwrite=overwrite)
+    pgconn.commit()
+    cursor.close()
+    return rows
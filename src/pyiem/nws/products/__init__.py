@@ -2,10 +2,52 @@
 
 from __future__ import absolute_import
 
-from typing import Optional, Union
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional, Union
 
 from pyiem.nws.ugc import UGCProvider
-from pyiem.wmo import WMOProduct
+from pyiem.util import pool_imap
+from pyiem.wmo import parse_header
+
+# Set within each parse_many worker process by _init_worker
+_WORKER_STATE = {}
+
+
+@lru_cache(maxsize=1)
+def _get_xref() -> dict:
+    """Build the AFOS prefix to parser lookup, importing things once."""
+    from . import (
+        cli,
+        ero,
+        hwo,
+        lsr,
+        mcd,
+        nhc,
+        saw,
+        sel,
+        spcpts,
+        sps,
+        taf,
+        wwp,
+    )
+
+    return {
+        "CLI": cli.parser,
+        "FFG": mcd.parser,
+        "HWO": hwo.parser,
+        "LSR": lsr.parser,
+        "NHC": nhc.parser,
+        "PFW": spcpts.parser,
+        "PTS": spcpts.parser,
+        "RBG": ero.parser,
+        "SAW": saw.parser,
+        "SEL": sel.parser,
+        "SPS": sps.parser,
+        "SWO": mcd.parser,
+        "TAF": taf.parser,
+        "TCP": nhc.parser,
+        "WWP": wwp.parser,
+    }
 
 
 def parser(
@@ -28,7 +70,9 @@ def parser(
         enough information to assign a current valid timestamp to it.  So we
         need to know the current timestamp to do the relative computation.
       ugc_provider (UGCProvider, optional): Provides UGC information for
-        product parsing.
+        product parsing.  When reprocessing archived products, provide a
+        ``UGCProvider(all_versions=True)`` to resolve UGCs valid at the
+        time of each product.
       nwsli_provider (dict, optional): Provides NWS Location Identifiers to
         allow lookup of geographic information for station identifiers.
 
@@ -41,44 +85,109 @@ def parser(
         TextProductException,
     )
 
-    from . import (
-        cli,
-        ero,
-        hwo,
-        lsr,
-        mcd,
-        nhc,
-        saw,
-        sel,
-        spacewx,
-        spcpts,
-        sps,
-        taf,
-        wwp,
-    )
+    # Only the header is needed to figure out who gets this product
+    source, afos = parse_header(text)
+    if source == "KWNP":
+        from . import spacewx
 
-    XREF = {
-        "CLI": cli.parser,
-        "FFG": mcd.parser,
-        "HWO": hwo.parser,
-        "LSR": lsr.parser,
-        "NHC": nhc.parser,
-        "PFW": spcpts.parser,
-        "PTS": spcpts.parser,
-        "RBG": ero.parser,
-        "SAW": saw.parser,
-        "SEL": sel.parser,
-        "SPS": sps.parser,
-        "SWO": mcd.parser,
-        "TAF": taf.parser,
-        "TCP": nhc.parser,
-        "WWP": wwp.parser,
-    }
-    # Kind of wasteful, but alas
-    wmo = WMOProduct(text, utcnow)
-    if wmo.source == "KWNP":
         return spacewx.parser(text, utcnow, ugc_provider, nwsli_provider)
-    if wmo.afos is None:
+    if afos is None:
         raise TextProductException("Could not locate AFOS Identifier")
-    func = XREF.get(wmo.afos[:3], TextProduct)
+    func = _get_xref().get(afos[:3], TextProduct)
     return func(text, utcnow, ugc_provider, nwsli_provider)
+
+
+def _init_worker(utcnow, ugc_provider, nwsli_provider):
+    """Stash the shared, read-only state within this worker process."""
+    _WORKER_STATE["args"] = (utcnow, ugc_provider, nwsli_provider)
+
+
+def _parse_in_worker(text):
+    """Parse a product within a worker, returning the exception on error."""
+    _utcnow, ugc_provider, nwsli_provider = _WORKER_STATE["args"]
+    try:
+        prod = parser(text, *_WORKER_STATE["args"])
+    except Exception as exp:
+        return exp
+    # The parent process has its own copy of the providers it passed and can
+    # load the database singleton, so avoid shipping them back with every
+    # product
+    singleton = UGCProvider._instance
+    if ugc_provider is not None or (
+        singleton is not None and prod.ugc_provider is singleton
+    ):
+        prod.ugc_provider = None
+    if nwsli_provider is not None:
+        prod.nwsli_provider = None
+    return prod
+
+
+def parse_many(
+    texts: Iterable[str],
+    workers: int = 1,
+    utcnow=None,
+    ugc_provider: Optional[Union[UGCProvider, dict]] = None,
+    nwsli_provider=None,
+    max_pending: Optional[int] = None,
+) -> Iterator:
+    """Parse many products, optionally with a pool of worker processes.
+
+    The result for each text is yielded in the order provided.  A text that
+    fails to parse yields the raised exception instead of a product, so
+    that one bad product does not stop a reprocessing job.  The texts
+    iterable is consumed lazily, so that only ``max_pending`` products are
+    in flight at once.
+
+    Args:
+      texts (iterable of str): The product texts to parse.
+      workers (int): Number of worker processes, ``1`` parses within this
+        process.
+      utcnow (datetime, optional): see `parser`.
+      ugc_provider (UGCProvider or dict, optional): see `parser`.  When
+        provided, this is built once and shared read-only by the workers.
+        Otherwise, each parser uses its own default.
+      nwsli_provider (dict, optional): see `parser`, shared like above.
+      max_pending (int, optional): Maximum number of texts submitted to the
+        pool and not yet yielded, defaults to ``4 * workers``.
+
+    Yields:
+      TextProduct or Exception
+    """
+    # Build once here, instead of within each parser call / worker
+    if isinstance(ugc_provider, dict):
+        ugc_provider = UGCProvider(legacy_dict=ugc_provider)
+    args = (utcnow, ugc_provider, nwsli_provider)
+    if workers <= 1:
+        for text in texts:
+            try:
+                yield parser(text, *args)
+            except Exception as exp:
+                yield exp
+        return
+    for future in pool_imap(
+        _parse_in_worker,
+        texts,
+        workers,
+        max_pending=max_pending,
+        initializer=_init_worker,
+        initargs=args,
+    ):
+        yield _finish(future, *args[1:])
+
+
+def _finish(future, ugc_provider, nwsli_provider):
+    """Reattach our providers to a product returned by a worker."""
+    try:
+        res = future.result()
+    except Exception as exp:
+        # Something failed to make the round trip to the worker
+        return exp
+    if not isinstance(res, Exception):
+        if res.ugc_provider is None:
+            # Either ours or the database singleton
+            res.ugc_provider = (
+                UGCProvider() if ugc_provider is None else ugc_provider
+            )
+        if nwsli_provider is not None:
+            res.nwsli_provider = nwsli_provider
+    return res
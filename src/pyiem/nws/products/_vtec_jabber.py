@@ -33,7 +33,7 @@ def build_channels(prod: "VTECProduct", segment, vtec: VTEC) -> list:
     # Tsunami Warning, Watch is a special case
     if vtec.phenomena == "TS":
         for ugc in segment.ugcs:
-            for wfo in prod.ugc_provider[ugc].wfos:
+            for wfo in prod.ugc_provider.get(ugc, valid=prod.valid).wfos:
                 if wfo not in channels:
                     channels.append(wfo)
     for ugc in segment.ugcs:
@@ -2,11 +2,13 @@
 
 # pylint: disable=too-many-arguments
 import itertools
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 
 import pandas as pd
 from psycopg.sql import SQL
 
+from pyiem.database import executemany_rowcounts
 from pyiem.nws.product import TextProduct, TextProductSegment
 from pyiem.nws.ugc import UGC
 from pyiem.nws.vtec import VTEC
@@ -33,10 +35,116 @@ def _check_vtec_polygon(prod):
             )
 
 
-def which_year(txn, prod, segment, vtec) -> int:
-    """Figure out which table we should work against"""
+class VTECYearCache:
+    """Bounded cache of the year a VTEC event is stored within.
+
+    A follow-up statement (CON, EXT, CAN, etc) for an event needs to know
+    which ``vtec_year`` the event was stored with, which `which_year` would
+    otherwise figure out with up to three database queries.  A long running
+    ingest process can hand one instance of this cache to each
+    `VTECProduct.sql` call.
+
+    Entries are keyed by (office, phenomena, significance, etn) and expire
+    once the product stream time moves ``ttl`` away from when the entry was
+    last used.  Least recently used entries are dropped beyond ``maxsize``.
+    When a NEW event reuses a key that still maps to a different year, the
+    key is marked ambiguous and the database is consulted until it expires.
+
+    Args:
+      maxsize (int): maximum number of events to hold.
+      ttl (timedelta): product time an entry lives without being used.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl=timedelta(days=31)):
+        """Constructor."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (year or None when ambiguous, last used product valid)
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Number of cached events."""
+        return len(self._data)
+
+    @staticmethod
+    def _key(vtec: VTEC) -> tuple:
+        """Our cache key."""
+        return (vtec.office, vtec.phenomena, vtec.significance, vtec.etn)
+
+    def _entry(self, vtec: VTEC, valid: datetime):
+        """Return the unexpired entry for this event, if any."""
+        key = self._key(vtec)
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if abs(valid - entry[1]) > self.ttl:
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, vtec: VTEC, valid: datetime) -> int | None:
+        """Return the cached year for this event or None if unknown.
+
+        Args:
+          vtec (VTEC): the VTEC instance to lookup.
+          valid (datetime): the product time.
+        """
+        entry = self._entry(vtec, valid)
+        if entry is None or entry[0] is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        key = self._key(vtec)
+        self._data[key] = (entry[0], max(entry[1], valid))
+        self._data.move_to_end(key)
+        return entry[0]
+
+    def seen_since(self, vtec: VTEC, year: int, since: datetime) -> bool:
+        """Was this event last used with this year at or after ``since``."""
+        entry = self._data.get(self._key(vtec))
+        return entry is not None and entry[0] == year and entry[1] >= since
+
+    def put(self, vtec: VTEC, year: int, valid: datetime):
+        """Record the year this event is stored within.
+
+        Args:
+          vtec (VTEC): the VTEC instance.
+          year (int): the ``vtec_year`` used for the event.
+          valid (datetime): the product time.
+        """
+        key = self._key(vtec)
+        entry = self._entry(vtec, valid)
+        if entry is not None and entry[0] is None:
+            # Stays ambiguous until it expires
+            return
+        if vtec.action == "NEW" and entry is not None and entry[0] != year:
+            # Two events share this key, let the database sort it out
+            year = None
+        self._data[key] = (year, valid)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+def which_year(txn, prod, segment, vtec, year_cache=None) -> int:
+    """Figure out which table we should work against
+
+    Args:
+      txn (psycopg.cursor): database cursor.
+      prod (VTECProduct): the product.
+      segment (TextProductSegment): the segment of the VTEC.
+      vtec (VTEC): the VTEC to find a year for.
+      year_cache (VTECYearCache, optional): cache to consult and update.
+    """
     # The case of a NEW event always goes into the current UTC year of prod
     if vtec.action in ["NEW"]:
+        # A recently used event can not trip the duplicated ETN check below
+        if year_cache is not None and year_cache.seen_since(
+            vtec, prod.valid.year, prod.valid - timedelta(days=21)
+        ):
+            return prod.valid.year
         # Lets piggyback a check to see if this ETN has been reused?
         # Can this realiably be done?
         txn.execute(
@@ -56,6 +164,10 @@ def which_year(txn, prod, segment, vtec) -> int:
                     f"product_id: {prod.get_product_id()}"
                 )
         return prod.valid.year
+    if year_cache is not None:
+        year = year_cache.get(vtec, prod.valid)
+        if year is not None:
+            return year
     # Lets query the database to look for any matching entries within
     # the past 3, 10, 31 days, to find with the product_issue was,
     # which guides the table that the data is stored within
@@ -110,6 +222,8 @@ def which_year(txn, prod, segment, vtec) -> int:
 
         row = rows[0]
         if row["min"] is not None:
+            if year_cache is not None and len(rows) == 1:
+                year_cache.put(vtec, row["vtec_year"], prod.valid)
             year = row["min"].year
             if row["max"].year != year:
                 LOG.warning(
@@ -199,13 +313,13 @@ def _check_unique_ugc(prod) -> bool:
     return True
 
 
-def _associate_vtec_year(prod, txn):
+def _associate_vtec_year(prod, txn, year_cache=None):
     """Figure out to which year each VTEC in the product belongs.
 
     Modifies the prod.segment.vtec objects."""
     for seg, _ugcs, vtec in prod.suv_iter():
         if vtec.year is None:
-            vtec.year = which_year(txn, prod, seg, vtec)
+            vtec.year = which_year(txn, prod, seg, vtec, year_cache)
 
 
 def _load_database_status(txn, prod):
@@ -248,6 +362,77 @@ def _load_database_status(txn, prod):
     return pd.DataFrame(rows)
 
 
+def _coverage_keys(segment: TextProductSegment, vtec: VTEC) -> list[tuple]:
+    """Return the database status keys this segment's VTEC covers."""
+    return [
+        (str(ugc), vtec.phenomena, vtec.significance, vtec.etn, vtec.year)
+        for ugc in segment.ugcs
+    ]
+
+
+def _find_missed_ugcs(dbdf: pd.DataFrame, covered: set) -> pd.DataFrame:
+    """Return the database status rows not covered by the product.
+
+    Args:
+      dbdf: dataframe from `_load_database_status`, a ``missed`` column is
+        added to it.
+      covered: set of ``(ugc, phenomena, significance, etn, year)`` keys
+        that the product touched.
+
+    Returns:
+      pd.DataFrame of the rows that were missed.
+    """
+    dbdf["missed"] = [
+        key not in covered
+        for key in zip(
+            dbdf["ugc"],
+            dbdf["phenomena"],
+            dbdf["significance"],
+            dbdf["etn"],
+            dbdf["year"],
+            strict=True,
+        )
+    ]
+    return dbdf[dbdf["missed"]]
+
+
+def _sbw_status(txn, vtec: VTEC) -> tuple:
+    """Lookup the SBW issuance and current polygon in one query.
+
+    Returns:
+      (count of NEW rows, giswkt of a NEW row, current polygon row or None)
+    """
+    txn.execute(
+        "SELECT n.count, n.giswkt, c.issue, c.polygon_begin, c.polygon_end "
+        "from (SELECT count(*), "
+        "(array_agg(st_astext(geom)))[1] as giswkt from sbw "
+        "WHERE vtec_year = %s and status = 'NEW' and eventid = %s and "
+        "wfo = %s and phenomena = %s and significance = %s) n "
+        "LEFT JOIN LATERAL (SELECT issue, polygon_begin, polygon_end "
+        "from sbw WHERE vtec_year = %s and eventid = %s and wfo = %s and "
+        "phenomena = %s and significance = %s and "
+        "polygon_begin != polygon_end ORDER by updated DESC LIMIT 1) c "
+        "ON true",
+        (
+            vtec.year,
+            vtec.etn,
+            vtec.office,
+            vtec.phenomena,
+            vtec.significance,
+        )
+        * 2,
+    )
+    row = txn.fetchone()
+    current = None
+    if row["polygon_begin"] is not None:
+        current = {
+            "issue": row["issue"],
+            "polygon_begin": row["polygon_begin"],
+            "polygon_end": row["polygon_end"],
+        }
+    return row["count"], row["giswkt"], current
+
+
 def _check_dup_ps(prod: TextProduct) -> bool:
     """Evaluate product for duplicated VTEC.
 
@@ -426,6 +611,62 @@ def _cross_check_watch_pds(prod, txn, segment: TextProductSegment, vtec):
     segment.is_pds = txn.fetchone()["is_pds"]
 
 
+WARNING_INSERT_SQL = (
+    "INSERT into warnings (vtec_year, issue, expire, updated, "
+    "wfo, eventid, status, fcster, ugc, phenomena, "
+    "significance, gid, init_expire, product_issue, "
+    "hvtec_nwsli, hvtec_severity, hvtec_cause, hvtec_record, "
+    "is_emergency, is_pds, purge_time, product_ids) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, "
+    "%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
+    "RETURNING gid"
+)
+
+
+def _warning_record_args(
+    prod: TextProduct,
+    segment: TextProductSegment,
+    vtec: VTEC,
+    ugc_code: str,
+    gid: int,
+    bts: datetime,
+    ets: datetime,
+) -> tuple:
+    """Build the arguments for WARNING_INSERT_SQL."""
+    return (
+        vtec.year,
+        bts,
+        ets,
+        prod.valid,
+        vtec.office,
+        vtec.etn,
+        vtec.action,
+        prod.get_signature(),
+        ugc_code,
+        vtec.phenomena,
+        vtec.significance,
+        gid,
+        ets,
+        prod.valid,
+        segment.get_hvtec_nwsli(),
+        segment.get_hvtec_severity(),
+        segment.get_hvtec_cause(),
+        segment.get_hvtec_record(),
+        segment.is_emergency,
+        segment.is_pds,
+        segment.ugcexpire,
+        [prod.get_product_id()],
+    )
+
+
+def _null_gid_warning(prod, vtec: VTEC, ugc_code: str) -> str:
+    """The warning message for a get_gid failure."""
+    return (
+        f"get_gid({ugc_code}, {prod.valid}, {vtec.phenomena == 'FW'}) "
+        "was null, cannot create warning record"
+    )
+
+
 def create_warning_record(
     txn,
     prod: TextProduct,
@@ -444,48 +685,123 @@ def create_warning_record(
     )
     gid = txn.fetchone()["gid"]
     if gid is None:
-        prod.warnings.append(
-            f"get_gid({str(ugc)}, {prod.valid}, {vtec.phenomena == 'FW'}) "
-            "was null, cannot create warning record"
-        )
+        prod.warnings.append(_null_gid_warning(prod, vtec, str(ugc)))
         return
     txn.execute(
-        "INSERT into warnings (vtec_year, issue, expire, updated, "
-        "wfo, eventid, status, fcster, ugc, phenomena, "
-        "significance, gid, init_expire, product_issue, "
-        "hvtec_nwsli, hvtec_severity, hvtec_cause, hvtec_record, "
-        "is_emergency, is_pds, purge_time, product_ids) "
-        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, "
-        "%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
-        "RETURNING gid",
+        WARNING_INSERT_SQL,
+        _warning_record_args(prod, segment, vtec, str(ugc), gid, bts, ets),
+    )
+
+
+def _get_gids(txn, prod: TextProduct, vtec: VTEC, codes: list) -> list:
+    """Run get_gid for many UGC codes in one query."""
+    txn.execute(
+        "select get_gid(u.ugc, %s, %s) as gid "
+        "from unnest(%s::text[]) with ordinality as u(ugc, i) ORDER by u.i",
+        (prod.valid, vtec.phenomena == "FW", codes),
+    )
+    return [row["gid"] for row in txn.fetchall()]
+
+
+def create_warning_records(
+    txn,
+    prod: TextProduct,
+    segment: TextProductSegment,
+    vtec: VTEC,
+    ugcs: list,
+    bts: datetime,
+    ets: datetime,
+) -> None:
+    """Create many warning records with one get_gid query and executemany.
+
+    The result is the same as calling `create_warning_record` for each UGC.
+    """
+    if not ugcs:
+        return
+    codes = [str(ugc) for ugc in ugcs]
+    args = []
+    for code, gid in zip(
+        codes, _get_gids(txn, prod, vtec, codes), strict=True
+    ):
+        if gid is None:
+            prod.warnings.append(_null_gid_warning(prod, vtec, code))
+            continue
+        args.append(
+            _warning_record_args(prod, segment, vtec, code, gid, bts, ets)
+        )
+    if args:
+        txn.executemany(WARNING_INSERT_SQL, args)
+
+
+def _do_sql_vtec_new_batch(prod, txn, segment, vtec: VTEC, bts, ets):
+    """Batched version of the per UGC work within `_do_sql_vtec_new`."""
+    codes = [str(ugc) for ugc in segment.ugcs]
+    txn.execute(
+        "SELECT ugc, count(*) from warnings "
+        "WHERE vtec_year = %s and ugc = ANY(%s) and eventid = %s and "
+        "significance = %s and wfo = %s and phenomena = %s and "
+        "status not in ('CAN', 'UPG') and expire > %s GROUP by ugc",
         (
             vtec.year,
-            bts,
-            ets,
-            prod.valid,
-            vtec.office,
+            codes,
             vtec.etn,
-            vtec.action,
-            prod.get_signature(),
-            str(ugc),
-            vtec.phenomena,
             vtec.significance,
-            gid,
-            ets,
+            vtec.office,
+            vtec.phenomena,
             prod.valid,
-            segment.get_hvtec_nwsli(),
-            segment.get_hvtec_severity(),
-            segment.get_hvtec_cause(),
-            segment.get_hvtec_record(),
-            segment.is_emergency,
-            segment.is_pds,
-            segment.ugcexpire,
-            [prod.get_product_id()],
         ),
     )
+    existing = {row["ugc"]: row["count"] for row in txn.fetchall()}
+    deleted = {}
+    if existing and prod.is_correction():
+        # We'll delete old entries, gulp
+        todelete = [code for code in codes if code in existing]
+        res = executemany_rowcounts(
+            txn,
+            "DELETE from warnings WHERE vtec_year = %s and ugc = %s "
+            "and eventid = %s and significance = %s and "
+            "wfo = %s and phenomena = %s and "
+            "status in ('NEW', 'EXB', 'EXA') ",
+            [
+                (
+                    vtec.year,
+                    code,
+                    vtec.etn,
+                    vtec.significance,
+                    vtec.office,
+                    vtec.phenomena,
+                )
+                for code in todelete
+            ],
+        )
+        deleted = dict(zip(todelete, res, strict=True))
+    args = []
+    for code, gid in zip(
+        codes, _get_gids(txn, prod, vtec, codes), strict=True
+    ):
+        if code in deleted:
+            if deleted[code] != 1:
+                prod.warnings.append(
+                    f"{vtec.s3()} {code} duplicated via "
+                    f"product correction, deleted {deleted[code]} "
+                    "old rows instead of 1"
+                )
+        elif code in existing:
+            prod.warnings.append(
+                "Duplicate(s) WWA found, "
+                f"rowcount: {existing[code]} for UGC: {code}"
+            )
+        if gid is None:
+            prod.warnings.append(_null_gid_warning(prod, vtec, code))
+            continue
+        args.append(
+            _warning_record_args(prod, segment, vtec, code, gid, bts, ets)
+        )
+    if args:
+        txn.executemany(WARNING_INSERT_SQL, args)
 
 
-def _do_sql_vtec_new(prod, txn, segment, vtec: VTEC):
+def _do_sql_vtec_new(prod, txn, segment, vtec: VTEC, batch=False):
     """Do the NEW style actions."""
     bts = prod.valid if vtec.begints is None else vtec.begints
     # If this product has no expiration time, but db needs a value
@@ -501,6 +817,12 @@ def _do_sql_vtec_new(prod, txn, segment, vtec: VTEC):
     ):
         _cross_check_watch_pds(prod, txn, segment, vtec)
 
+    # Duplicated UGCs within the segment see each other's inserts, so they
+    # need the one at a time approach
+    codes = segment.get_ugcs_list()
+    if batch and len(set(codes)) == len(codes):
+        _do_sql_vtec_new_batch(prod, txn, segment, vtec, bts, ets)
+        return
     # For each UGC code in this segment, we create a database entry
     for ugc in segment.ugcs:
         # Check to see if we have entries already for this UGC
@@ -640,7 +962,7 @@ def _do_sql_vtec_can(prod, txn, segment, vtec):
             prod.warnings.append(_debug_warning(prod, txn, vtec, segment, ets))
 
 
-def _do_sql_vtec_con(prod, txn, segment, vtec):
+def _do_sql_vtec_con(prod, txn, segment, vtec, batch=False):
     """Continue."""
     # These are no-ops, just updates
     ets = vtec.endts
@@ -681,20 +1003,13 @@ def _do_sql_vtec_con(prod, txn, segment, vtec):
         prod.warnings.append(_debug_warning(prod, txn, vtec, segment, ets))
         # Here lies CON creates logic.  Better to have a database entry than
         # not
-        added = []
-        for ugc in ugcs_in:
-            if ugc in ugcs_out:
-                continue
-            added.append(ugc)
-            create_warning_record(
-                txn,
-                prod,
-                segment,
-                vtec,
-                ugc,
-                prod.valid if vtec.begints is None else vtec.begints,
-                ets,
-            )
+        added = [ugc for ugc in ugcs_in if ugc not in ugcs_out]
+        bts = prod.valid if vtec.begints is None else vtec.begints
+        if batch:
+            create_warning_records(txn, prod, segment, vtec, added, bts, ets)
+        else:
+            for ugc in added:
+                create_warning_record(txn, prod, segment, vtec, ugc, bts, ets)
         prod.warnings.append(
             f"CON create for {vtec.s3()} added {len(added)} new rows for "
             f"UGCs: {','.join(added)}"
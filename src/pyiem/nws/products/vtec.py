@@ -1,5 +1,6 @@
 """A NWS TextProduct that contains VTEC information."""
 
+from pyiem.database import execute_pipelined
 from pyiem.nws.product import (
     TextProduct,
     TextProductException,
@@ -8,17 +9,21 @@ from pyiem.nws.product import (
 from pyiem.nws.products._vtec_jabber import _get_jabbers
 from pyiem.nws.products._vtec_util import (
     DEFAULT_EXPIRE_DELTA,
+    VTECYearCache,
     _associate_vtec_year,
     _check_dueling_tropics,
     _check_dup_ps,
     _check_unique_ugc,
     _check_vtec_polygon,
+    _coverage_keys,
     _do_sql_vtec_can,
     _do_sql_vtec_con,
     _do_sql_vtec_cor,
     _do_sql_vtec_new,
+    _find_missed_ugcs,
     _load_database_status,
     _resent_match,
+    _sbw_status,
     do_sql_hvtec,
 )
 
@@ -60,20 +65,28 @@ class VTECProduct(TextProduct):
         _check_dueling_tropics(self)
         _check_dup_ps(self)
 
-    def sql(self, txn):
+    def sql(self, txn, year_cache: VTECYearCache | None = None, batch=False):
         """Persist to the database
 
         Args:
           txn (psycopg.transaction): A database transaction object that we can
             exec() database calls against.
+          year_cache (VTECYearCache, optional): A cache of event years that
+            is consulted before querying the database and updated as events
+            are written.  Reuse it over a stream of products.
+          batch (bool): Persist with set based queries, ``executemany`` and
+            psycopg pipelines, so that the number of database round trips
+            does not scale with the number of UGCs.  The database result and
+            the warnings generated are the same.
 
         """
         # Associate a year to each VTEC found in the product, this informs
         # which database table to use
-        _associate_vtec_year(self, txn)
+        _associate_vtec_year(self, txn, year_cache)
         # Build a pandas dataframe to track what we are doing here.
         dbdf = _load_database_status(txn, self)
-        dbdf["missed"] = True
+        # (ugc, phenomena, significance, etn, year) keys this product touched
+        covered = set()
 
         for segment in self.segments:
             if segment.giswkt and not segment.vtec:
@@ -96,26 +109,22 @@ class VTECProduct(TextProduct):
                     continue
                 # Send all products to the SBW method in case this segment
                 # should of had a polygon and did not.
-                self.do_sbw_geometry(txn, segment, vtec)
+                self.do_sbw_geometry(txn, segment, vtec, batch=batch)
                 # Check for Hydro-VTEC stuff
                 if segment.hvtec and segment.hvtec[0].nwsli != "00000":
                     do_sql_hvtec(txn, segment)
 
-                self.do_sql_vtec(txn, segment, vtec)
-                if dbdf.empty:
-                    continue
-                for ugc in segment.ugcs:
-                    dbdf.loc[
-                        (dbdf["ugc"] == str(ugc))
-                        & (dbdf["phenomena"] == vtec.phenomena)
-                        & (dbdf["significance"] == vtec.significance)
-                        & (dbdf["etn"] == vtec.etn)
-                        & (dbdf["year"] == vtec.year),
-                        "missed",
-                    ] = False
+                self.do_sql_vtec(txn, segment, vtec, batch=batch)
+                if year_cache is not None and vtec.action in [
+                    "NEW",
+                    "EXB",
+                    "EXA",
+                ]:
+                    year_cache.put(vtec, vtec.year, self.valid)
+                covered.update(_coverage_keys(segment, vtec))
         if dbdf.empty:
             return
-        df = dbdf[dbdf["missed"]]
+        df = _find_missed_ugcs(dbdf, covered)
         # Tropical and Earthquake products with ETNs over 1000 are too complex
         # to check in this manner, I suppose an office could issue 1000 SVRs,
         # but alas.  See akrherz/pyIEM#316
@@ -123,13 +132,14 @@ class VTECProduct(TextProduct):
             return
         self.warnings.append(f"Product failed to cover all UGC\n{df}")
 
-    def do_sql_vtec(self, txn, segment, vtec):
+    def do_sql_vtec(self, txn, segment, vtec, batch=False):
         """Persist the non-SBW stuff to the database
 
         Arguments:
         txn -- A psycopg transaction
         segment -- A TextProductSegment instance
         vtec -- A vtec instance
+        batch -- Use batched database statements
         """
         # If this product is ...RESENT, lets check to make sure we did not
         # already get it
@@ -137,7 +147,7 @@ class VTECProduct(TextProduct):
             return
 
         if vtec.action in ["NEW", "EXB", "EXA"]:
-            _do_sql_vtec_new(self, txn, segment, vtec)
+            _do_sql_vtec_new(self, txn, segment, vtec, batch)
 
         elif vtec.action in ["COR"]:
             _do_sql_vtec_cor(self, txn, segment, vtec)
@@ -146,14 +156,16 @@ class VTECProduct(TextProduct):
             _do_sql_vtec_can(self, txn, segment, vtec)
 
         elif vtec.action in ["CON", "EXP", "ROU"]:
-            _do_sql_vtec_con(self, txn, segment, vtec)
+            _do_sql_vtec_con(self, txn, segment, vtec, batch)
 
         else:
             self.warnings.append(
                 f"do_sql_vtec() encountered {vtec.action} VTEC status"
             )
 
-    def do_sbw_geometry(self, txn, segment: TextProductSegment, vtec):
+    def do_sbw_geometry(
+        self, txn, segment: TextProductSegment, vtec, batch=False
+    ):
         """Storage of Storm Based Warning geometry
 
         The IEM uses a seperate table for the Storm Based Warning geometries.
@@ -162,6 +174,8 @@ class VTECProduct(TextProduct):
           txn (psycopg): Database transaction/cursor
           segment (TextProduct.TextProductSegment): Segment
           vtec (pyiem.vtec.VTEC): VTEC instance
+          batch (bool): Combine the lookups into one query and pipeline the
+            writes.
         """
         # The following time columns are set in the database
         # issue         - VTEC encoded issuance time, can be null
@@ -213,21 +227,27 @@ class VTECProduct(TextProduct):
                     f"removed {txn.rowcount} rows instead of 1"
                 )
 
-        # Lets go find the initial warning (status == NEW)
-        txn.execute(
-            "SELECT issue, expire, st_astext(geom) as giswkt "
-            "from sbw WHERE vtec_year = %s and status = 'NEW' and "
-            "eventid = %s and wfo = %s and phenomena = %s "
-            "and significance = %s",
-            (
-                vtec.year,
-                vtec.etn,
-                vtec.office,
-                vtec.phenomena,
-                vtec.significance,
-            ),
-        )
-        if txn.rowcount > 0:
+        current = None
+        if batch:
+            new_count, new_giswkt, current = _sbw_status(txn, vtec)
+        else:
+            # Lets go find the initial warning (status == NEW)
+            txn.execute(
+                "SELECT issue, expire, st_astext(geom) as giswkt "
+                "from sbw WHERE vtec_year = %s and status = 'NEW' and "
+                "eventid = %s and wfo = %s and phenomena = %s "
+                "and significance = %s",
+                (
+                    vtec.year,
+                    vtec.etn,
+                    vtec.office,
+                    vtec.phenomena,
+                    vtec.significance,
+                ),
+            )
+            new_count = txn.rowcount
+            new_giswkt = txn.fetchone()["giswkt"] if new_count > 0 else None
+        if new_count > 0:
             if not segment.sbw:
                 self.warnings.append(
                     f"{vtec.s3()} should have contained a polygon and did not."
@@ -240,10 +260,10 @@ class VTECProduct(TextProduct):
                     self.warnings.append(
                         f"{vtec.s3()} adding polygon from issuance to product"
                     )
-                    segment.giswkt = f"SRID=4326;{txn.fetchone()['giswkt']}"
+                    segment.giswkt = f"SRID=4326;{new_giswkt}"
             if vtec.action == "NEW":  # Uh-oh, we have a duplicate
                 self.warnings.append(
-                    f"{vtec.s3()} is a SBW duplicate! {txn.rowcount} "
+                    f"{vtec.s3()} is a SBW duplicate! {new_count} "
                     "other row(s) found."
                 )
         # We are done with our piggybacked checks :(  akrherz/pyIEM#203
@@ -251,35 +271,36 @@ class VTECProduct(TextProduct):
             return
 
         # Lets go find our current active polygon
-        txn.execute(
-            "SELECT issue, polygon_begin, polygon_end from sbw WHERE "
-            "vtec_year = %s and eventid = %s and wfo = %s and phenomena = %s "
-            "and significance = %s and polygon_begin != polygon_end "
-            "ORDER by updated DESC LIMIT 1",
-            (
-                vtec.year,
-                vtec.etn,
-                vtec.office,
-                vtec.phenomena,
-                vtec.significance,
-            ),
-        )
-        current = None
-        if txn.rowcount == 0 and vtec.action != "NEW":
+        if not batch:
+            txn.execute(
+                "SELECT issue, polygon_begin, polygon_end from sbw WHERE "
+                "vtec_year = %s and eventid = %s and wfo = %s and "
+                "phenomena = %s and significance = %s and "
+                "polygon_begin != polygon_end ORDER by updated DESC LIMIT 1",
+                (
+                    vtec.year,
+                    vtec.etn,
+                    vtec.office,
+                    vtec.phenomena,
+                    vtec.significance,
+                ),
+            )
+            if txn.rowcount > 0:
+                current = txn.fetchone()
+        if current is None and vtec.action != "NEW":
             self.warnings.append(
                 f"SBW {vtec.year} searched for {vtec.s3()} and no result found"
             )
-        if txn.rowcount > 0:
-            current = txn.fetchone()
 
         # If ncessary, lets find the current active polygon and truncate it
         # to when our new polygon starts
+        truncate = None
         if vtec.action != "NEW" and current is not None:
             # Long fuse polygon, we want to avoid having a polygon_begin
             # that is after the truncation time of this polygon.  So we cull
             # it back too
             old_polygon_begin = min(current["polygon_begin"], polygon_begin)
-            txn.execute(
+            truncate = (
                 (
                     "UPDATE sbw SET polygon_begin = %s, polygon_end = %s "
                     "WHERE vtec_year = %s and eventid = %s and wfo = %s and "
@@ -298,11 +319,6 @@ class VTECProduct(TextProduct):
                     current["polygon_end"],
                 ),
             )
-            if txn.rowcount != 1:
-                self.warnings.append(
-                    f"{vtec.s3()} SBW prev polygon update resulted in update "
-                    f"of {txn.rowcount} rows, should be 1"
-                )
 
         # Prepare the TIME...MOT...LOC information
         tml_valid = None
@@ -369,11 +385,11 @@ class VTECProduct(TextProduct):
             segment.squalltag,
             self.get_product_id(),
         )
-        txn.execute(sql, myargs)
 
         # If this is a CAN, UPG action and single purpose, update expiration
+        expire = None
         if vtec.action in ["CAN", "UPG"] and self.is_single_action():
-            txn.execute(
+            expire = (
                 (
                     "UPDATE sbw SET expire = %s WHERE vtec_year = %s and "
                     "wfo = %s and "
@@ -390,11 +406,26 @@ class VTECProduct(TextProduct):
                     self.valid,
                 ),
             )
-            if txn.rowcount == 0:
-                self.warnings.append(
-                    f"{vtec.s3()} sbw CAN,UPG update "
-                    f"resulted in 0 rows updated, valid: {self.valid}"
-                )
+        statements = [
+            x for x in [truncate, (sql, myargs), expire] if x is not None
+        ]
+        if batch:
+            counts = execute_pipelined(txn, statements)
+        else:
+            counts = []
+            for stmt in statements:
+                txn.execute(*stmt)
+                counts.append(txn.rowcount)
+        if truncate is not None and counts[0] != 1:
+            self.warnings.append(
+                f"{vtec.s3()} SBW prev polygon update resulted in update "
+                f"of {counts[0]} rows, should be 1"
+            )
+        if expire is not None and counts[-1] == 0:
+            self.warnings.append(
+                f"{vtec.s3()} sbw CAN,UPG update "
+                f"resulted in 0 rows updated, valid: {self.valid}"
+            )
 
     def is_single_action(self):
         """Is this product just 1 VTEC action?"""
@@ -4,9 +4,10 @@ Something to store UGC information!
 
 # stdlib
 import re
+from bisect import bisect_right
 from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Iterable, Optional, Union
 
 # third party
 import pandas as pd
@@ -38,16 +39,18 @@ def str2time(text, valid):
     return valid.replace(day=day, hour=hour, minute=minute)
 
 
-def _load_from_database(pgconn=None, valid=None):
+def _load_from_database(pgconn=None, valid=None, all_versions=False):
     """Build dataframe from a IEM Schema database.
 
     Args:
         pgconn (database engine): something pandas can query
         valid (timestamp, optional): timestamp version of database to use.
+        all_versions (bool): load the full ``begin_ts`` / ``end_ts`` history
+          of the table, ``valid`` is then ignored.
     """
     # This is sometimes autoloaded and we should alert folks when it is
     # happening
-    LOG.warning("UGC load with valid: %s", valid)
+    LOG.warning("UGC load with valid: %s all: %s", valid, all_versions)
     pgconn = (
         pgconn
         if pgconn is not None
@@ -55,6 +58,14 @@ def _load_from_database(pgconn=None, valid=None):
             "postgresql", "postgresql+psycopg"
         )
     )
+    if all_versions:
+        return pd.read_sql(
+            sql_helper("""
+    SELECT ugc, replace(name, '...', ' ') as name, wfo, source,
+    begin_ts, end_ts from ugcs ORDER by area2163 desc"""),
+            pgconn,
+            index_col=None,
+        )
     valid = valid if valid is not None else utc()
     # UGC is **not** unique here, so we sort by area attempting to at least
     # default to the most 'important' UGC  see fun in akrherz/pyIEM#997
@@ -69,6 +80,100 @@ def _load_from_database(pgconn=None, valid=None):
     )
 
 
+def _resolve(entries: list) -> tuple:
+    """Pick the non-firewx and firewx entries from an ordered list.
+
+    Args:
+        entries (list): list of ((name, wfos), is_firewx_source) tuples.
+
+    Returns:
+        tuple of (non-firewx, firewx) entries, None when ambiguous.
+    """
+    if len(entries) == 1:
+        return entries[0][0], entries[0][0]
+    nonfz = next((e for e, isfz in entries if not isfz), None)
+    fz = next((e for e, isfz in entries if isfz), None)
+    return nonfz, fz
+
+
+def _make_entry(name, wfo) -> tuple:
+    """Convert database columns to an index entry."""
+    return name, tuple(re.findall(r"([A-Z][A-Z][A-Z])", wfo or ""))
+
+
+def _build_index(df: pd.DataFrame) -> dict:
+    """Build a lookup of UGC code to its non-firewx and firewx metadata.
+
+    The dataframe ordering is significant, the first row found wins.  When
+    a UGC code is only listed once, that row is used for both variants.
+
+    Args:
+        df (pd.DataFrame): dataframe with ugc, name, wfo, and source columns.
+
+    Returns:
+        dict of ugc code to a tuple of (non-firewx, firewx) entries, each
+        entry being a (name, wfos) tuple or None when ambiguous.
+    """
+    rows: dict[str, list] = {}
+    for code, name, wfo, source in zip(
+        df["ugc"], df["name"], df["wfo"], df["source"], strict=True
+    ):
+        rows.setdefault(code, []).append(
+            (_make_entry(name, wfo), source == "fz")
+        )
+    return {code: _resolve(entries) for code, entries in rows.items()}
+
+
+def _build_history_index(df: pd.DataFrame) -> dict:
+    """Build an interval index of UGC code to its versioned metadata.
+
+    For each UGC code, the ``begin_ts`` and ``end_ts`` values are collapsed
+    into a sorted list of breakpoints.  Each breakpoint starts an interval
+    that is resolved once into the (non-firewx, firewx) tuple that
+    `_build_index` would have generated for a database loaded at that time.
+
+    Args:
+        df (pd.DataFrame): dataframe with ugc, name, wfo, source, begin_ts
+          and end_ts columns.
+
+    Returns:
+        dict of ugc code to a tuple of (breakpoints, resolved entries).
+    """
+    rows: dict[str, list] = {}
+    for code, name, wfo, source, begin_ts, end_ts in zip(
+        df["ugc"],
+        df["name"],
+        df["wfo"],
+        df["source"],
+        df["begin_ts"],
+        df["end_ts"],
+        strict=True,
+    ):
+        rows.setdefault(code, []).append(
+            (
+                _make_entry(name, wfo),
+                source == "fz",
+                begin_ts,
+                None if pd.isna(end_ts) else end_ts,
+            )
+        )
+    index = {}
+    for code, versions in rows.items():
+        breaks = sorted(
+            {v[2] for v in versions} | {v[3] for v in versions if v[3]}
+        )
+        resolved = []
+        for start in breaks:
+            active = [
+                (v[0], v[1])
+                for v in versions
+                if v[2] <= start and (v[3] is None or v[3] > start)
+            ]
+            resolved.append(_resolve(active) if active else None)
+        index[code] = (breaks, resolved)
+    return index
+
+
 class UGC:
     """Representation of a single UGC"""
 
@@ -105,6 +210,13 @@ class UGC:
     __hash__ = None  # unhashable
 
 
+def _unpickle(state: dict) -> "UGCProvider":
+    """Rebuild a pickled UGCProvider, which is not the process singleton."""
+    provider = object.__new__(UGCProvider)
+    provider.__dict__.update(state)
+    return provider
+
+
 class UGCProvider:
     """Wrapper around dataframe to provide UGC information."""
 
@@ -113,19 +225,24 @@ class UGCProvider:
 
     def __new__(cls, *args, **kwargs):
         """Singleton, if the price is right."""
-        if kwargs.get("legacy_dict") is not None:
+        if kwargs.get("legacy_dict") is not None or kwargs.get("all_versions"):
             return super(UGCProvider, cls).__new__(cls)
         if not cls._instance:
             cls._instance = super(UGCProvider, cls).__new__(cls)
         return cls._instance
 
-    def __init__(self, legacy_dict=None, pgconn=None, valid=None):
+    def __init__(
+        self, legacy_dict=None, pgconn=None, valid=None, all_versions=False
+    ):
         """Constructor.
 
         Args:
           legacy_dict(dict, optional): Build based on legacy dictionary.
           pgconn (database engine): something to query to get ugc data.
           valid (timestamp): database version to use.
+          all_versions (bool): load the full UGC history from the database
+            and answer lookups for the ``valid`` provided to `get`.  This
+            instance is not the process singleton.
         """
         rows = []
         if legacy_dict is not None:
@@ -140,9 +257,40 @@ class UGCProvider:
                 )
             df = pd.DataFrame(rows, columns=["ugc", "name", "wfo", "source"])
         else:
-            df = _load_from_database(pgconn, valid)
+            df = _load_from_database(pgconn, valid, all_versions)
+        self._history = None
+        self._index = {}
+        if all_versions and legacy_dict is None:
+            self._history = {}
         self.df = df
 
+    def __reduce__(self):
+        """Unpickle without the singleton `__new__`, see `_unpickle`."""
+        return (_unpickle, (self.__dict__,))
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """The UGC metadata, assigning a new frame rebuilds the index.
+
+        Lookups are answered by an index built from this frame, so changes
+        made to the frame in place are not seen until `rebuild_index` is
+        called.
+        """
+        return self._df
+
+    @df.setter
+    def df(self, df: pd.DataFrame):
+        """Set the UGC metadata and rebuild the lookup index."""
+        self._df = df
+        self.rebuild_index()
+
+    def rebuild_index(self):
+        """Rebuild the lookup index after changing `df` in place."""
+        if self._history is not None:
+            self._history = _build_history_index(self._df)
+        else:
+            self._index = _build_index(self._df)
+
     def __contains__(self, key: Union[str, UGC]) -> bool:
         """Check if this provider knows about this UGC.
 
@@ -152,9 +300,27 @@ class UGCProvider:
         Returns:
             bool
         """
-        return not self.df[self.df["ugc"] == str(key)].empty
-
-    def get(self, key: Union[str, UGC], is_firewx=False) -> UGC:
+        if self._history is not None:
+            return str(key) in self._history
+        return str(key) in self._index
+
+    def _lookup(self, ugc_code: str, valid: Optional[datetime]):
+        """Find the index entries for this code."""
+        if self._history is None:
+            return self._index.get(ugc_code)
+        versions = self._history.get(ugc_code)
+        if versions is None:
+            return None
+        breaks, resolved = versions
+        pos = bisect_right(breaks, valid if valid is not None else utc())
+        return None if pos == 0 else resolved[pos - 1]
+
+    def get(
+        self,
+        key: Union[str, UGC],
+        is_firewx=False,
+        valid: Optional[datetime] = None,
+    ) -> UGC:
         """Return what this provider knows about a given UGC.
 
         The complication is that we always want something, either a newly
@@ -164,6 +330,8 @@ class UGCProvider:
         Args:
             key (str or UGC): the UGC to lookup
             is_firewx (bool): is this a fire weather product, so firewx zones
+            valid (datetime, optional): the time to lookup when this provider
+              was built with ``all_versions``, defaults to now.
 
         Returns:
             UGC instance
@@ -171,38 +339,50 @@ class UGCProvider:
         # Our internal storage is based on a string key
         ugc_code: str = key if isinstance(key, str) else str(key)
 
-        matchedrows = self.df[self.df["ugc"] == ugc_code]
+        entries = self._lookup(ugc_code, valid)
 
         # If the UGC is unknown
-        if matchedrows.empty:
+        if entries is None:
             # Return the original UGC if it is already an object
             if isinstance(key, UGC):
                 return key
             # Otherwise, we need to create a new UGC instance
             return UGC(key[:2], key[2], int(key[3:]))
 
-        def _gen(row: dict) -> "UGC":
-            """helper"""
-            return UGC(
-                ugc_code[:2],
-                ugc_code[2],
-                int(ugc_code[3:]),
-                name=row["name"],
-                wfos=re.findall(r"([A-Z][A-Z][A-Z])", row["wfo"]),
+        entry = entries[1] if is_firewx else entries[0]
+        if entry is None:
+            # This really should not happen
+            LOG.warning(
+                "Ambiguous UGC lookup for %s, please review.", ugc_code
             )
+            return UGC(ugc_code[:2], ugc_code[2], int(ugc_code[3:]))
+        return UGC(
+            ugc_code[:2],
+            ugc_code[2],
+            int(ugc_code[3:]),
+            name=entry[0],
+            wfos=list(entry[1]),
+        )
+
+    def get_many(
+        self,
+        keys: Iterable[Union[str, UGC]],
+        is_firewx=False,
+        valid: Optional[datetime] = None,
+    ) -> list[UGC]:
+        """Return UGC instances for many codes at once.
+
+        Args:
+            keys (iterable of str or UGC): the UGCs to lookup
+            is_firewx (bool): is this a fire weather product, so firewx zones
+            valid (datetime, optional): see `get`.
 
-        # If we have a single match, we can just return that
-        if len(matchedrows) == 1:
-            return _gen(matchedrows.iloc[0])
-        # Ambiguous
-        for _idx, row in matchedrows.iterrows():
-            if is_firewx and row["source"] == "fz":
-                return _gen(row)
-            if not is_firewx and row["source"] != "fz":
-                return _gen(row)
-        # This really should not happen
-        LOG.warning("Ambiguous UGC lookup for %s, please review.", ugc_code)
-        return UGC(ugc_code[:2], ugc_code[2], int(ugc_code[3:]))
+        Returns:
+            list of UGC instances in the same order as the provided keys
+        """
+        return [
+            self.get(key, is_firewx=is_firewx, valid=valid) for key in keys
+        ]
 
     def __getitem__(self, key):
         """Dictionary access helper."""
@@ -226,14 +406,11 @@ def parse(
     if ugc_provider is None:
         ugc_provider = UGCProvider()
 
-    def _construct(code: str) -> UGC:
-        return ugc_provider.get(code, is_firewx=is_firewx)
-
-    ugcs = []
+    codes: list[str] = []
     expire = None
     tokens = UGC_RE.findall(text)
     if not tokens:
-        return ugcs, expire
+        return [], expire
     if len(tokens) > 1:
         raise UGCParseException(
             f"More than 1 UGC encoding in text:\n{tokens}\n"
@@ -254,11 +431,9 @@ def parse(
         this_part = part.strip()
         if len(this_part) == 6:  # We have a new state ID
             state_code = this_part[:3]
-            ugcs.append(_construct(this_part))
+            codes.append(this_part)
         elif len(this_part) == 3:  # We have an individual Section
-            ugcs.append(
-                _construct(f"{state_code[:2]}{state_code[2]}{this_part}")
-            )
+            codes.append(f"{state_code[:2]}{state_code[2]}{this_part}")
         elif len(this_part) > 6:  # We must have a > in there somewhere
             new_parts = re.split(">", this_part)
             first_part = new_parts[0]
@@ -267,23 +442,21 @@ def parse(
                 state_code = first_part[:3]
             first_val = int(first_part[-3:])
             last_val = int(second_part)
+            prefix = f"{state_code[:2]}{state_code[2]}"
             if ugc_type == "C":
-                for j in range(0, last_val + 2 - first_val, 2):
-                    str_code = f"{(first_val + j):03.0f}"
-                    ugcs.append(
-                        _construct(
-                            f"{state_code[:2]}{state_code[2]}{str_code}"
-                        )
-                    )
+                codes.extend(
+                    f"{prefix}{(first_val + j):03.0f}"
+                    for j in range(0, last_val + 2 - first_val, 2)
+                )
             else:
-                for j in range(first_val, last_val + 1):
-                    str_code = f"{j:03.0f}"
-                    ugcs.append(
-                        _construct(
-                            f"{state_code[:2]}{state_code[2]}{str_code}"
-                        )
-                    )
-    return ugcs, expire
+                codes.extend(
+                    f"{prefix}{j:03.0f}"
+                    for j in range(first_val, last_val + 1)
+                )
+    return (
+        ugc_provider.get_many(codes, is_firewx=is_firewx, valid=valid),
+        expire,
+    )
 
 
 def ugcs_to_text(
@@ -4,6 +4,9 @@ import math
 import warnings
 from collections import UserDict
 from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
 from typing import Any
 from zoneinfo import ZoneInfo
 
@@ -12,6 +15,8 @@ import numpy as np
 import pandas as pd
 from metpy.units import units as munits
 
+from pyiem.database import executemany_rowcounts
+
 # Track which columns are in the summary table for the null_ check below
 SUMMARY_COLS = (
     "max_tmpf min_tmpf max_sknt max_gust max_sknt_ts max_gust_ts max_dwpf "
@@ -54,6 +59,79 @@ VALUE_BOUNDS = {
 }
 
 
+CURRENT_UPDATE_SQL = """UPDATE current c SET
+tmpf = %(tmpf)s,  dwpf = %(dwpf)s,  drct = %(drct)s,  sknt = %(sknt)s,
+tsf0 = %(tsf0)s, tsf1 = %(tsf1)s,
+tsf2 = %(tsf2)s,  tsf3 = %(tsf3)s,  rwis_subf = %(rwis_subf)s,
+scond0 = %(scond0)s,  scond1 = %(scond1)s,  scond2 = %(scond2)s,
+scond3 = %(scond3)s,  pday = %(pday)s,  c1smv = %(c1smv)s,
+c2smv = %(c2smv)s,  c3smv = %(c3smv)s,  c4smv = %(c4smv)s,
+c5smv = %(c5smv)s,  c1tmpf = %(c1tmpf)s,  c2tmpf = %(c2tmpf)s,
+c3tmpf = %(c3tmpf)s,  c4tmpf = %(c4tmpf)s,  c5tmpf = %(c5tmpf)s,
+pres = %(pres)s,  relh = %(relh)s,  srad = %(srad)s,  vsby = %(vsby)s,
+phour = %(phour)s,  gust = %(gust)s,  raw = %(raw)s,  alti = %(alti)s,
+mslp = %(mslp)s, rstage = %(rstage)s,
+pmonth = %(pmonth)s,  skyc1 = %(skyc1)s,  skyc2 = %(skyc2)s,
+skyc3 = %(skyc3)s,  skyc4 = %(skyc4)s,  skyl1 = %(skyl1)s,
+skyl2 = %(skyl2)s,  skyl3 = %(skyl3)s,  skyl4 = %(skyl4)s,
+pcounter = %(pcounter)s,  discharge = %(discharge)s,  p03i = %(p03i)s,
+p06i = %(p06i)s,  p24i = %(p24i)s,  max_tmpf_6hr = %(max_tmpf_6hr)s,
+min_tmpf_6hr = %(min_tmpf_6hr)s,  max_tmpf_24hr = %(max_tmpf_24hr)s,
+min_tmpf_24hr = %(min_tmpf_24hr)s, wxcodes = %(wxcodes)s,
+battery = %(battery)s, water_tmpf = %(water_tmpf)s,
+ice_accretion_1hr = %(ice_accretion_1hr)s,
+ice_accretion_3hr = %(ice_accretion_3hr)s,
+ice_accretion_6hr = %(ice_accretion_6hr)s,
+feel = %(feel)s, valid = %(valid)s,
+peak_wind_gust = %(peak_wind_gust)s,
+peak_wind_drct = %(peak_wind_drct)s,
+peak_wind_time = %(peak_wind_time)s,
+snowdepth = %(snowdepth)s, srad_1h_j = %(srad_1h_j)s,
+tsoil_4in_f = %(tsoil_4in_f)s, tsoil_8in_f = %(tsoil_8in_f)s,
+tsoil_16in_f = %(tsoil_16in_f)s, tsoil_20in_f = %(tsoil_20in_f)s,
+tsoil_32in_f = %(tsoil_32in_f)s, tsoil_40in_f = %(tsoil_40in_f)s,
+tsoil_64in_f = %(tsoil_64in_f)s, tsoil_128in_f = %(tsoil_128in_f)s,
+updated = now()
+WHERE c.iemid = %(iemid)s and %(valid)s >= c.valid """
+
+CURRENT_LOG_SQL = """INSERT into current_log
+(iemid, tmpf, dwpf, drct, sknt,
+tsf0, tsf1, tsf2, tsf3, rwis_subf, scond0, scond1, scond2, scond3,
+valid, pday, c1smv, c2smv, c3smv, c4smv, c5smv, c1tmpf, c2tmpf,
+c3tmpf, c4tmpf, c5tmpf, pres, relh, srad, vsby, phour, gust, raw,
+alti, mslp, rstage, pmonth, skyc1,
+skyc2, skyc3, skyc4, skyl1, skyl2, skyl3, skyl4, pcounter,
+discharge, p03i, p06i, p24i, max_tmpf_6hr, min_tmpf_6hr,
+max_tmpf_24hr, min_tmpf_24hr, wxcodes, battery,
+ice_accretion_1hr, ice_accretion_3hr, ice_accretion_6hr,
+water_tmpf, feel, peak_wind_gust, peak_wind_drct,
+peak_wind_time, snowdepth, srad_1h_j, tsoil_4in_f, tsoil_8in_f,
+tsoil_16in_f, tsoil_20in_f, tsoil_32in_f, tsoil_40in_f,
+tsoil_64in_f, tsoil_128in_f) VALUES(
+%(iemid)s, %(tmpf)s, %(dwpf)s, %(drct)s, %(sknt)s,
+%(tsf0)s, %(tsf1)s, %(tsf2)s, %(tsf3)s,
+%(rwis_subf)s, %(scond0)s, %(scond1)s, %(scond2)s, %(scond3)s,
+%(valid)s, %(pday)s, %(c1smv)s, %(c2smv)s, %(c3smv)s, %(c4smv)s,
+%(c5smv)s, %(c1tmpf)s, %(c2tmpf)s, %(c3tmpf)s, %(c4tmpf)s,
+%(c5tmpf)s, %(pres)s, %(relh)s, %(srad)s, %(vsby)s, %(phour)s,
+%(gust)s, %(raw)s, %(alti)s, %(mslp)s,
+%(rstage)s, %(pmonth)s, %(skyc1)s,
+%(skyc2)s, %(skyc3)s, %(skyc4)s, %(skyl1)s, %(skyl2)s, %(skyl3)s,
+%(skyl4)s, %(pcounter)s, %(discharge)s, %(p03i)s, %(p06i)s,
+%(p24i)s, %(max_tmpf_6hr)s, %(min_tmpf_6hr)s,
+%(max_tmpf_24hr)s, %(min_tmpf_24hr)s, %(wxcodes)s,
+%(battery)s,
+%(ice_accretion_1hr)s, %(ice_accretion_3hr)s,
+%(ice_accretion_6hr)s,
+%(water_tmpf)s, %(feel)s, %(peak_wind_gust)s, %(peak_wind_drct)s,
+%(peak_wind_time)s, %(snowdepth)s, %(srad_1h_j)s, %(tsoil_4in_f)s,
+%(tsoil_8in_f)s, %(tsoil_16in_f)s, %(tsoil_20in_f)s,
+%(tsoil_32in_f)s, %(tsoil_40in_f)s, %(tsoil_64in_f)s,
+%(tsoil_128in_f)s
+)
+"""
+
+
 def bounded(val, floor, ceiling):
     """Return val if is a finite number within [floor, ceiling], else None."""
     if val is None:
@@ -117,25 +195,20 @@ def get_summary_table(valid):
     return f"summary_{valid.year}"
 
 
-def summary_update(txn, data):
-    """Updates the summary table and returns affected rows.
+def _summary_dateconst(isdaily: bool) -> str:
+    """Return the SQL fragment computing the summary table day."""
+    if isdaily:
+        return " %(localdate)s "
+    return " date(%(valid)s at time zone %(tzname)s) "
 
-    Args:
-      txn (psycopg.transaction)
-      data (dict)
 
-    Returns:
-      int: affected rows count
-    """
+@lru_cache(maxsize=32)
+def _summary_sql(table: str, isdaily: bool) -> str:
+    """Build the summary table UPDATE statement."""
     # NB with the coalesce func, we prioritize if we have explicit max/min vals
     # But, some of these max values are not tru max daily values
-    table = get_summary_table(data["valid"])
-    dateconst = (
-        " %(localdate)s "
-        if data["_isdaily"]
-        else " date(%(valid)s at time zone %(tzname)s) "
-    )
-    sql = f"""UPDATE {table} s SET
+    dateconst = _summary_dateconst(isdaily)
+    return f"""UPDATE {table} s SET
     max_water_tmpf = coalesce(%(max_water_tmpf)s,
         greatest(max_water_tmpf, %(water_tmpf)s)),
     min_water_tmpf = coalesce(%(min_water_tmpf)s,
@@ -179,18 +252,39 @@ def summary_update(txn, data):
     vector_avg_drct = coalesce(%(vector_avg_drct)s, vector_avg_drct)
     WHERE s.iemid = %(iemid)s and s.day = {dateconst}
     """
-    txn.execute(sql, data)
-    # Check to see if we have any hard coded nulls
+
+
+def _summary_null_sql(data, table: str) -> str | None:
+    """Build the UPDATE setting hard coded nulls, if any are requested."""
     updates = []
     for col in data:
         if col.startswith("null_") and col[5:] in SUMMARY_COLS:
             updates.append(f"{col[5:]} = null")  # noqa
-    if updates:
-        txn.execute(
-            f"UPDATE {table} s SET {', '.join(updates)} "
-            f"WHERE s.iemid = %(iemid)s and s.day = {dateconst}",
-            data,
-        )
+    if not updates:
+        return None
+    return (
+        f"UPDATE {table} s SET {', '.join(updates)} "
+        "WHERE s.iemid = %(iemid)s and "
+        f"s.day = {_summary_dateconst(data['_isdaily'])}"
+    )
+
+
+def summary_update(txn, data):
+    """Updates the summary table and returns affected rows.
+
+    Args:
+      txn (psycopg.transaction)
+      data (dict)
+
+    Returns:
+      int: affected rows count
+    """
+    table = get_summary_table(data["valid"])
+    txn.execute(_summary_sql(table, data["_isdaily"]), data)
+    # Check to see if we have any hard coded nulls
+    sql = _summary_null_sql(data, table)
+    if sql is not None:
+        txn.execute(sql, data)
 
     return txn.rowcount
 
@@ -354,81 +448,11 @@ class Observation:
             return False
         self.calc()
         # Update current table
-        sql = """UPDATE current c SET
-        tmpf = %(tmpf)s,  dwpf = %(dwpf)s,  drct = %(drct)s,  sknt = %(sknt)s,
-        tsf0 = %(tsf0)s, tsf1 = %(tsf1)s,
-        tsf2 = %(tsf2)s,  tsf3 = %(tsf3)s,  rwis_subf = %(rwis_subf)s,
-        scond0 = %(scond0)s,  scond1 = %(scond1)s,  scond2 = %(scond2)s,
-        scond3 = %(scond3)s,  pday = %(pday)s,  c1smv = %(c1smv)s,
-        c2smv = %(c2smv)s,  c3smv = %(c3smv)s,  c4smv = %(c4smv)s,
-        c5smv = %(c5smv)s,  c1tmpf = %(c1tmpf)s,  c2tmpf = %(c2tmpf)s,
-        c3tmpf = %(c3tmpf)s,  c4tmpf = %(c4tmpf)s,  c5tmpf = %(c5tmpf)s,
-        pres = %(pres)s,  relh = %(relh)s,  srad = %(srad)s,  vsby = %(vsby)s,
-        phour = %(phour)s,  gust = %(gust)s,  raw = %(raw)s,  alti = %(alti)s,
-        mslp = %(mslp)s, rstage = %(rstage)s,
-        pmonth = %(pmonth)s,  skyc1 = %(skyc1)s,  skyc2 = %(skyc2)s,
-        skyc3 = %(skyc3)s,  skyc4 = %(skyc4)s,  skyl1 = %(skyl1)s,
-        skyl2 = %(skyl2)s,  skyl3 = %(skyl3)s,  skyl4 = %(skyl4)s,
-        pcounter = %(pcounter)s,  discharge = %(discharge)s,  p03i = %(p03i)s,
-        p06i = %(p06i)s,  p24i = %(p24i)s,  max_tmpf_6hr = %(max_tmpf_6hr)s,
-        min_tmpf_6hr = %(min_tmpf_6hr)s,  max_tmpf_24hr = %(max_tmpf_24hr)s,
-        min_tmpf_24hr = %(min_tmpf_24hr)s, wxcodes = %(wxcodes)s,
-        battery = %(battery)s, water_tmpf = %(water_tmpf)s,
-        ice_accretion_1hr = %(ice_accretion_1hr)s,
-        ice_accretion_3hr = %(ice_accretion_3hr)s,
-        ice_accretion_6hr = %(ice_accretion_6hr)s,
-        feel = %(feel)s, valid = %(valid)s,
-        peak_wind_gust = %(peak_wind_gust)s,
-        peak_wind_drct = %(peak_wind_drct)s,
-        peak_wind_time = %(peak_wind_time)s,
-        snowdepth = %(snowdepth)s, srad_1h_j = %(srad_1h_j)s,
-        tsoil_4in_f = %(tsoil_4in_f)s, tsoil_8in_f = %(tsoil_8in_f)s,
-        tsoil_16in_f = %(tsoil_16in_f)s, tsoil_20in_f = %(tsoil_20in_f)s,
-        tsoil_32in_f = %(tsoil_32in_f)s, tsoil_40in_f = %(tsoil_40in_f)s,
-        tsoil_64in_f = %(tsoil_64in_f)s, tsoil_128in_f = %(tsoil_128in_f)s,
-        updated = now()
-        WHERE c.iemid = %(iemid)s and %(valid)s >= c.valid """
         if not self.data["_isdaily"] and not skip_current:
-            txn.execute(sql, self.data)
+            txn.execute(CURRENT_UPDATE_SQL, self.data)
         if skip_current or (force_current_log and txn.rowcount == 0):
-            sql = """INSERT into current_log
-            (iemid, tmpf, dwpf, drct, sknt,
-            tsf0, tsf1, tsf2, tsf3, rwis_subf, scond0, scond1, scond2, scond3,
-            valid, pday, c1smv, c2smv, c3smv, c4smv, c5smv, c1tmpf, c2tmpf,
-            c3tmpf, c4tmpf, c5tmpf, pres, relh, srad, vsby, phour, gust, raw,
-            alti, mslp, rstage, pmonth, skyc1,
-            skyc2, skyc3, skyc4, skyl1, skyl2, skyl3, skyl4, pcounter,
-            discharge, p03i, p06i, p24i, max_tmpf_6hr, min_tmpf_6hr,
-            max_tmpf_24hr, min_tmpf_24hr, wxcodes, battery,
-            ice_accretion_1hr, ice_accretion_3hr, ice_accretion_6hr,
-            water_tmpf, feel, peak_wind_gust, peak_wind_drct,
-            peak_wind_time, snowdepth, srad_1h_j, tsoil_4in_f, tsoil_8in_f,
-            tsoil_16in_f, tsoil_20in_f, tsoil_32in_f, tsoil_40in_f,
-            tsoil_64in_f, tsoil_128in_f) VALUES(
-            %(iemid)s, %(tmpf)s, %(dwpf)s, %(drct)s, %(sknt)s,
-            %(tsf0)s, %(tsf1)s, %(tsf2)s, %(tsf3)s,
-            %(rwis_subf)s, %(scond0)s, %(scond1)s, %(scond2)s, %(scond3)s,
-            %(valid)s, %(pday)s, %(c1smv)s, %(c2smv)s, %(c3smv)s, %(c4smv)s,
-            %(c5smv)s, %(c1tmpf)s, %(c2tmpf)s, %(c3tmpf)s, %(c4tmpf)s,
-            %(c5tmpf)s, %(pres)s, %(relh)s, %(srad)s, %(vsby)s, %(phour)s,
-            %(gust)s, %(raw)s, %(alti)s, %(mslp)s,
-            %(rstage)s, %(pmonth)s, %(skyc1)s,
-            %(skyc2)s, %(skyc3)s, %(skyc4)s, %(skyl1)s, %(skyl2)s, %(skyl3)s,
-            %(skyl4)s, %(pcounter)s, %(discharge)s, %(p03i)s, %(p06i)s,
-            %(p24i)s, %(max_tmpf_6hr)s, %(min_tmpf_6hr)s,
-            %(max_tmpf_24hr)s, %(min_tmpf_24hr)s, %(wxcodes)s,
-            %(battery)s,
-            %(ice_accretion_1hr)s, %(ice_accretion_3hr)s,
-            %(ice_accretion_6hr)s,
-            %(water_tmpf)s, %(feel)s, %(peak_wind_gust)s, %(peak_wind_drct)s,
-            %(peak_wind_time)s, %(snowdepth)s, %(srad_1h_j)s, %(tsoil_4in_f)s,
-            %(tsoil_8in_f)s, %(tsoil_16in_f)s, %(tsoil_20in_f)s,
-            %(tsoil_32in_f)s, %(tsoil_40in_f)s, %(tsoil_64in_f)s,
-            %(tsoil_128in_f)s
-            )
-            """
             if not self.data["_isdaily"]:
-                txn.execute(sql, self.data)
+                txn.execute(CURRENT_LOG_SQL, self.data)
 
         rowcount = summary_update(txn, self.data)
         if rowcount != 1:
@@ -454,3 +478,166 @@ class Observation:
             summary_update(txn, self.data)
 
         return True
+
+
+class ObservationWriter:
+    """Write many Observation objects with set based database statements.
+
+    The `Observation.save` workflow makes three to five database round trips
+    per observation.  This writer resolves station metadata once per flush
+    against a cached station table and then sends each step of the save
+    workflow for all queued observations via ``executemany``, which psycopg
+    pipelines.  The end database state is equivalent to calling ``save`` on
+    each observation in order.
+
+    Args:
+      force_current_log (bool): see `Observation.save`.
+      skip_current (bool): see `Observation.save`.
+    """
+
+    def __init__(self, force_current_log=False, skip_current=False):
+        """Constructor."""
+        self.force_current_log = force_current_log
+        self.skip_current = skip_current
+        # (station, network) -> (iemid, tzname)
+        self.stations: dict[tuple[str, str], tuple[int, str]] = {}
+        self.obs: list[Observation] = []
+
+    def __len__(self) -> int:
+        """Number of queued observations."""
+        return len(self.obs)
+
+    def add(self, ob: Observation):
+        """Queue an observation for the next flush."""
+        self.obs.append(ob)
+
+    def load_stations(self, txn, keys):
+        """Load (station, network) metadata not yet found in the cache.
+
+        Args:
+          txn (psycopg.cursor): database cursor.
+          keys (iterable): (station, network) tuples to resolve.
+        """
+        missing = {k for k in keys if k not in self.stations}
+        if not missing:
+            return
+        ids, networks = zip(*missing, strict=True)
+        txn.execute(
+            "SELECT s.id, s.network, s.iemid, s.tzname from stations s "
+            "JOIN unnest(%s::text[], %s::text[]) as t(id, network) "
+            "ON (s.id = t.id and s.network = t.network)",
+            (list(ids), list(networks)),
+        )
+        for row in txn.fetchall():
+            self.stations[(row["id"], row["network"])] = (
+                row["iemid"],
+                row["tzname"],
+            )
+
+    def _resolve(self, txn, obs: list[Observation]) -> list[bool]:
+        """Set iemid and tzname on the given observations."""
+        self.load_stations(
+            txn,
+            [
+                (ob.data["station"], ob.data["network"])
+                for ob in obs
+                if None in [ob.data["iemid"], ob.data["tzname"]]
+            ],
+        )
+        resolved = []
+        for ob in obs:
+            if None not in [ob.data["iemid"], ob.data["tzname"]]:
+                resolved.append(True)
+                continue
+            meta = self.stations.get((ob.data["station"], ob.data["network"]))
+            if meta is not None:
+                ob.data["iemid"], ob.data["tzname"] = meta
+            resolved.append(meta is not None)
+        return resolved
+
+    def _summary_update(self, txn, obs: list[Observation]) -> list[int]:
+        """Update the summary tables for these obs, returning rowcounts."""
+        # (sql, data, index of ob whose rowcount we want)
+        statements = []
+        for idx, ob in enumerate(obs):
+            table = get_summary_table(ob.data["valid"])
+            statements.append(
+                (_summary_sql(table, ob.data["_isdaily"]), ob.data, idx)
+            )
+            sql = _summary_null_sql(ob.data, table)
+            if sql is not None:
+                statements.append((sql, ob.data, None))
+        counts = [0] * len(obs)
+        # Consecutive statements sharing SQL go together, which keeps the
+        # order of updates hitting the same summary row intact
+        for sql, run in groupby(statements, key=itemgetter(0)):
+            run = list(run)
+            res = executemany_rowcounts(txn, sql, [r[1] for r in run])
+            for (_, _, idx), count in zip(run, res, strict=True):
+                if idx is not None:
+                    counts[idx] = count
+        return counts
+
+    def flush(self, txn) -> list[bool]:
+        """Save the queued observations and empty the queue.
+
+        Args:
+          txn (psycopg.cursor): database cursor with a dict row factory.
+
+        Returns:
+          list[bool]: for each queued observation, the value that
+          `Observation.save` would have returned.
+        """
+        obs = self.obs
+        self.obs = []
+        success = self._resolve(txn, obs)
+        todo = [i for i, ok in enumerate(success) if ok]
+        for i in todo:
+            obs[i].calc()
+        hourly = [obs[i] for i in todo if not obs[i].data["_isdaily"]]
+        logged = []
+        if self.skip_current:
+            logged = hourly
+        else:
+            counts = executemany_rowcounts(
+                txn, CURRENT_UPDATE_SQL, [ob.data for ob in hourly]
+            )
+            if self.force_current_log:
+                logged = [
+                    ob
+                    for ob, count in zip(hourly, counts, strict=True)
+                    if count == 0
+                ]
+        if logged:
+            txn.executemany(CURRENT_LOG_SQL, [ob.data for ob in logged])
+
+        counts = self._summary_update(txn, [obs[i] for i in todo])
+        tomorrow = date.today() + timedelta(days=1)
+        inserts = {}
+        retry = []
+        for i, count in zip(todo, counts, strict=True):
+            if count == 1:
+                continue
+            data = obs[i].data
+            if data["_isdaily"]:
+                localvalid = data["valid"]
+            else:
+                localvalid = (
+                    data["valid"].astimezone(ZoneInfo(data["tzname"])).date()
+                )
+            # we don't want dates into the future as this will foul others
+            if localvalid > tomorrow:
+                success[i] = False
+                continue
+            inserts.setdefault(localvalid.year, set()).add(
+                (data["iemid"], localvalid)
+            )
+            retry.append(obs[i])
+        for year, rows in inserts.items():
+            txn.executemany(
+                f"INSERT into summary_{year} (iemid, day) VALUES (%s, %s)",
+                sorted(rows),
+            )
+        # try once more
+        self._summary_update(txn, retry)
+        return success
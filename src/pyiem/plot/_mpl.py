@@ -3,7 +3,10 @@
 # pylint: disable=unsubscriptable-object,unpacking-non-sequence
 import math
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
+from typing import Optional
 
 import geopandas as gpd
 
@@ -12,15 +15,21 @@ import httpx
 import numpy as np
 import rasterio
 from PIL import Image
-from pymemcache.client import Client
 from pyproj import Transformer
 from rasterio.warp import Resampling, reproject
 from shapely.geometry import Polygon
 
 # Local imports
+from pyiem.plot.tilecache import TileCache, get_tile_cache
 from pyiem.reference import EPSG, LATLON, Z_FILL
 from pyiem.util import LOG, load_geodf
 
+# Number of threads fetching tiles for draw_wmts
+TILE_WORKERS = 8
+# One HTTP client per process, for connection reuse
+_HTTP_CLIENT = {}
+_HTTP_LOCK = threading.Lock()
+
 # Zoom 0 through 24
 METERS_PER_PIXEL = [
     float(x)
@@ -62,30 +71,76 @@ def get_lat_lng_tile(lat, lng, zoom):
     return (x, y)
 
 
-def get_tile_data(url):
-    """Fetch the tile and hope memcached has it."""
+def _get_http_client() -> httpx.Client:
+    """Return a HTTP client to reuse within this process."""
+    pid = os.getpid()
+    with _HTTP_LOCK:
+        if _HTTP_CLIENT.get("pid") != pid:
+            _HTTP_CLIENT["client"] = httpx.Client(timeout=10)
+            _HTTP_CLIENT["pid"] = pid
+        return _HTTP_CLIENT["client"]
+
+
+def get_tile_data(url, cache: Optional[TileCache] = None):
+    """Fetch the tile and hope our tile cache has it.
+
+    Args:
+      url (str): The tile URL.
+      cache (TileCache, optional): The cache to use, defaults to
+        `pyiem.plot.tilecache.get_tile_cache`.
+
+    Returns:
+      np.ndarray of the tile image
+    """
     key = url.split("//")[1]
-    mc = Client("iem-memcached:11211", timeout=5)
-    res = mc.get(key)
+    if cache is None:
+        cache = get_tile_cache()
+    res = cache.get(key)
     if res is None:
         LOG.info("Fetching %s", url)
-        resp = httpx.get(url, timeout=10)
+        resp = _get_http_client().get(url)
         resp.raise_for_status()
         res = resp.content
-        mc.set(key, res)
-    mc.close()
+        cache.set(key, res)
     bio = BytesIO(res)
     bio.seek(0)
     with Image.open(bio) as pilimg:
         return np.asarray(pilimg)
 
 
+def fetch_tiles(urls, workers: Optional[int] = None) -> list:
+    """Fetch tiles concurrently, returning the image or exception for each.
+
+    Args:
+      urls (list of str): The tile URLs.
+      workers (int, optional): The number of threads doing the fetching,
+        defaults to ``TILE_WORKERS``.
+
+    Returns:
+      list of np.ndarray or Exception, in the order of urls
+    """
+
+    def _fetch(url):
+        try:
+            return get_tile_data(url)
+        except Exception as exp:
+            return exp
+
+    if workers is None:
+        workers = TILE_WORKERS
+    if workers <= 1 or len(urls) < 2:
+        return [_fetch(url) for url in urls]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_fetch, urls))
+
+
 def draw_wmts(panel, background):
     """todo"""
     xmin, xmax, ymin, ymax = panel.get_extent(crs=EPSG[4326])
     tx0, ty0 = get_lat_lng_tile(ymax, xmin, panel.zoom)
     tx1, ty1 = get_lat_lng_tile(ymin, xmax, panel.zoom)
     transform = Transformer.from_crs(EPSG[4326], EPSG[3857], always_xy=True)
+    tiles = []
     for y in range(int(ty0), int(ty1) + 1):
         for x in range(int(tx0), int(tx1) + 1):
             minlat, minlon = get_tile_lat_lng(panel.zoom, x, y + 1)
@@ -93,22 +148,24 @@ def draw_wmts(panel, background):
 
             x0, y0 = transform.transform(minlon, maxlat)
             x1, y1 = transform.transform(maxlon, minlat)
-            try:
-                im = get_tile_data(
-                    "https://services.arcgisonline.com/arcgis/rest/services/"
-                    f"{background}/MapServer/tile/{panel.zoom}/{y}/{x}"
-                )
-            except Exception as exp:
-                LOG.info(exp)
-                continue
-
-            panel.ax.imshow(
-                im / 255.0,
-                interpolation="nearest",  # prevents artifacts
-                extent=(x0, x1, y0, y1),
-                origin="lower",
-                zorder=Z_FILL,
-            ).set_rasterized(True)
+            url = (
+                "https://services.arcgisonline.com/arcgis/rest/services/"
+                f"{background}/MapServer/tile/{panel.zoom}/{y}/{x}"
+            )
+            tiles.append((url, (x0, x1, y0, y1)))
+    images = fetch_tiles([url for url, _extent in tiles])
+    for (_url, extent), im in zip(tiles, images, strict=True):
+        if isinstance(im, Exception):
+            LOG.info(im)
+            continue
+
+        panel.ax.imshow(
+            im / 255.0,
+            interpolation="nearest",  # prevents artifacts
+            extent=extent,
+            origin="lower",
+            zorder=Z_FILL,
+        ).set_rasterized(True)
 
     panel.ax.annotate(
         "Basemap Courtesy ESRI",
@@ -39,7 +39,7 @@ from affine import Affine
 from matplotlib.patches import Rectangle, Wedge
 from metpy.calc import wind_components
 from metpy.units import units
-from PIL import Image
+from pyproj import Transformer
 from rasterio.warp import Resampling, reproject
 from scipy.interpolate import NearestNDInterpolator
 from scipy.signal import convolve2d
@@ -48,9 +48,13 @@ from shapely.geometry import shape
 from pyiem.plot.colormaps import radar_ptype, stretch_cmap
 from pyiem.plot.use_agg import figure
 from pyiem.plot.util import (
+    LabelIndex,
+    crop_raster,
     draw_features_from_shapefile,
     draw_logo,
     fitbox,
+    load_base_layer,
+    load_nexrad_composite,
     mask_outside_geom,
     mask_outside_polygon,
     polygon_fill,
@@ -162,6 +166,7 @@ class MapPlot:
         self.cwa = None
         self.fema_region = None
         self.textmask = None  # For our plot_values magic, to prevent overlap
+        self._text_extents = {}  # plot_values text size to pixel extents
         self.sector = sector
         self.cax = self.fig.add_axes(
             CAX_BOUNDS, frameon=False, yticks=[], xticks=[]
@@ -211,12 +216,7 @@ class MapPlot:
             if "nostates" not in kwargs:
                 xlim = gp.ax.get_xlim()
                 ylim = gp.ax.get_ylim()
-                # NB using clip here was trouble with geos
-                _df = (
-                    load_geodf("us_states", gp.crs.to_epsg())
-                    .to_crs(gp.crs)
-                    .cx[slice(*gp.get_xlim()), slice(*gp.get_ylim())]
-                )
+                _df = load_base_layer(gp, "us_states")
                 if not _df.empty:
                     _df.plot(
                         ax=gp.ax,
@@ -703,6 +703,9 @@ class MapPlot:
             this plot_values call. Default `false`
           backgroundcolor (color): color to use for the background of the label
             text, default is None.
+          priority (list, optional): Labels with higher priority values are
+            placed first, so win any collision culling.  Default is to place
+            labels in the order provided.
         """
         if valmask is None:
             valmask = [True] * len(lons)
@@ -728,48 +731,58 @@ class MapPlot:
         figheight = bbox.height * self.fig.dpi
         if self.textmask is None:
             # zorder is used to track plotting priorities
-            self.textmask = np.zeros((int(figwidth), int(figheight)), np.int8)
+            self.textmask = LabelIndex()
         # Either use ongoing textmask or a local one
         _textmask = self.textmask
         if kwargs.get("isolated", False):
-            _textmask = np.zeros((int(figwidth), int(figheight)), np.int8)
-        # Create a geodataframe to use for clipping
-        gdf = gpd.GeoDataFrame(
-            {"geometry": gpd.points_from_xy(lons, lats, crs=LATLON)}
-        )
-        gdf["val"] = vals
-        gdf["valmask"] = valmask
-        gdf["color"] = color
-        gdf["backgroundcolor"] = kwargs.get("backgroundcolor")
-        gdf["label"] = labels
-        gdf["zorder"] = zorder
-        # Create a fake label, to test out our scaling
-        t0 = self.fig.text(
-            0.5,
-            0.5,
-            "ABCDEFGHIJ",
-            transform=self.panels[0].ax.transAxes,
-            color="None",
-            size=textsize,
+            _textmask = LabelIndex()
+        df = pd.DataFrame(
+            {
+                "lon": list(lons),
+                "lat": list(lats),
+                "val": list(vals),
+                "label": list(labels),
+            }
         )
-        bbox = t0.get_window_extent(self.fig.canvas.get_renderer())
-        xpixels_per_char = bbox.width / 10.0
-        ypixels = bbox.height
+        # These may be a scalar for all points or a list
+        df["valmask"] = valmask
+        df["color"] = color
+        df["zorder"] = zorder
+        df["backgroundcolor"] = kwargs.get("backgroundcolor")
+        df["priority"] = kwargs.get("priority", 0)
+        # Higher priorities are placed first, otherwise as provided
+        df = df.sort_values("priority", ascending=False, kind="stable")
+        xpixels_per_char, ypixels = self._text_extent(textsize)
         text_outline_width = kwargs.get("textoutlinewidth", 3)
         for gp in self.panels:
             # See if we have any data to plot, clip is trouble
-            df = gdf.to_crs(gp.crs).cx[
-                slice(*gp.get_xlim()), slice(*gp.get_ylim())
-            ]
-            if df.empty:
+            xs, ys = Transformer.from_crs(
+                LATLON, gp.crs, always_xy=True
+            ).transform(df["lon"].to_numpy(), df["lat"].to_numpy())
+            xlim = sorted(gp.get_xlim())
+            ylim = sorted(gp.get_ylim())
+            inbounds = (
+                (xs >= xlim[0])
+                & (xs <= xlim[1])
+                & (ys >= ylim[0])
+                & (ys <= ylim[1])
+            )
+            if not inbounds.any():
                 continue
-            for _idx, row in df.iterrows():
+            xs = xs[inbounds]
+            ys = ys[inbounds]
+            pixels = gp.ax.transData.transform(np.column_stack([xs, ys]))
+            for x, y, (imgx, imgy), row in zip(
+                xs,
+                ys,
+                pixels,
+                df[inbounds].itertuples(index=False),
+                strict=True,
+            ):
                 ha = "center"
-                mystr = fmt % (row["val"],)
+                mystr = fmt % (row.val,)
                 max_mystr_len = max(len(s) for s in mystr.split("\n"))
                 mystr_lines = len(mystr.split("\n"))
-                (x, y) = row["geometry"].x, row["geometry"].y
-                (imgx, imgy) = gp.ax.transData.transform([x, y])
                 imgx0 = int(imgx - (max_mystr_len * xpixels_per_char / 2.0))
                 if imgx0 < axx0:
                     ha = "left"
@@ -802,11 +815,11 @@ class MapPlot:
                         ),
                     ]
                 )
-                overlap = (
-                    _textmask[int(imgx0) : int(imgx1), int(imgy0) : int(imgy1)]
-                    >= row["zorder"]
+                box = (int(imgx0), int(imgx1), int(imgy0), int(imgy1))
+                # The exact count is only needed for the debug logging
+                _cnt = _textmask.overlap(
+                    *box, row.zorder, limit=None if self.debug else 15
                 )
-                _cnt = np.sum(overlap)
                 # If we have more than 15 pixels of overlap, don't plot this!
                 if _cnt > 15 and labelbuffer > 0:
                     if self.debug:
@@ -845,33 +858,22 @@ class MapPlot:
                         imgy1,
                         _cnt,
                     )
-                _textmask[int(imgx0) : int(imgx1), int(imgy0) : int(imgy1)] = (
-                    np.where(
-                        _textmask[
-                            int(imgx0) : int(imgx1), int(imgy0) : int(imgy1)
-                        ]
-                        < row["zorder"],
-                        row["zorder"],
-                        _textmask[
-                            int(imgx0) : int(imgx1), int(imgy0) : int(imgy1)
-                        ],
-                    )
-                )
-                t0 = gp.text(
+                _textmask.add(*box, row.zorder)
+                # x, y are already projected, so skip the GeoPanel proxy
+                t0 = gp.ax.text(
                     x,
                     y,
                     mystr,
-                    color=row["color"],
+                    color=row.color,
                     size=textsize,
-                    zorder=row["zorder"],
+                    zorder=row.zorder,
                     va="center" if not showmarker else "bottom",
                     ha=ha,
-                    crs=gp.crs,
                 )
-                if row["backgroundcolor"] is not None:
-                    t0.set_backgroundcolor(row["backgroundcolor"])
-                bbox = t0.get_window_extent(self.fig.canvas.get_renderer())
+                if row.backgroundcolor is not None:
+                    t0.set_backgroundcolor(row.backgroundcolor)
                 if self.debug:
+                    bbox = t0.get_window_extent(self.fig.canvas.get_renderer())
                     rec = Rectangle(
                         [bbox.x0, bbox.y0],
                         bbox.width,
@@ -881,13 +883,12 @@ class MapPlot:
                     )
                     self.fig.patches.append(rec)
                 if showmarker:
-                    gp.scatter(
+                    gp.ax.scatter(
                         x,
                         y,
                         marker="+",
-                        zorder=row["zorder"],
+                        zorder=row.zorder,
                         color="k",
-                        crs=gp.crs,
                     )
                 t0.set_clip_on(True)
                 if text_outline_width > 0:
@@ -901,20 +902,37 @@ class MapPlot:
                         ]
                     )
 
-                if row["label"] and row["label"] != "":
+                if row.label and row.label != "":
                     gp.ax.annotate(
-                        f"{row['label']}",
+                        f"{row.label}",
                         xy=(x, y),
                         ha="center",
                         va="top",
                         xytext=(0, 0 - textsize / 2),
                         color=labelcolor,
                         textcoords="offset points",
-                        zorder=row["zorder"] - 1,
+                        zorder=row.zorder - 1,
                         clip_on=True,
                         fontsize=labeltextsize,
                     )
 
+    def _text_extent(self, textsize):
+        """Return the pixels per character and height of text this size."""
+        if textsize not in self._text_extents:
+            # Create a fake label, to test out our scaling
+            t0 = self.fig.text(
+                0.5,
+                0.5,
+                "ABCDEFGHIJ",
+                transform=self.panels[0].ax.transAxes,
+                color="None",
+                size=textsize,
+            )
+            bbox = t0.get_window_extent(self.fig.canvas.get_renderer())
+            t0.remove()
+            self._text_extents[textsize] = (bbox.width / 10.0, bbox.height)
+        return self._text_extents[textsize]
+
     def scatter(self, lons, lats, vals, clevs, **kwargs):
         """Draw points on the map
 
@@ -1559,31 +1577,27 @@ class MapPlot:
             "GUM",
         ]:
             compsector = "gu"
-        baseurl = valid.strftime(
-            "https://mesonet.agron.iastate.edu/archive/data/%Y/%m/%d/"
-            f"GIS/{compsector}comp/{product.lower()}_%Y%m%d%H%M."
-        )
-        try:
-            resp_png = httpx.get(f"{baseurl}png", timeout=10)
-            resp_png.raise_for_status()
-            resp_wld = httpx.get(f"{baseurl}wld", timeout=10)
-            resp_wld.raise_for_status()
-        except Exception as exp:
-            LOG.warning(exp)
+        res = load_nexrad_composite(product, compsector, valid)
+        if res is None:
+            LOG.warning(
+                "overlay_nexrad %s %s %s not found", product, compsector, valid
+            )
             return None
-        # World file defines the center of the upper left pixel
-        (dx, _, _, dy, west, north) = [
-            float(x) for x in resp_wld.content.decode("ascii").split("\n")
-        ]
-        west_edge = west - dx / 2.0
-        north_edge = north + dy / 2.0
-        bio = BytesIO(resp_png.content)
-        bio.seek(0)
-        with Image.open(bio) as pilimg:
-            # Horrid hack, the IEM archive added a placeholder file that was
-            # RGB instead of mode=P
-            _zeros = np.zeros((100, 100))
-            im = np.asarray(pilimg) if pilimg.size != (100, 100) else _zeros
+        # Only reproject the portion of the composite within our panels
+        bounds = []
+        for panel in self.panels:
+            (x0, x1), (y0, y1) = panel.get_xlim(), panel.get_ylim()
+            transform = Transformer.from_crs(panel.crs, LATLON, always_xy=True)
+            bounds.append(transform.transform_bounds(x0, y0, x1, y1))
+        bounds = np.array(bounds)
+        # transform_bounds reports west > east when crossing the dateline
+        if (bounds[:, 0] <= bounds[:, 2]).all():
+            im, affine = crop_raster(
+                *res,
+                (*bounds[:, :2].min(axis=0), *bounds[:, 2:].max(axis=0)),
+            )
+        else:
+            im, affine = res
 
         ramp = ramp2df(f"composite_{product.lower()}")
         cmap = mpcolors.ListedColormap(ramp[["r", "g", "b"]].to_numpy() / 256)
@@ -1591,7 +1605,7 @@ class MapPlot:
         norm = mpcolors.BoundaryNorm(ramp["coloridx"].values, cmap.N)
         self.imshow(
             im,
-            Affine(dx, 0, west_edge, 0, dy, north_edge),
+            affine,
             "EPSG:4326",
             cmap=cmap,
             norm=norm,
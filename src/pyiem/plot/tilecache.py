@@ -0,0 +1,280 @@
+"""Caches for the basemap tiles used by MapPlot backgrounds.
+
+The tiles are cached as the raw bytes returned by the tile server and keyed
+by the tile URL without the scheme.  By default, an in-process LRU sits in
+front of the IEM memcached server.  Use `set_tile_cache` to plug in another
+cache, for example a `DiskTileCache` when memcached is not available or to
+seed tiles for offline tests::
+
+    from pyiem.plot.tilecache import DiskTileCache, set_tile_cache
+
+    set_tile_cache(DiskTileCache("/tmp/pyiem_tiles", maxbytes=500e6))
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from pymemcache.client.base import PooledClient
+
+from pyiem.util import LOG
+
+MEMCACHE_SERVER = "iem-memcached:11211"
+
+
+class TileCache:
+    """Base class of a tile cache, which caches nothing."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached tile or None."""
+        return None
+
+    def set(self, key: str, value: bytes):
+        """Cache the tile."""
+
+
+class MemoryTileCache(TileCache):
+    """An in-process LRU of tiles, bounded by the total bytes held.
+
+    Args:
+      maxbytes (int): The maximum number of tile bytes to hold.
+    """
+
+    def __init__(self, maxbytes: int = 64 * 1024 * 1024):
+        """Constructor."""
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of cached tiles."""
+        return len(self._tiles)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached tile or None."""
+        with self._lock:
+            value = self._tiles.get(key)
+            if value is not None:
+                self._tiles.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        """Cache the tile, evicting the least recently used."""
+        if len(value) > self.maxbytes:
+            return
+        with self._lock:
+            previous = self._tiles.pop(key, None)
+            if previous is not None:
+                self.nbytes -= len(previous)
+            self._tiles[key] = value
+            self.nbytes += len(value)
+            while self.nbytes > self.maxbytes:
+                _key, old = self._tiles.popitem(last=False)
+                self.nbytes -= len(old)
+
+
+class DiskTileCache(TileCache):
+    """An on-disk LRU of tiles, bounded by the total bytes held.
+
+    Each tile is a plain file named by a hash of its key, written atomically,
+    so that the directory can be shared by processes, seeded ahead of time
+    and the files read or memory mapped directly.  The least recently used
+    tiles, by file modification time, are removed once ``maxbytes`` is
+    exceeded.  The size accounting only knows about the files found at
+    startup and those written by this instance.
+
+    Args:
+      path (str): The directory to hold the tiles, created if necessary.
+      maxbytes (int): The maximum number of tile bytes to hold.
+    """
+
+    def __init__(self, path: str, maxbytes: int = 256 * 1024 * 1024):
+        """Constructor."""
+        self.path = path
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self._files = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        entries = []
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name.endswith(".tile"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _mtime, name, size in sorted(entries):
+            self._files[name] = size
+            self.nbytes += size
+
+    def filename(self, key: str) -> str:
+        """Return the file used for the given key."""
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, f"{digest}.tile")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached tile or None."""
+        fn = self.filename(key)
+        try:
+            with open(fn, "rb") as fh:
+                value = fh.read()
+            os.utime(fn)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            name = os.path.basename(fn)
+            if name in self._files:
+                self._files.move_to_end(name)
+            else:
+                # Seeded by someone else
+                self._files[name] = len(value)
+                self.nbytes += len(value)
+        return value
+
+    def set(self, key: str, value: bytes):
+        """Cache the tile, evicting the least recently used."""
+        if len(value) > self.maxbytes:
+            return
+        fn = self.filename(key)
+        with tempfile.NamedTemporaryFile(
+            dir=self.path, suffix=".tmp", delete=False
+        ) as fh:
+            fh.write(value)
+        os.replace(fh.name, fn)
+        name = os.path.basename(fn)
+        with self._lock:
+            self.nbytes += len(value) - self._files.pop(name, 0)
+            self._files[name] = len(value)
+            while self.nbytes > self.maxbytes:
+                old, size = self._files.popitem(last=False)
+                self.nbytes -= size
+                try:
+                    os.unlink(os.path.join(self.path, old))
+                except FileNotFoundError:
+                    pass
+
+
+class MemcacheTileCache(TileCache):
+    """Tiles cached within memcached, with one pooled client per process.
+
+    When the server can not be reached, the cache is skipped for
+    ``retry_after`` seconds, so that each tile does not wait on a timeout.
+
+    Args:
+      server (str): The memcached ``host:port``.
+      timeout (float): The connect and request timeout in seconds.
+      retry_after (float): Seconds to wait before trying a failed server.
+    """
+
+    def __init__(
+        self,
+        server: str = MEMCACHE_SERVER,
+        timeout: float = 5,
+        retry_after: float = 60,
+    ):
+        """Constructor."""
+        self.server = server
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._client = None
+        self._pid = None
+        self._failed_at = None
+        self._lock = threading.Lock()
+
+    def _get_client(self) -> Optional[PooledClient]:
+        """Return our client, or None when the server recently failed."""
+        if (
+            self._failed_at is not None
+            and time.monotonic() - self._failed_at < self.retry_after
+        ):
+            return None
+        with self._lock:
+            # Connections are not to be shared with forked children
+            if self._client is None or self._pid != os.getpid():
+                self._client = PooledClient(
+                    self.server,
+                    connect_timeout=self.timeout,
+                    timeout=self.timeout,
+                )
+                self._pid = os.getpid()
+            return self._client
+
+    def _failed(self, exp: Exception):
+        """Note the failure."""
+        LOG.info("memcached %s failed: %s", self.server, exp)
+        self._failed_at = time.monotonic()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached tile or None."""
+        client = self._get_client()
+        if client is None:
+            return None
+        try:
+            return client.get(key)
+        except Exception as exp:
+            self._failed(exp)
+            return None
+
+    def set(self, key: str, value: bytes):
+        """Cache the tile."""
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            client.set(key, value)
+        except Exception as exp:
+            self._failed(exp)
+
+
+class ChainedTileCache(TileCache):
+    """Look through a sequence of caches, fastest first.
+
+    A hit within a slower cache is copied into the faster caches before it.
+
+    Args:
+      caches (list of TileCache): The caches to look through.
+    """
+
+    def __init__(self, caches: list):
+        """Constructor."""
+        self.caches = list(caches)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached tile or None."""
+        for i, cache in enumerate(self.caches):
+            value = cache.get(key)
+            if value is not None:
+                for faster in self.caches[:i]:
+                    faster.set(key, value)
+                return value
+        return None
+
+    def set(self, key: str, value: bytes):
+        """Cache the tile within all caches."""
+        for cache in self.caches:
+            cache.set(key, value)
+
+
+_TILE_CACHE = {}
+
+
+def get_tile_cache() -> TileCache:
+    """Return the process wide tile cache, building the default one."""
+    if "cache" not in _TILE_CACHE:
+        _TILE_CACHE["cache"] = ChainedTileCache(
+            [MemoryTileCache(), MemcacheTileCache()]
+        )
+    return _TILE_CACHE["cache"]
+
+
+def set_tile_cache(cache: TileCache):
+    """Set the process wide tile cache.
+
+    Args:
+      cache (TileCache): The cache to use, ``TileCache()`` disables caching.
+    """
+    _TILE_CACHE["cache"] = cache
@@ -3,7 +3,10 @@
 # pylint: disable=import-outside-toplevel
 import functools
 import os
+import threading
+from collections import OrderedDict, defaultdict
 from pathlib import Path
+from typing import Optional
 
 import geopandas as gpd
 import matplotlib.colors as mpcolors
@@ -12,18 +15,33 @@ import matplotlib.patches as mpatches
 import matplotlib.path as mpath
 import numpy as np
 import pandas as pd
+import shapely
+from affine import Affine
+from matplotlib.collections import PathCollection
+from PIL import Image
 from pyproj import Transformer
 from shapely.geometry import MultiPolygon, Polygon
 
 from pyiem import reference
 from pyiem.plot.colormaps import stretch_cmap
 from pyiem.reference import FIGSIZES, LATLON
+from pyiem.util import archive_fetch, load_geodf
 
 from ._mpl import GeoPanel, SphericalMercatorPanel
 
 DATADIR = os.sep.join([os.path.dirname(__file__), "..", "data"])
 LOGO_BOUNDS = (0.005, 0.91, 0.08, 0.086)
 LOGOFILES = {"dep": "deplogo.png", "iem": "logo.png", "nwa": "nwalogo.png"}
+# Process level LRU of clipped and projected base layers, see load_base_layer
+BASE_LAYER_CACHE_SIZE = 128
+_BASE_LAYER_CACHE = OrderedDict()
+_BASE_LAYER_LOCK = threading.Lock()
+# The website archive of the NEXRAD composites, when not found locally
+ARCHIVE_URL = "https://mesonet.agron.iastate.edu/archive/data"
+# Process level LRU of decoded NEXRAD composites, see load_nexrad_composite
+NEXRAD_CACHE_BYTES = 512 * 1024 * 1024
+_NEXRAD_CACHE = OrderedDict()
+_NEXRAD_LOCK = threading.Lock()
 
 
 def update_kwargs_apctx(func):
@@ -57,43 +75,178 @@ def update_kwargs_apctx(func):
     return wrapped
 
 
-def draw_features_from_shapefile(gp, name: str, **kwargs):
-    """Add features as we need to."""
+def _read_natural_earth(name: str, resolution: str, crs) -> gpd.GeoDataFrame:
+    """Read a Natural Earth layer projected to the given crs."""
     name2 = name if name != "borders" else "admin_0_boundary_lines_land"
-    boundpoly = gp.get_bounds_polygon()
-    # Life choices: which resolution to use?
-    threshold = 25 if gp.crs.is_geographic else 3e12
-    resolution = "50m" if boundpoly.area > threshold else "10m"
-
     fastfn = (
         Path("/opt/miniconda3/pyiem_data/parquet")
-        / str(gp.crs.to_epsg())
+        / str(crs.to_epsg())
         / "natural_earth"
         / ("physical" if name != "borders" else "cultural")
         / f"ne_{resolution}_{name2}.parquet"
     )
     if fastfn.exists():
-        df = gpd.read_parquet(fastfn).cx[
-            slice(*gp.get_xlim()), slice(*gp.get_ylim())
-        ]
-    else:
-        shpfn = (
-            Path(
-                os.environ.get(
-                    "CARTOPY_OFFLINE_SHARED",
-                    os.environ.get("CARTOPY_DATA_DIR"),
-                )
+        return gpd.read_parquet(fastfn)
+    shpfn = (
+        Path(
+            os.environ.get(
+                "CARTOPY_OFFLINE_SHARED",
+                os.environ.get("CARTOPY_DATA_DIR"),
             )
-            / "shapefiles"
-            / "natural_earth"
-            / ("physical" if name != "borders" else "cultural")
-            / f"ne_{resolution}_{name2}.shp"
-        )
-        df = (
-            gpd.read_file(shpfn, engine="pyogrio")
-            .to_crs(gp.crs)
-            .cx[slice(*gp.get_xlim()), slice(*gp.get_ylim())]
         )
+        / "shapefiles"
+        / "natural_earth"
+        / ("physical" if name != "borders" else "cultural")
+        / f"ne_{resolution}_{name2}.shp"
+    )
+    return gpd.read_file(shpfn, engine="pyogrio").to_crs(crs)
+
+
+def load_base_layer(gp, name: str) -> gpd.GeoDataFrame:
+    """Load a projected base layer clipped to the panel's extent.
+
+    The result is cached within this process by layer, resolution, crs and
+    extent, so that repeated constructions of the same sector skip the I/O
+    and reprojection.  The returned GeoDataFrame is shared, so do not modify
+    it.
+
+    Args:
+      gp (GeoPanel): The panel to load the layer for.
+      name (str): Natural Earth ``land``, ``borders``, ``coastline``,
+        ``lakes`` or the bundled ``us_states``.
+
+    Returns:
+      geopandas.GeoDataFrame
+    """
+    xlim = tuple(gp.get_xlim())
+    ylim = tuple(gp.get_ylim())
+    resolution = None
+    if name != "us_states":
+        # Life choices: which resolution to use?
+        threshold = 25 if gp.crs.is_geographic else 3e12
+        area = (xlim[1] - xlim[0]) * (ylim[1] - ylim[0])
+        resolution = "50m" if abs(area) > threshold else "10m"
+    key = (name, resolution, gp.crs.to_wkt(), xlim, ylim)
+    with _BASE_LAYER_LOCK:
+        df = _BASE_LAYER_CACHE.get(key)
+        if df is not None:
+            _BASE_LAYER_CACHE.move_to_end(key)
+            return df
+    if resolution is None:
+        df = load_geodf(name, gp.crs.to_epsg()).to_crs(gp.crs)
+    else:
+        df = _read_natural_earth(name, resolution, gp.crs)
+    # NB using clip here was trouble with geos
+    df = df.cx[slice(*xlim), slice(*ylim)]
+    with _BASE_LAYER_LOCK:
+        _BASE_LAYER_CACHE[key] = df
+        while len(_BASE_LAYER_CACHE) > BASE_LAYER_CACHE_SIZE:
+            _BASE_LAYER_CACHE.popitem(last=False)
+    return df
+
+
+def _read_nexrad_composite(partialpath: str):
+    """Read and decode a composite PNG and its world file from the archive.
+
+    Returns:
+      (np.ndarray, Affine) or None if either file is unavailable.
+    """
+    with archive_fetch(f"{partialpath}wld", baseurl=ARCHIVE_URL) as fn:
+        if fn is None:
+            return None
+        with open(fn, encoding="ascii") as fh:
+            # World file defines the center of the upper left pixel
+            (dx, _, _, dy, west, north) = [
+                float(x) for x in fh.read().strip().split("\n")
+            ]
+    with archive_fetch(f"{partialpath}png", baseurl=ARCHIVE_URL) as fn:
+        if fn is None:
+            return None
+        with Image.open(fn) as pilimg:
+            # Horrid hack, the IEM archive added a placeholder file that was
+            # RGB instead of mode=P
+            if pilimg.size == (100, 100):
+                im = np.zeros((100, 100))
+            else:
+                im = np.asarray(pilimg)
+    return im, Affine(dx, 0, west - dx / 2.0, 0, dy, north + dy / 2.0)
+
+
+def load_nexrad_composite(product: str, compsector: str, valid):
+    """Load a decoded IEM NEXRAD composite, local archive first.
+
+    The composite is found within the ``/mesonet/ARCHIVE/data`` archive, if
+    available, else downloaded.  The decoded image is cached within this
+    process, bounded by ``NEXRAD_CACHE_BYTES``, so that many plots of the
+    same composite only decode it once.  The returned array is shared and
+    read-only.
+
+    Args:
+      product (str): The composite product, ``N0Q`` or ``N0R``.
+      compsector (str): The composite sector, ie ``us``, ``ak``.
+      valid (datetime.datetime): The UTC valid time of the composite.
+
+    Returns:
+      (np.ndarray, Affine) or None if the composite is not found.
+    """
+    key = (product.upper(), compsector, valid.strftime("%Y%m%d%H%M"))
+    with _NEXRAD_LOCK:
+        res = _NEXRAD_CACHE.get(key)
+        if res is not None:
+            _NEXRAD_CACHE.move_to_end(key)
+            return res
+    partialpath = valid.strftime(
+        f"%Y/%m/%d/GIS/{compsector}comp/{product.lower()}_%Y%m%d%H%M."
+    )
+    res = _read_nexrad_composite(partialpath)
+    if res is None:
+        return None
+    res[0].setflags(write=False)
+    with _NEXRAD_LOCK:
+        _NEXRAD_CACHE[key] = res
+        nbytes = sum(im.nbytes for im, _ in _NEXRAD_CACHE.values())
+        while nbytes > NEXRAD_CACHE_BYTES and len(_NEXRAD_CACHE) > 1:
+            _key, (old, _) = _NEXRAD_CACHE.popitem(last=False)
+            nbytes -= old.nbytes
+    return res
+
+
+def crop_raster(grid: np.ndarray, affine: Affine, bounds, pad: int = 2):
+    """Crop a north-up raster to the window covering the given bounds.
+
+    Args:
+      grid (np.ndarray): The 2-D raster.
+      affine (Affine): The affine transformation of the raster.
+      bounds (tuple): ``(west, south, east, north)`` in the raster's CRS.
+      pad (int): Number of extra pixels to keep on each side.
+
+    Returns:
+      (np.ndarray, Affine) with the cropped view and its transformation,
+      which are the inputs when the bounds do not intersect the raster.
+    """
+    (west, south, east, north) = bounds
+    inverse = ~affine
+    cols, rows = inverse * (
+        np.array([west, east, west, east]),
+        np.array([south, south, north, north]),
+    )
+    if not (np.isfinite(cols).all() and np.isfinite(rows).all()):
+        return grid, affine
+    col0 = max(0, int(np.floor(cols.min())) - pad)
+    col1 = min(grid.shape[1], int(np.ceil(cols.max())) + pad)
+    row0 = max(0, int(np.floor(rows.min())) - pad)
+    row1 = min(grid.shape[0], int(np.ceil(rows.max())) + pad)
+    if col0 >= col1 or row0 >= row1:
+        return grid, affine
+    return (
+        grid[row0:row1, col0:col1],
+        affine * Affine.translation(col0, row0),
+    )
+
+
+def draw_features_from_shapefile(gp, name: str, **kwargs):
+    """Add features as we need to."""
+    df = load_base_layer(gp, name)
     if not df.empty:
         df.plot(ax=gp.ax, aspect=None, **kwargs)
 
@@ -240,6 +393,100 @@ def fitbox(fig, text, x0, x1, y0, y1, **kwargs):
     return txt
 
 
+class LabelIndex:
+    """Spatial hash of the label boxes placed on a figure.
+
+    This answers the question the previous figure sized pixel mask did, how
+    many pixels of a candidate box are already covered by labels with at
+    least the same zorder, by only looking at the boxes that share a grid
+    cell with the candidate.  Boxes are in integer figure pixel coordinates
+    and are half open, ie ``[x0, x1) x [y0, y1)``.
+
+    Args:
+      cellsize (int): The grid cell size in pixels.
+    """
+
+    def __init__(self, cellsize: int = 64):
+        """Constructor."""
+        self.cellsize = cellsize
+        self.boxes = []
+        self._cells = defaultdict(list)
+
+    def __len__(self) -> int:
+        """Return the number of boxes."""
+        return len(self.boxes)
+
+    def add(self, x0: int, x1: int, y0: int, y1: int, zorder: int):
+        """Add a placed label box."""
+        if x1 <= x0 or y1 <= y0:
+            return
+        idx = len(self.boxes)
+        self.boxes.append((x0, x1, y0, y1, zorder))
+        size = self.cellsize
+        for i in range(x0 // size, (x1 - 1) // size + 1):
+            for j in range(y0 // size, (y1 - 1) // size + 1):
+                self._cells[(i, j)].append(idx)
+
+    def overlap(
+        self,
+        x0: int,
+        x1: int,
+        y0: int,
+        y1: int,
+        zorder: int,
+        limit: Optional[int] = None,
+    ) -> int:
+        """Return the number of pixels within the box that are covered.
+
+        Args:
+          x0 (int): left pixel
+          x1 (int): right pixel, exclusive
+          y0 (int): bottom pixel
+          y1 (int): top pixel, exclusive
+          zorder (int): Only boxes with at least this zorder count.
+          limit (int, optional): Stop counting once more than this many
+            pixels are known to be covered, the returned value is then only
+            a lower bound.
+
+        Returns:
+          int: covered pixel count
+        """
+        if x1 <= x0 or y1 <= y0:
+            return 0
+        if zorder <= 0:
+            # An empty pixel is considered to have a zorder of zero
+            return (x1 - x0) * (y1 - y0)
+        seen = set()
+        hits = []
+        total = 0
+        size = self.cellsize
+        for i in range(x0 // size, (x1 - 1) // size + 1):
+            for j in range(y0 // size, (y1 - 1) // size + 1):
+                for idx in self._cells.get((i, j), ()):
+                    if idx in seen:
+                        continue
+                    seen.add(idx)
+                    bx0, bx1, by0, by1, bzorder = self.boxes[idx]
+                    if bzorder < zorder:
+                        continue
+                    ix0, ix1 = max(x0, bx0), min(x1, bx1)
+                    iy0, iy1 = max(y0, by0), min(y1, by1)
+                    if ix1 <= ix0 or iy1 <= iy0:
+                        continue
+                    area = (ix1 - ix0) * (iy1 - iy0)
+                    if limit is not None and area > limit:
+                        return area
+                    total += area
+                    hits.append((ix0 - x0, ix1 - x0, iy0 - y0, iy1 - y0))
+        if len(hits) < 2:
+            return total
+        # Count the union of the overlapping boxes
+        covered = np.zeros((x1 - x0, y1 - y0), bool)
+        for hx0, hx1, hy0, hy1 in hits:
+            covered[hx0:hx1, hy0:hy1] = True
+        return int(covered.sum())
+
+
 def make_panel(
     ndc_axbounds, fig, extent, crs, aspect, is_geoextent=False, **kwargs
 ) -> GeoPanel:
@@ -620,6 +867,84 @@ def mask_outside_polygon(poly_verts, gp):
     gp.ax.set_ylim(ylim)
 
 
+def _lookup_colors(index, color, default: str) -> np.ndarray:
+    """Return a color for each index entry from a color or dict of colors."""
+    if isinstance(color, str):
+        return np.full(len(index), color, dtype=object)
+    return (
+        pd.Series(index, index=index)
+        .map(color)
+        .fillna(default)
+        .to_numpy(dtype=object)
+    )
+
+
+def _to_hex(rgba: np.ndarray) -> np.ndarray:
+    """Vectorized `matplotlib.colors.to_hex` of a RGBA array."""
+    if len(rgba) == 0:
+        return np.array([], dtype=object)
+    rgb = np.round(rgba[:, :3] * 255).astype(int)
+    uniq, inverse = np.unique(rgb, axis=0, return_inverse=True)
+    hexes = np.array([f"#{r:02x}{g:02x}{b:02x}" for r, g, b in uniq])
+    return hexes[inverse.reshape(-1)].astype(object)
+
+
+def _polygon_paths(geoms: np.ndarray) -> list:
+    """Build one compound matplotlib Path per (Multi)Polygon geometry.
+
+    This matches what geopandas plotting builds for each geometry, but
+    gathers the coordinates for all of the geometries at once.  The
+    geometries are normalized like geopandas, so that holes are drawn.
+    """
+    geoms = shapely.normalize(geoms)
+    parts, part_geom = shapely.get_parts(geoms, return_index=True)
+    rings, ring_part = shapely.get_rings(parts, return_index=True)
+    coords, coord_ring = shapely.get_coordinates(rings, return_index=True)
+    codes = np.full(len(coords), mpath.Path.LINETO, dtype=mpath.Path.code_type)
+    ring_start = np.r_[True, coord_ring[1:] != coord_ring[:-1]]
+    codes[ring_start] = mpath.Path.MOVETO
+    codes[np.r_[ring_start[1:], True]] = mpath.Path.CLOSEPOLY
+    coord_geom = part_geom[ring_part[coord_ring]]
+    splits = np.flatnonzero(coord_geom[1:] != coord_geom[:-1]) + 1
+    return [
+        mpath.Path(verts, cds)
+        for verts, cds in zip(
+            np.split(coords, splits), np.split(codes, splits), strict=True
+        )
+    ]
+
+
+def _draw_polygons(gp, geoms, fc, ec, zorder, lw):
+    """Draw polygons with a single collection, like geopandas would."""
+    keep = ~(geoms.isna() | geoms.is_empty).to_numpy()
+    geoms = geoms.to_numpy()[keep]
+    if len(geoms) == 0:
+        return
+    type_ids = shapely.get_type_id(geoms)
+    if not np.isin(
+        type_ids,
+        [shapely.GeometryType.POLYGON, shapely.GeometryType.MULTIPOLYGON],
+    ).all():
+        # Let geopandas sort out anything that is not a polygon
+        gpd.GeoSeries(geoms).plot(
+            ax=gp.ax,
+            fc=fc[keep],
+            ec=ec[keep],
+            aspect=None,
+            zorder=zorder,
+            lw=lw,
+        )
+        return
+    collection = PathCollection(
+        _polygon_paths(geoms),
+        facecolors=fc[keep],
+        edgecolors=ec[keep],
+        linewidths=lw,
+        zorder=zorder,
+    )
+    gp.ax.add_collection(collection)
+
+
 def polygon_fill(mymap, geodf, data, **kwargs):
     """Generalize function for overlaying filled polygons on the map.
 
@@ -670,52 +995,42 @@ def polygon_fill(mymap, geodf, data, **kwargs):
         ]
         if native.empty:
             continue
-        native = native.copy()
-        native["fc"] = pd.Series(fc) if fc else "white"
-        native["ec"] = pd.Series(ec) if ec else "k"
-        # Compute colors and such
-        for idx, row in native.iterrows():
-            lbl = (
+        missing = pd.isna(native["val"]).to_numpy()
+        # How we compute a fill and edge color
+        if fc is not None:
+            _fc = _lookup_colors(native.index, fc, "white")
+        elif color is not None:
+            _fc = _lookup_colors(native.index, color, "white")
+        else:
+            _fc = np.full(len(native.index), "white", dtype=object)
+            vals = native["val"].to_numpy(dtype=float)[~missing]
+            _fc[~missing] = _to_hex(cmap(norm(vals)))
+        if ec is not None:
+            _ec = _lookup_colors(native.index, ec, "k")
+        elif color is not None:
+            _ec = _lookup_colors(native.index, color, "k")
+        else:
+            _ec = np.full(len(native.index), "k", dtype=object)
+        if ilabel:
+            # prefer our stored centroid vs calculated one
+            centroids = shapely.centroid(native.geometry.to_numpy())
+            for key, col, func in [
+                ("x", "lon", shapely.get_x),
+                ("y", "lat", shapely.get_y),
+            ]:
+                to_label[key].extend(
+                    native[col] if col in native.columns else func(centroids)
+                )
+            to_label["vals"].extend(
                 labels.get(idx, "-")
-                if pd.isna(row["val"])
-                else labels.get(idx, lblformat % (row["val"],))
-            )
-            # How we compute a fill and edge color
-            _fc, _ec = (None, None)
-            if color is not None:
-                if isinstance(color, str):
-                    _fc, _ec = (color, color)
-                else:
-                    _fc = color.get(idx, "white")
-                    _ec = color.get(idx, "k")
-            if fc is not None:
-                _fc = fc if isinstance(fc, str) else fc.get(idx, "white")
-            if ec is not None:
-                _ec = ec if isinstance(ec, str) else ec.get(idx, "k")
-            _ec = "k" if _ec is None else _ec
-            if _fc is None:
-                _fc = (
-                    "white"
-                    if pd.isna(row["val"])
-                    else mpcolors.to_hex(cmap(norm([row["val"]]))[0])
+                if miss
+                else labels.get(idx, lblformat % (val,))
+                for idx, val, miss in zip(
+                    native.index, native["val"], missing, strict=True
                 )
-            native.at[idx, "fc"] = _fc
-            native.at[idx, "ec"] = _ec
-            if ilabel:
-                # prefer our stored centroid vs calculated one
-                mx = row.get("lon", native.at[idx, "geom"].centroid.x)
-                my = row.get("lat", native.at[idx, "geom"].centroid.y)
-                to_label["x"].append(mx)
-                to_label["y"].append(my)
-                to_label["vals"].append(lbl)
-
-        native.plot(
-            ax=gp.ax,
-            fc=native["fc"].values,
-            ec=native["ec"].values,
-            aspect=None,
-            zorder=zorder,
-            lw=kwargs.get("lw", 0.1),
+            )
+        _draw_polygons(
+            gp, native.geometry, _fc, _ec, zorder, kwargs.get("lw", 0.1)
         )
     if to_label:
         mymap.plot_values(
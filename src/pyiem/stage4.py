@@ -7,6 +7,8 @@ import numpy as np
 from affine import Affine
 from pyproj import Proj
 
+from pyiem.grid.nav import get_nav
+
 DX, DY = 4_762.5, 4_762.5
 NX = 1121
 NY = 881
@@ -58,3 +60,19 @@ def find_ij(lon: float, lat: float) -> tuple[Optional[int], Optional[int]]:
     if i < 0 or j < 0 or i >= NX or j >= NY:
         return None, None
     return i, j
+
+
+def find_ij_many(
+    lons: np.ndarray, lats: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find the grid cell indices for many lon/lats (assuming modern grid).
+
+    Args:
+      lons (array_like): longitudes of the points.
+      lats (array_like): latitudes of the points.
+
+    Returns:
+      (i, j, inbounds) arrays, see
+      `pyiem.models.gridnav.CartesianGridNavigation.find_ij_many`.
+    """
+    return get_nav("STAGE4").find_ij_many(lons, lats)
@@ -357,6 +357,59 @@ def exponential_backoff(func, *args, **kwargs):
     return None
 
 
+def pool_imap(
+    func,
+    iterable,
+    workers: int,
+    max_pending: int | None = None,
+    initializer=None,
+    initargs=(),
+):
+    """Map a function over an iterable with a pool of worker processes.
+
+    The iterable is consumed lazily, so that only ``max_pending`` items are
+    submitted to the pool and not yet yielded.  The futures are yielded in
+    the order of the iterable, so the caller decides how to handle an
+    exception from ``future.result()``.  Stopping the iteration early
+    cancels the pending work.
+
+    Args:
+      func (callable): picklable function called with each item.
+      iterable (iterable): the items to process.
+      workers (int): number of worker processes.
+      max_pending (int, optional): defaults to ``4 * workers``.
+      initializer (callable, optional): see ``ProcessPoolExecutor``.
+      initargs (tuple, optional): see ``ProcessPoolExecutor``.
+
+    Yields:
+      concurrent.futures.Future, which is done
+    """
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    if max_pending is None:
+        max_pending = 4 * workers
+    pending = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=initializer, initargs=initargs
+    ) as pool:
+        try:
+            for item in iterable:
+                pending.append(pool.submit(func, item))
+                if len(pending) >= max_pending:
+                    future = pending.popleft()
+                    future.exception()
+                    yield future
+            while pending:
+                future = pending.popleft()
+                future.exception()
+                yield future
+        finally:
+            # The caller may stop iterating early, so do not finish the rest
+            for future in pending:
+                future.cancel()
+
+
 def delete_property(name, cursor=None):
     """Delete a property from the database.
 
@@ -521,6 +574,7 @@ def archive_fetch(
     partialpath: str,
     localdir: str = "/mesonet/ARCHIVE/data",
     method: str = "get",
+    baseurl: str = "http://mesonet.agron.iastate.edu/archive/data",
 ):
     """
     Helper to fetch a file from the archive, by first looking at the filesystem
@@ -531,6 +585,7 @@ def archive_fetch(
         partialpath (str): Typically a path that starts with /YYYY/mm/dd
         method (str): HTTP method to use, default 'get', in the case of head,
           we only check the existence and return an empty string if found.
+        baseurl (str): The website archive location to fetch from.
 
     Returns:
         str: filename of the file found and available for use
@@ -543,7 +598,7 @@ def archive_fetch(
         yield localfn
         return
 
-    url = f"http://mesonet.agron.iastate.edu/archive/data/{partialpath}"
+    url = f"{baseurl}/{partialpath}"
 
     tmp = None
     suffix = "." + os.path.basename(partialpath).split(".")[-1]
@@ -93,9 +93,63 @@ def date_tokens2datetime(tokens):
     return z, tz, now.replace(tzinfo=timezone.utc)
 
 
+def _strip_bounds(text: str) -> tuple[int, int]:
+    """Return the bounds of ``text.strip()`` without copying the text."""
+    start = 0
+    end = len(text)
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _nth_line(
+    text: str, num: int, start: int = 0, end: Optional[int] = None
+) -> str:
+    """Return the zero-indexed ``num`` line of text, without splitting it.
+
+    Args:
+      text (str): The text to look within.
+      num (int): The line number to return.
+      start (int): The offset within text that starts the first line.
+      end (int, optional): The offset within text to stop looking.
+
+    Returns:
+      str: The line, empty string when the text has fewer lines.
+    """
+    for _ in range(num):
+        start = text.find("\n", start, end) + 1
+        if start == 0:
+            return ""
+    pos = text.find("\n", start, end)
+    return text[start:end] if pos == -1 else text[start:pos]
+
+
+def _mnd_subject(text: str, size: int = 1000) -> str:
+    """Return the first ``size`` chars of text, once carriage returns go.
+
+    Args:
+      text (str): The product text.
+      size (int): The number of characters wanted.
+
+    Returns:
+      str: The text prefix to search for a MND timestamp.
+    """
+    # Products typically have two carriage returns per line, so a doubled
+    # prefix is almost always enough, otherwise try again with everything
+    subject = text[: 2 * size].replace("\r", "")
+    if len(subject) < size and len(text) > 2 * size:
+        subject = text.replace("\r", "")
+    return subject[:size]
+
+
 def _condition_text(text: str) -> str:
     """Condition the text to better match expections on what this should be.
 
+    The bounds of the conditioned text are found by scanning the header and
+    tail, so that large products are only copied when needed.
+
     Args:
       text (str): The text to condition
 
@@ -105,28 +159,55 @@ def _condition_text(text: str) -> str:
     # Remove all Carriage Returns
     text = text.replace("\r", "")
     # Remove all leading and trailing whitespace
-    text = text.strip()
+    start, end = _strip_bounds(text)
     # Remove the line if it starts with a start of product marker
-    if text.startswith("\001"):
-        text = text.split("\n", 1)[1]
+    if text.startswith("\001", start):
+        start = text.find("\n", start, end) + 1
+        if start == 0:
+            start = end
     # Now the first line should be the LDM sequence number
-    if not LDM_SEQUENCE_RE.match(text):
+    prefix = ""
+    if not LDM_SEQUENCE_RE.match(text[start : start + 4]):
         # If not, add it
-        text = f"000 \n{text}"
+        prefix = "000 \n"
     # The second line should match the WMO header, this is FATAL
-    line2 = text.split("\n")[1]
+    line2 = _nth_line(text, 0 if prefix else 1, start, end)
     if not WMO_RE.match(line2):
         msg = f"FATAL: Could not parse WMO header! `{line2}`"
         raise TextProductException(msg)
     # Remove the end of product marker
-    text = text.rstrip("\003")
+    while end > start and text[end - 1] == "\003":
+        end -= 1
     # Ensure we have a newline at the end
-    if not text.endswith("\n"):
-        text = text + "\n"
-    # Profit
+    suffix = "" if end > start and text[end - 1] == "\n" else "\n"
+    # Profit, with only one more copy of the text when needed
+    text = text[start:end]
+    if prefix or suffix:
+        text = f"{prefix}{text}{suffix}"
     return text
 
 
+def parse_header(text: str) -> tuple[str, Optional[str]]:
+    """Return the WMO source and AFOS identifier via a header only parse.
+
+    This is the subset of `WMOProduct` needed to figure out which parser a
+    product should be handed to, without processing the product body.
+
+    Args:
+      text (str): The product text.
+
+    Returns:
+      (str, str or None): The WMO source (cccc) and AFOS identifier.
+    """
+    # The SOH, LDM sequence, WMO and AFOS lines fit well within this
+    start, _end = _strip_bounds(text[:512])
+    head = text[start : start + 512].replace("\x00", "")
+    unixtext = _condition_text(head)
+    source = WMO_RE.search(unixtext[:100]).group("cccc")
+    tokens = AFOSRE.findall(_nth_line(unixtext, 2))
+    return source, (tokens[0].strip() if tokens else None)
+
+
 class WMOProduct:
     """Base class for Products with a WMO Header."""
 
@@ -164,8 +245,7 @@ class WMOProduct:
     def parse_afos(self):
         """Figure out what the AFOS PIL is"""
         # We have one shot to get this right
-        line3 = self.unixtext.split("\n")[2]
-        tokens = AFOSRE.findall(line3)
+        tokens = AFOSRE.findall(_nth_line(self.unixtext, 2))
         if tokens:
             self.afos = tokens[0].strip()
 
@@ -206,7 +286,7 @@ class WMOProduct:
         """
         # The MND header hopefully has a full timestamp that is the best
         # truth that we can have for this product.
-        subject = self.text.replace("\r", "")[:1000]  # Likely too much
+        subject = _mnd_subject(self.text)
         tokens = TIME_RE.findall(subject)
         if not tokens:
             tokens = TIME_EXT_RE.findall(subject)
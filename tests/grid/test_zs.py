@@ -43,3 +43,75 @@ def test_gen_stats():
     czs = zs.CachingZonalStats(affine)
     res = czs.gen_stats(np.flipud(grid))
     assert not res
+
+
+def test_gen_stats_sparse():
+    """Test the sparse matrix engine against the legacy one."""
+    affine = Affine(10.0, 0.0, 0.0, 0.0, -10, 100)
+    grid = np.flipud(np.reshape(np.arange(100.0), (10, 10)))
+    sq1 = Polygon([(50, 50), (50, 60), (60, 60), (60, 50)])
+    sq2 = Polygon([(15, 15), (15, 35), (35, 35), (35, 15)])
+    # completely off
+    sq3 = Polygon([(-10, -10), (-10, -1), (-1, -1), (-1, -10)])
+    geometries = GeoSeries([sq1, sq2, sq3])
+    czs = zs.CachingZonalStats(affine)
+    legacy = czs.gen_stats(grid, geometries)
+    res = czs.gen_stats_sparse(grid, geometries)
+    np.testing.assert_allclose(res[:2], legacy[:2])
+    assert np.isnan(res[2])
+    res = czs.gen_stats_sparse(grid, stat="count")
+    np.testing.assert_array_equal(res, [1, 9, 0])
+    res = czs.gen_stats_sparse(grid, geometries, "count", area_weighted=True)
+    np.testing.assert_allclose(res, [1, 4, 0])
+    # stack of grids along time, with missing data
+    stack = np.stack([grid, grid * 2, np.full(grid.shape, np.nan)])
+    res = czs.gen_stats_sparse(stack, stat="sum")
+    assert res.shape == (3, 3)
+    np.testing.assert_allclose(res[1], [110, 396, 0])
+    assert (res[2] == 0).all()
+
+
+def test_gridnav_cache(tmp_path):
+    """Test that the gridnav round trips via the on-disk cache."""
+    affine = Affine(10.0, 0.0, 0.0, 0.0, -10, 100)
+    grid = np.flipud(np.reshape(np.arange(100.0), (10, 10)))
+    sq1 = Polygon([(50, 50), (50, 60), (60, 60), (60, 50)])
+    sq2 = Polygon([(15, 15), (15, 35), (35, 35), (35, 15)])
+    sq3 = Polygon([(-10, -10), (-10, -1), (-1, -1), (-1, -10)])
+    sq4 = Polygon([(-10, 90), (-10, 110), (22, 110), (10, 90)])
+    geometries = GeoSeries([sq1, sq2, sq3, sq4])
+    czs = zs.CachingZonalStats(affine, cachedir=str(tmp_path))
+    res = czs.gen_stats(grid, geometries)
+    files = list(tmp_path.glob("czs_*.npz"))
+    assert len(files) == 1
+    czs2 = zs.CachingZonalStats(affine, cachedir=str(tmp_path))
+    czs2.compute_gridnav(geometries, grid)
+    for nav, nav2 in zip(czs.gridnav, czs2.gridnav, strict=True):
+        if nav is None:
+            assert nav2 is None
+            continue
+        assert nav[:4] == nav2[:4]
+        np.testing.assert_array_equal(nav.mask, nav2.mask)
+    assert czs2.gen_stats(grid) == res
+    # Different geometries get a different cache file
+    czs3 = zs.CachingZonalStats(affine, cachedir=str(tmp_path))
+    czs3.compute_gridnav(geometries[:2], grid)
+    assert len(list(tmp_path.glob("czs_*.npz"))) == 2
+
+
+def test_compute_weights_cache(tmp_path):
+    """Test that the weights follow the grid navigation and grid shape."""
+    affine = Affine(10.0, 0.0, 0.0, 0.0, -10, 100)
+    grid = np.flipud(np.reshape(np.arange(100.0), (10, 10)))
+    sq1 = Polygon([(50, 50), (50, 60), (60, 60), (60, 50)])
+    sq2 = Polygon([(15, 15), (15, 35), (35, 35), (35, 15)])
+    czs = zs.CachingZonalStats(affine, cachedir=str(tmp_path))
+    czs.compute_gridnav(GeoSeries([sq1]), grid)
+    matrix = czs.compute_weights(grid.shape)
+    assert czs.compute_weights((10, 10)) is matrix
+    assert czs.compute_weights((20, 20)).shape == (1, 400)
+    czs.compute_gridnav(GeoSeries([sq1, sq2]), grid)
+    np.testing.assert_allclose(czs.gen_stats_sparse(grid), czs.gen_stats(grid))
+    # Loading the earlier navigation from disk resets the weights too
+    czs.compute_gridnav(GeoSeries([sq1]), grid)
+    assert czs.compute_weights(grid.shape).shape == (1, 100)
@@ -77,3 +77,33 @@ def test_find_ij(cgn):
     i, j = cgn.find_ij(0.5, 10.5)
     assert i is None
     assert j is None
+
+
+def test_find_ij_many(cgn):
+    """Test the vectorized find_ij."""
+    i, j, inbounds = cgn.find_ij_many([0.5, 0.5, 9.9], [0.5, 10.5, 3.2])
+    assert inbounds.tolist() == [True, False, True]
+    assert i.tolist() == [0, -1, 9]
+    assert j.tolist() == [0, -1, 3]
+
+
+def test_find_ij_many_crs():
+    """Test the vectorized find_ij with projected points."""
+    _cgn = CartesianGridNavigation(
+        crs="EPSG:26915",
+        left_edge=400_000,
+        bottom_edge=4_600_000,
+        dx=1_000,
+        dy=1_000,
+        nx=100,
+        ny=100,
+    )
+    i, j, inbounds = _cgn.find_ij_many([-93.62], [42.02])
+    assert inbounds[0]
+    assert (i[0], j[0]) == _cgn.find_ij(-93.62, 42.02)
+    i, j, inbounds = _cgn.find_ij_many(
+        [400_500], [4_600_500], crs="EPSG:26915"
+    )
+    assert inbounds[0]
+    assert i[0] == 0
+    assert j[0] == 0
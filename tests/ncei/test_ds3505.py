@@ -2,6 +2,8 @@
 # pylint: disable=redefined-outer-name
 
 import numpy as np
+import pandas as pd
+import pytest
 
 from pyiem.ncei import ds3505
 from pyiem.util import get_test_filepath, utc
@@ -234,3 +236,85 @@ def test_read():
         for line in fh:
             data = ds3505.parser(line.decode("ascii").strip(), "KAMW")
             assert data is not None
+
+
+def test_read_file():
+    """Test the bulk reader against the line parser."""
+    fn = get_test_filepath("NCEI/DS3505.txt")
+    df = pd.concat(
+        ds3505.read_file(fn, "ENJA", codes=["AA1", "MD1"], chunksize=1000),
+        ignore_index=True,
+    )
+    with open(fn, "rb") as fh:
+        rows = [
+            ds3505.parser(line.decode("ascii").strip(), "ENJA") for line in fh
+        ]
+    assert len(df.index) == len(rows)
+    for idx in [0, 1, len(rows) - 1]:
+        row = df.iloc[idx]
+        data = rows[idx]
+        assert row["valid"] == data["valid"]
+        assert row["call_id"] == "ENJA"
+        for col in ["lat", "lon", "airtemp_c", "drct", "wind_code"]:
+            assert row[col] == data[col]
+        if "AA1" in data["extra"]:
+            assert row["AA1_depth"] == data["extra"]["AA1"]["depth"]
+        assert row["MD1_code"] == data["extra"]["MD1"]["code"]
+    # Missing values
+    assert pd.isna(df["mslp_hpa"]).sum() == sum(
+        row["mslp_hpa"] is None for row in rows
+    )
+
+
+def test_read_file_skips(tmp_path):
+    """Test that we skip what the line parser skips."""
+    msg = (
+        "0114010010999991988010100004+70933-008667FM-12+0009ENJA "
+        "V0203301N01851220001CN0030001N9-02011-02211100211ADDAA10"
+        "6000091"
+    )
+    fn = tmp_path / "isd.txt"
+    fn.write_text(
+        "\n".join(
+            [msg, msg.replace("4+70933", "A+70933"), msg[:100], msg[:105]]
+        )
+    )
+    df = pd.concat(ds3505.read_file(fn, "ENJA", codes=["AA1"]))
+    assert len(df.index) == 2
+    assert df["AA1_hours"].iloc[0] == 6
+    assert pd.isna(df["AA1_hours"].iloc[1])
+    with pytest.raises(ValueError):
+        next(ds3505.read_file(fn, "ENJA", codes=["XXX"]))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_gen_metar_many(workers):
+    """Test generating METARs in bulk."""
+    fn = get_test_filepath("NCEI/DS3505.txt")
+    with open(fn, "rb") as fh:
+        lines = [line.decode("ascii").strip() for line in fh][:300]
+    expected = [
+        ds3505.parser(x, "ENJA", add_metar=True)["metar"] for x in lines
+    ]
+    records = [ds3505.parser(x, "ENJA") for x in lines]
+    res = ds3505.gen_metar_many(records, workers=workers, chunksize=100)
+    assert res == expected
+    assert "metar" not in records[0]
+    df = pd.concat(
+        ds3505.read_file(fn, "ENJA", codes=ds3505.METAR_CODES, chunksize=300)
+    ).iloc[:300]
+    res = ds3505.gen_metar_many(df, workers=workers, chunksize=100)
+    assert res == expected
+
+
+def test_gen_metar_many_failure():
+    """Test that a failure does not stop the rest."""
+    msg = (
+        "0114010010999991988010100004+70933-008667FM-12+0009ENJA "
+        "V0203301N01851220001CN0030001N9-02011-02211100211ADDAA10"
+        "6000091"
+    )
+    good = ds3505.parser(msg, "ENJA")
+    res = ds3505.gen_metar_many([good, {}, good])
+    assert res[0] == res[2]
+    assert res[1] is None
@@ -1,5 +1,8 @@
 """Test GHCNh parsing, joy."""
 
+import pandas as pd
+import pytest
+
 from pyiem.ncei.ghcnh import process_file
 from pyiem.reference import TRACE_VALUE, VARIABLE_WIND_DIRECTION
 from pyiem.util import get_test_filepath
@@ -37,3 +40,29 @@ def test_ntat():
     fn = get_test_filepath("GHCNh/GHCNh_FPI0000NTAT_por.psv")
     res = list(process_file(fn))
     assert res[0]["vsby"] is None
+
+
+@pytest.mark.parametrize(
+    "station", ["USW00026442", "USW00024135", "USW00013967", "FPI0000NTAT"]
+)
+def test_process_file_chunksize(station):
+    """Test that the DataFrame mode matches the dict mode."""
+    fn = get_test_filepath(f"GHCNh/GHCNh_{station}_por.psv")
+    obs = list(process_file(fn))
+    chunks = list(process_file(fn, chunksize=2))
+    assert len(chunks) == (len(obs) + 1) // 2
+    df = pd.concat(chunks, ignore_index=True)
+    assert len(df.index) == len(obs)
+    for i, ob in enumerate(obs):
+        for col in df.columns:
+            if ob[col] is None:
+                assert df.at[i, col] is None or pd.isna(df.at[i, col])
+            else:
+                assert df.at[i, col] == ob[col]
+
+
+def test_process_file_empty(tmp_path):
+    """Test that an empty file yields nothing."""
+    fn = tmp_path / "empty.psv"
+    fn.write_text("")
+    assert list(process_file(fn, chunksize=10)) == []
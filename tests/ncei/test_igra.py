@@ -1,7 +1,11 @@
 """Test IGRA ingest."""
 
+from unittest import mock
+
+import numpy as np
 import pytest
 
+from pyiem.ncei import igra
 from pyiem.ncei.igra import process_ytd
 from pyiem.util import get_test_filepath
 
@@ -42,8 +46,72 @@ def test_ytd():
     assert len(res) == 2
 
 
+def test_ytd_workers():
+    """Test that a pool of workers yields the soundings in file order."""
+    fn = get_test_filepath("IGRA/OAX_ytd.txt")
+    res = list(process_ytd(fn, workers=2, batchsize=1))
+    assert [obj.model for obj in res] == [
+        obj.model for obj in helper("IGRA/OAX_ytd.txt")
+    ]
+    assert not list(process_ytd(get_test_filepath("IGRA/KABI_99header.txt")))
+
+
+def test_ytd_as_array():
+    """Test the record arrays match the validated records."""
+    fn = get_test_filepath("IGRA/KRME_24070400.txt")
+    obj = helper("IGRA/KRME_24070400.txt")[0]
+    header, records = next(process_ytd(fn, as_array=True))
+    assert header == obj.model.header
+    assert len(records) == 25
+    assert np.isnan(records.rh[22])
+    assert records.pflag[0] == obj.model.records[0].pflag
+    np.testing.assert_allclose(
+        records.temp,
+        [np.nan if r.temp is None else r.temp for r in obj.model.records],
+    )
+    assert records.valid[0] == np.datetime64(
+        obj.model.records[0].valid.replace(tzinfo=None)
+    )
+
+
 @pytest.mark.parametrize("database", ["raob"])
 def test_sql(dbcursor):
     """Can we ingest the data to the database."""
     obj = helper("IGRA/OAX_25030812.txt")[0]
     obj.sql(dbcursor)
+
+
+@pytest.mark.parametrize("database", ["raob"])
+def test_sql_many(dbcursor):
+    """Can we COPY the data to the database."""
+    res = helper("IGRA/OAX_ytd.txt") + helper("IGRA/OAX_25030812.txt")
+    levels = sum(len(obj.model.records) for obj in res)
+    assert igra.sql_many(dbcursor, res, overwrite=True) == levels
+    # Now they exist
+    assert igra.sql_many(dbcursor, res) == 0
+    res[0].sql(dbcursor, overwrite=True, copy=True)
+
+
+def test_load_ytd(monkeypatch):
+    """Test that we commit in batches."""
+    calls = []
+
+    class _Conn:
+        """Just enough of a connection."""
+
+        def cursor(self):
+            """Return a cursor."""
+            return mock.Mock()
+
+        def commit(self):
+            """Note the commit."""
+            calls.append("commit")
+
+    def _sql_many(_cursor, soundings, overwrite):
+        calls.append(len(soundings))
+        return len(soundings)
+
+    monkeypatch.setattr(igra, "sql_many", _sql_many)
+    fn = get_test_filepath("IGRA/OAX_ytd.txt")
+    assert igra.load_ytd(_Conn(), fn, batchsize=1) == 2
+    assert calls == [1, "commit", 1, "commit", 0, "commit"]
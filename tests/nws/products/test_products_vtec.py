@@ -7,7 +7,12 @@ import pandas as pd
 import pytest
 
 from pyiem.nws.nwsli import NWSLI
-from pyiem.nws.products.vtec import _check_dup_ps
+from pyiem.nws.products._vtec_util import (
+    _coverage_keys,
+    _find_missed_ugcs,
+    which_year,
+)
+from pyiem.nws.products.vtec import VTECYearCache, _check_dup_ps
 from pyiem.nws.products.vtec import parser as _vtecparser
 from pyiem.nws.products.wwp import parser as wwp_parser
 from pyiem.nws.ugc import UGC, UGCParseException, UGCProvider
@@ -352,6 +357,77 @@ def test_gh540_duplicated_ugcs():
     assert any(a.startswith("Duplicated UGCs") for a in prod.warnings)
 
 
+class NoDatabase:
+    """Cursor that should never be used."""
+
+    def execute(self, *args):
+        """Fail."""
+        raise AssertionError("database was queried")
+
+
+def test_vtec_year_cache():
+    """Test the bounded event year cache."""
+    new = parse("/O.NEW.KJAN.TO.W.0130.050829T1651Z-050829T1815Z/")[0]
+    con = parse("/O.CON.KJAN.TO.W.0130.000000T0000Z-050829T1815Z/")[0]
+    other = parse("/O.CON.KJAN.TO.W.0131.000000T0000Z-050829T1815Z/")[0]
+    cache = VTECYearCache(maxsize=1, ttl=datetime.timedelta(days=2))
+    valid = utc(2005, 8, 29, 17)
+    assert cache.get(con, valid) is None
+    cache.put(new, 2005, valid)
+    assert cache.get(con, valid) == 2005
+    assert cache.get(con, utc(2005, 9, 5)) is None
+    assert not cache
+    cache.put(new, 2005, valid)
+    cache.put(other, 2005, valid)
+    assert len(cache) == 1
+    assert cache.get(con, valid) is None
+    assert cache.get(other, valid) == 2005
+    assert (cache.hits, cache.misses) == (2, 3)
+    # A NEW event reusing the key for another year is ambiguous
+    new.etn = 131
+    cache.put(new, 2006, valid)
+    assert cache.get(other, valid) is None
+    cache.put(other, 2006, valid)
+    assert cache.get(other, valid) is None
+
+
+def test_which_year_cache():
+    """Test that which_year uses the cache instead of the database."""
+    prod = vtecparser(get_test_file("TOR.txt"))
+    seg = prod.segments[0]
+    vtec = seg.vtec[0]
+    cache = VTECYearCache()
+    cache.put(vtec, prod.valid.year, prod.valid)
+    assert which_year(NoDatabase(), prod, seg, vtec, cache) == 2005
+    vtec.action = "CON"
+    assert which_year(NoDatabase(), prod, seg, vtec, cache) == 2005
+
+
+def test_find_missed_ugcs():
+    """Test the keyed coverage check of the database status."""
+    prod = vtecparser(get_test_file("NPW/NPWFFC.txt"))
+    covered = set()
+    rows = []
+    for seg, ugcs, vtec in prod.suv_iter():
+        vtec.year = 2024
+        covered.update(_coverage_keys(seg, vtec))
+        rows.extend(
+            {
+                "ugc": str(ugc),
+                "year": 2024,
+                "phenomena": vtec.phenomena,
+                "significance": vtec.significance,
+                "etn": vtec.etn,
+            }
+            for ugc in ugcs
+        )
+    rows.append({**rows[0], "ugc": "GAZ999"})
+    rows.append({**rows[0], "year": 2023})
+    df = _find_missed_ugcs(pd.DataFrame(rows), covered)
+    assert len(df.index) == 2
+    assert df.iloc[0]["ugc"] == "GAZ999"
+
+
 @pytest.mark.parametrize("database", ["postgis"])
 def test_gh533_dualing_events(dbcursor):
     """Test redundant ETNs that crossed the new years."""
@@ -1882,6 +1958,31 @@ def test_vtec_series(dbcursor):
     assert row["expire"] == answer
 
 
+@pytest.mark.parametrize("database", ["postgis"])
+def test_sql_batch(dbcursor):
+    """Test that the batch mode generates the same warnings."""
+    texts = [get_test_file(f"WSWOUN/{i}.txt") for i in range(13)]
+    tor = get_test_file("TOR.txt")
+    texts.extend(
+        [
+            tor,
+            tor,
+            tor.replace("291656", "291656 CCA"),
+            tor.replace(".NEW.", ".CAN."),
+        ]
+    )
+    warnings = {}
+    for batch in [False, True]:
+        dbcursor.execute("SAVEPOINT batch")
+        warnings[batch] = []
+        for text in texts:
+            prod = vtecparser(text)
+            prod.sql(dbcursor, batch=batch)
+            warnings[batch].append(filter_warnings(prod.warnings))
+        dbcursor.execute("ROLLBACK TO SAVEPOINT batch")
+    assert warnings[False] == warnings[True]
+
+
 @pytest.mark.parametrize("database", ["postgis"])
 def test_vtec(dbcursor):
     """Simple test of VTEC parser"""
@@ -3,7 +3,7 @@
 import pytest
 
 from pyiem.exceptions import HWOException, TextProductException
-from pyiem.nws.products import parser
+from pyiem.nws.products import parse_many, parser
 from pyiem.nws.ugc import UGC
 from pyiem.util import get_test_file, utc
 
@@ -17,6 +17,45 @@ def filter_warnings(ar, startswith="get_gid"):
     return [a for a in ar if not a.startswith(startswith)]
 
 
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_many(workers):
+    """Test that we get the same products back in order."""
+    texts = [
+        get_test_file("LSR/LSRTWC.txt"),
+        get_test_file("RWSGTF_badtime.txt"),
+        get_test_file("TCPAT1.txt"),
+        get_test_file("AFDPQ.txt"),
+    ]
+    res = list(parse_many(texts, workers=workers, ugc_provider={}))
+    assert len(res) == 4
+    assert isinstance(res[1], TextProductException)
+    for text, prod in zip(texts, res, strict=True):
+        if isinstance(prod, Exception):
+            continue
+        ref = parser(text, ugc_provider={})
+        assert prod.get_product_id() == ref.get_product_id()
+        assert prod.ugc_provider is res[0].ugc_provider
+    assert res[0].lsrs
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_many_default_provider(workers):
+    """Test that each parser keeps its own ugc_provider default."""
+    text = get_test_file("CLI/CLIABY.txt")
+    prod = next(parse_many([text], workers=workers))
+    assert not isinstance(prod, Exception)
+    assert prod.get_product_id() == parser(text).get_product_id()
+    assert prod.ugc_provider is not None
+
+
+def test_parse_many_early_stop():
+    """Test that we can stop iterating without parsing everything."""
+    texts = (get_test_file("AFDPQ.txt") for _ in range(100))
+    gen = parse_many(texts, workers=2, ugc_provider={}, max_pending=2)
+    assert next(gen).afos == "AFDPQ"
+    gen.close()
+
+
 def test_260722_ugcs_in_jabber_message():
     """Test that we get the UGCS listed out in the jabber message."""
     ugcdict = {
@@ -1,5 +1,8 @@
 """Can we parse UGC strings"""
 
+import pickle
+
+import pandas as pd
 import pytest
 
 from pyiem.exceptions import UGCParseException
@@ -24,6 +27,18 @@ def test_gh1010_ugc_provider_not_singleton():
     assert ugc_provider is not ugc_provider2
 
 
+def test_pickle_not_singleton():
+    """Test that an unpickled provider does not become the singleton."""
+    ugc_provider = ugc.UGCProvider(
+        legacy_dict={"IAZ001": ugc.UGC("IA", "Z", "001", name="Lyon")}
+    )
+    singleton = ugc.UGCProvider._instance
+    res = pickle.loads(pickle.dumps(ugc_provider))
+    assert ugc.UGCProvider._instance is singleton
+    assert res is not ugc_provider
+    assert res.get("IAZ001").name == "Lyon"
+
+
 def test_contains():
     """Test that we can handle various is in scenarios."""
     ugc_provider = ugc.UGCProvider(
@@ -34,6 +49,87 @@ def test_contains():
     assert "IAZ002" not in ugc_provider
 
 
+def test_get_many():
+    """Test the batch lookup API."""
+    ugc_provider = ugc.UGCProvider(
+        legacy_dict={"IAZ001": ugc.UGC("IA", "Z", "001", name="Lyon")}
+    )
+    res = ugc_provider.get_many(["IAZ001", "IAZ002"])
+    assert res[0].name == "Lyon"
+    assert res[1].name == "((IAZ002))"
+
+
+def test_rebuild_index():
+    """Test that the index follows changes to the dataframe."""
+    ugc_provider = ugc.UGCProvider(
+        legacy_dict={"IAZ001": ugc.UGC("IA", "Z", "001", name="Lyon")}
+    )
+    ugc_provider.df.loc[len(ugc_provider.df.index)] = [
+        "IAZ002",
+        "Osceola",
+        "FSD",
+        "",
+    ]
+    # In place changes are not seen until the index is rebuilt
+    assert "IAZ002" not in ugc_provider
+    ugc_provider.rebuild_index()
+    assert ugc_provider.get("IAZ002").name == "Osceola"
+    ugc_provider.df = ugc_provider.df.iloc[:1]
+    assert "IAZ002" not in ugc_provider
+
+
+def test_build_index_firewx():
+    """Test that the index resolves fire weather zones."""
+    df = pd.DataFrame(
+        {
+            "ugc": ["IAZ001", "IAZ001", "IAZ002", "IAZ003", "IAZ003"],
+            "name": ["Lyon", "Lyon FW", "Osceola", "A", "B"],
+            "wfo": ["FSD", "FSDDMX", "FSD", "DMX", "DMX"],
+            "source": ["z", "fz", "fz", "fz", "fz"],
+        }
+    )
+    index = ugc._build_index(df)
+    assert index["IAZ001"][0] == ("Lyon", ("FSD",))
+    assert index["IAZ001"][1] == ("Lyon FW", ("FSD", "DMX"))
+    # single entries are used for both
+    assert index["IAZ002"][0] == index["IAZ002"][1]
+    # ambiguous
+    assert index["IAZ003"][0] is None
+    assert index["IAZ003"][1] == ("A", ("DMX",))
+
+
+def test_all_versions(monkeypatch):
+    """Test a provider answering lookups over the UGC history."""
+    df = pd.DataFrame(
+        {
+            "ugc": ["IAZ001", "IAZ001", "IAZ002"],
+            "name": ["Old Lyon", "New Lyon", "Osceola"],
+            "wfo": ["FSD", "DMX", "FSD"],
+            "source": ["z", "z", "z"],
+            "begin_ts": [utc(2000, 1, 1), utc(2010, 1, 1), utc(2000, 1, 1)],
+            "end_ts": [utc(2010, 1, 1), None, utc(2005, 1, 1)],
+        }
+    )
+    monkeypatch.setattr("pyiem.nws.ugc._load_from_database", lambda *_args: df)
+    ugc_provider = ugc.UGCProvider(all_versions=True)
+    assert ugc_provider is not ugc.UGCProvider(all_versions=True)
+    assert "IAZ001" in ugc_provider
+    res = ugc_provider.get("IAZ001", valid=utc(2005, 1, 1))
+    assert res.name == "Old Lyon"
+    assert res.wfos == ["FSD"]
+    res = ugc_provider.get("IAZ001", valid=utc(2010, 1, 1))
+    assert res.name == "New Lyon"
+    assert ugc_provider.get("IAZ001").wfos == ["DMX"]
+    assert ugc_provider.get("IAZ001", valid=utc(1999, 1, 1)).name == (
+        "((IAZ001))"
+    )
+    assert ugc_provider.get("IAZ002", valid=utc(2006, 1, 1)).wfos == []
+    ugcs, _ = ugc.parse(
+        "IAZ001-002-011200-", utc(2001, 1, 1), ugc_provider=ugc_provider
+    )
+    assert [u.name for u in ugcs] == ["Old Lyon", "Osceola"]
+
+
 def test_missed_ugc():
     """Invalid encoded county string, check that NMC006 was not included"""
     text = (
@@ -1161,6 +1161,24 @@ def test_textplot():
     return mp.fig
 
 
+def test_plot_values_scalars():
+    """Test that scalar zorder and valmask apply to all points."""
+    mp = MapPlot(sector="iowa", nocaption=True)
+    mp.plot_values([-93, -95], [42, 41], ["a", "b"], zorder=10, valmask=True)
+    texts = mp.panels[0].ax.texts
+    assert [t.get_text() for t in texts] == ["a", "b"]
+    assert all(t.get_zorder() == 10 for t in texts)
+    mp.close()
+
+
+def test_plot_values_priority():
+    """Test that a higher priority label wins the collision culling."""
+    mp = MapPlot(sector="iowa", nocaption=True)
+    mp.plot_values([-93, -93.01], [42, 42], ["low", "high"], priority=[0, 1])
+    assert [t.get_text() for t in mp.panels[0].ax.texts] == ["high"]
+    mp.close()
+
+
 @pytest.mark.mpl_image_compare(tolerance=PAIN)
 def test_textplot2():
     """plot values on a map"""
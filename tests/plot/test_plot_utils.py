@@ -1,7 +1,19 @@
 """Test pyiem.plot.utils."""
 
+from collections import OrderedDict
+from datetime import datetime
+from functools import partial
+
+import matplotlib.colors as mpcolors
+import matplotlib.path as mpath
+import numpy as np
 import pytest
+from affine import Affine
+from PIL import Image
+from shapely.geometry import MultiPolygon, Polygon, box
 
+from pyiem.plot import util as plot_util
+from pyiem.plot._mpl import GeoPanel
 from pyiem.plot.use_agg import figure
 from pyiem.plot.util import (
     centered_bins,
@@ -10,6 +22,8 @@ from pyiem.plot.util import (
     fontscale,
     pretty_bins,
 )
+from pyiem.reference import LATLON
+from pyiem.util import archive_fetch, load_geodf
 
 
 @pytest.mark.mpl_image_compare(tolerance=0.01, savefig_kwargs={"dpi": 200})
@@ -92,3 +106,110 @@ def test_none_fitbox():
 def test_none_drawlogo():
     """Test that nothing happens when we pass a None logo."""
     assert draw_logo(None, None) is None
+
+
+def test_load_base_layer(monkeypatch):
+    """Test that repeated loads of a base layer are cached."""
+    calls = []
+
+    def _reader(name, resolution, crs):
+        calls.append((name, resolution))
+        return load_geodf("conus").to_crs(crs)
+
+    monkeypatch.setattr(plot_util, "_read_natural_earth", _reader)
+    monkeypatch.setattr(plot_util, "_BASE_LAYER_CACHE", OrderedDict())
+    monkeypatch.setattr(plot_util, "BASE_LAYER_CACHE_SIZE", 2)
+    gp = GeoPanel(figure(), [0, 0, 1, 1], LATLON)
+    gp.set_extent([-94, -92, 41, 42])
+    df = plot_util.load_base_layer(gp, "land")
+    assert calls == [("land", "10m")]
+    assert plot_util.load_base_layer(gp, "land") is df
+    assert len(calls) == 1
+    assert not plot_util.load_base_layer(gp, "us_states").empty
+    # A different extent is a different entry, evicting the oldest
+    gp.set_extent([-130, -60, 20, 55])
+    plot_util.load_base_layer(gp, "land")
+    assert calls[-1] == ("land", "50m")
+    assert len(plot_util._BASE_LAYER_CACHE) == 2
+
+
+def test_polygon_paths():
+    """Test that we build the same paths as geopandas plotting."""
+    poly = Polygon(
+        [(0, 0), (4, 0), (4, 4), (0, 4)], [[(1, 1), (2, 1), (2, 2), (1, 2)]]
+    )
+    geoms = np.array([poly, MultiPolygon([poly, box(5, 5, 6, 6)])])
+    paths = plot_util._polygon_paths(geoms)
+    assert len(paths) == 2
+    # exterior and hole, then two more rings for the second polygon
+    assert (paths[0].codes == mpath.Path.MOVETO).sum() == 2
+    assert (paths[1].codes == mpath.Path.CLOSEPOLY).sum() == 3
+    assert paths[0].codes[-1] == mpath.Path.CLOSEPOLY
+
+
+def test_to_hex():
+    """Test the vectorized to_hex."""
+    rgba = np.array([[0.1, 0.5, 0.999, 1], [0, 0, 0, 0.5]])
+    assert list(plot_util._to_hex(rgba)) == [mpcolors.to_hex(c) for c in rgba]
+    assert len(plot_util._to_hex(np.empty((0, 4)))) == 0
+
+
+def test_label_index():
+    """Test the label collision spatial hash."""
+    index = plot_util.LabelIndex(cellsize=10)
+    assert index.overlap(0, 20, 0, 20, 1) == 0
+    index.add(0, 20, 0, 20, 2)
+    index.add(10, 30, 10, 30, 1)
+    index.add(5, 5, 0, 10, 1)
+    assert len(index) == 2
+    assert index.overlap(15, 25, 15, 25, 1) == 100
+    assert index.overlap(15, 25, 15, 25, 2) == 25
+    assert index.overlap(15, 25, 15, 25, 3) == 0
+    assert index.overlap(15, 25, 15, 25, 0) == 100
+    # Union of the two boxes within the query
+    assert index.overlap(0, 40, 0, 40, 1) == 400 + 400 - 100
+    assert index.overlap(0, 40, 0, 40, 1, limit=15) == 400
+
+
+def test_load_nexrad_composite(tmp_path, monkeypatch):
+    """Test loading and caching composites from a local archive."""
+    valid = datetime(2021, 2, 9, 17)
+    for minute in [0, 5]:
+        path = tmp_path / valid.strftime("%Y/%m/%d/GIS/uscomp")
+        path.mkdir(parents=True, exist_ok=True)
+        data = np.arange(200 * 300, dtype=np.uint8).reshape(200, 300)
+        img = Image.frombytes("P", (300, 200), data.tobytes())
+        img.putpalette(list(range(256)) * 3)
+        img.save(path / f"n0q_20210209170{minute}.png")
+        (path / f"n0q_20210209170{minute}.wld").write_text(
+            "0.01\n0.0\n0.0\n-0.01\n-126.005\n50.005\n"
+        )
+    monkeypatch.setattr(
+        plot_util, "archive_fetch", partial(archive_fetch, localdir=tmp_path)
+    )
+    monkeypatch.setattr(plot_util, "_NEXRAD_CACHE", OrderedDict())
+    monkeypatch.setattr(plot_util, "NEXRAD_CACHE_BYTES", 100_000)
+    im, affine = plot_util.load_nexrad_composite("N0Q", "us", valid)
+    np.testing.assert_array_equal(im, data)
+    assert not im.flags.writeable
+    assert affine.almost_equals(Affine(0.01, 0, -126.01, 0, -0.01, 50.0))
+    assert plot_util.load_nexrad_composite("N0Q", "us", valid)[0] is im
+    # The second composite pushes the first out of the cache
+    valid2 = valid.replace(minute=5)
+    assert plot_util.load_nexrad_composite("N0Q", "us", valid2) is not None
+    assert list(plot_util._NEXRAD_CACHE) == [("N0Q", "us", "202102091705")]
+
+
+def test_crop_raster():
+    """Test cropping a raster to a window."""
+    grid = np.arange(100 * 200).reshape(100, 200)
+    affine = Affine(0.1, 0, -100, 0, -0.1, 45)
+    bounds = (-94.95, 40.05, -90.05, 41.95)
+    cropped, caffine = plot_util.crop_raster(grid, affine, bounds)
+    # Two pixels of padding on each side
+    assert cropped.shape == (24, 54)
+    assert cropped[0, 0] == grid[28, 48]
+    assert caffine * (0, 0) == pytest.approx((-95.2, 42.2))
+    # Outside of the raster, nothing happens
+    res = plot_util.crop_raster(grid, affine, (0, 0, 1, 1))
+    assert res[0] is grid
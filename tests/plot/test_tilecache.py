@@ -0,0 +1,99 @@
+"""Test pyiem.plot.tilecache."""
+
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from pyiem.plot import _mpl, tilecache
+from pyiem.plot.tilecache import (
+    ChainedTileCache,
+    DiskTileCache,
+    MemcacheTileCache,
+    MemoryTileCache,
+    TileCache,
+)
+
+
+def _png(value) -> bytes:
+    """Generate a tiny tile."""
+    bio = BytesIO()
+    Image.fromarray(np.full((4, 4, 3), value, np.uint8)).save(bio, "PNG")
+    return bio.getvalue()
+
+
+def test_memory_lru():
+    """Test that the memory cache evicts the least recently used."""
+    cache = MemoryTileCache(maxbytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    assert cache.get("a") == b"1234"
+    cache.set("c", b"1234")
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    assert cache.nbytes == 8
+    cache.set("d", b"12345678901")
+    assert cache.get("d") is None
+
+
+def test_disk_lru(tmp_path):
+    """Test the disk cache bounds and persistence."""
+    cache = DiskTileCache(str(tmp_path), maxbytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.set("b", b"1234")
+    assert cache.nbytes == 8
+    assert cache.get("a") == b"1234"
+    cache.set("c", b"1234")
+    assert cache.get("b") is None
+    # A new instance finds what is there
+    cache2 = DiskTileCache(str(tmp_path), maxbytes=10)
+    assert cache2.nbytes == 8
+    assert cache2.get("c") == b"1234"
+
+
+def test_chained_backfill(tmp_path):
+    """Test that a hit from a slower cache fills the faster one."""
+    fast = MemoryTileCache()
+    slow = DiskTileCache(str(tmp_path))
+    slow.set("a", b"tile")
+    cache = ChainedTileCache([fast, slow])
+    assert cache.get("a") == b"tile"
+    assert fast.get("a") == b"tile"
+    assert cache.get("b") is None
+    cache.set("b", b"tile")
+    assert slow.get("b") == b"tile"
+
+
+def test_memcache_unavailable():
+    """Test that an unreachable memcached is skipped after failing."""
+    cache = MemcacheTileCache("localhost:1", timeout=0.1)
+    assert cache.get("a") is None
+    # This should not try again
+    assert cache._get_client() is None
+    cache.set("a", b"tile")
+
+
+def test_seeded_tiles(monkeypatch):
+    """Test fetching tiles from a seeded cache, without the network."""
+    cache = MemoryTileCache()
+    monkeypatch.setattr(tilecache, "_TILE_CACHE", {"cache": cache})
+    urls = [f"https://example.com/tile/{i}" for i in range(4)]
+    for i, url in enumerate(urls[:3]):
+        cache.set(url.split("//")[1], _png(i))
+    # Prevent any network access
+    monkeypatch.setattr(_mpl, "_get_http_client", lambda: None)
+    res = _mpl.fetch_tiles(urls)
+    for i in range(3):
+        assert res[i][0, 0, 0] == i
+    assert isinstance(res[3], Exception)
+    res = _mpl.fetch_tiles(urls[1:], workers=1)
+    assert res[0][0, 0, 0] == 1
+    assert isinstance(res[2], Exception)
+
+
+def test_uncached():
+    """Test that the base class caches nothing."""
+    cache = TileCache()
+    cache.set("a", b"tile")
+    assert cache.get("a") is None
@@ -7,6 +7,8 @@ import numpy as np
 import pytest
 
 from pyiem.database import (
+    execute_pipelined,
+    executemany_rowcounts,
     get_dbconn,
     get_dbconnc,
     get_dbconnstr,
@@ -111,6 +113,27 @@ def test_dumper_float32(dbcursor):
     assert dbcursor.fetchone()["merra_srad"] == 1.0
 
 
+@pytest.mark.parametrize("database", ["mesosite"])
+def test_rowcount_helpers(dbcursor):
+    """Test that we get rowcounts back for batched statements."""
+    dbcursor.execute("create temp table _t(a int)")
+    counts = executemany_rowcounts(
+        dbcursor,
+        "insert into _t select generate_series(1, %s)",
+        [(1,), (3,)],
+    )
+    assert counts == [1, 3]
+    assert executemany_rowcounts(dbcursor, "select 1", []) == []
+    counts = execute_pipelined(
+        dbcursor,
+        [
+            ("update _t set a = a where a = %s", (1,)),
+            ("delete from _t where a > %s", (5,)),
+        ],
+    )
+    assert counts == [2, 0]
+
+
 def test_get_dbconn_for_user(monkeypatch):
     """Test this works."""
     for ins, outs in zip(
@@ -19,3 +19,10 @@ def test_find_ij():
     i, j = era5land.find_ij(lon, lat)
     assert abs(lon - era5land.DOMAINS["conus"]["XAXIS"][i]) < 0.01
     assert abs(lat - era5land.DOMAINS["conus"]["YAXIS"][j]) < 0.01
+
+
+def test_find_ij_many():
+    """Test that we can find many grid cells at once."""
+    i, j, inbounds = era5land.find_ij_many([-94.5, -94.5], [41.5, -41.5])
+    assert inbounds.tolist() == [True, False]
+    assert (i[0], j[0]) == era5land.find_ij(-94.5, 41.5)
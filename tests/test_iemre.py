@@ -5,7 +5,9 @@ from zoneinfo import ZoneInfo
 
 import numpy as np
 import pygrib
+import pytest
 from affine import Affine
+from rasterio.warp import Resampling
 
 from pyiem import database, iemre
 from pyiem.grid.nav import get_nav
@@ -91,6 +93,39 @@ def test_reproject_epsg26915_iowa_to_iemre():
     assert res.mask[j, i]
 
 
+def test_reproject_plan():
+    """Test that a cached reprojection plan matches rasterio."""
+    affine_in = Affine(0.2, 0.0, -126.0, 0.0, -0.2, 50.0)
+    crs_in = {"init": "epsg:4326"}
+    grid = np.random.default_rng(0).random((100, 400))
+    res0 = iemre.reproject2iemre(grid, affine_in, crs_in)
+    res1 = iemre.reproject2iemre(grid, affine_in, crs_in, use_plan=True)
+    np.testing.assert_array_equal(res0.mask, res1.mask)
+    np.testing.assert_allclose(res0, res1)
+    hits = iemre._get_reprojection_plan.cache_info().hits
+    iemre.reproject2iemre(grid * 2, affine_in, crs_in, use_plan=True)
+    assert iemre._get_reprojection_plan.cache_info().hits == hits + 1
+
+
+def test_reproject_plan_stage4():
+    """Test the plan against rasterio for a projected source grid."""
+    nav = get_nav("stage4", None)
+    grid = np.random.default_rng(0).random((nav.ny, nav.nx))
+    res0 = iemre.reproject2iemre(grid, nav.affine, nav.crs)
+    res1 = iemre.reproject2iemre(grid, nav.affine, nav.crs, use_plan=True)
+    # GDAL approximates the transform, so a few cells pick a neighbor
+    assert (res0.mask != res1.mask).mean() < 0.001
+    assert np.ma.mean(res0 != res1) < 0.05
+    # Bilinear is not planned
+    res0 = iemre.reproject2iemre(
+        grid, nav.affine, nav.crs, Resampling.bilinear
+    )
+    res1 = iemre.reproject2iemre(
+        grid, nav.affine, nav.crs, Resampling.bilinear, use_plan=True
+    )
+    np.testing.assert_array_equal(res0, res1)
+
+
 def test_reproject():
     """Test the iemre.reproject2iemre."""
     affine_in = Affine(0.2, 0.0, -126.0, 0.0, -0.2, 50.0)
@@ -139,7 +174,80 @@ def test_get_grids_no_domain():
     assert iemre.get_grids(valid, varnames=["high_tmpk"])
 
 
-def test_writing_grids():
+def test_get_grids_range():
+    """Test fetching a range of grids, which crosses a year."""
+    sts = datetime.date(2020, 12, 30)
+    ets = datetime.date(2021, 1, 2)
+    ds = iemre.get_grids_range(sts, ets, varnames="high_tmpk")
+    assert ds["high_tmpk"].shape == (4, iemre.NY, iemre.NX)
+    ds2 = iemre.get_grids(ets, varnames="high_tmpk")
+    np.testing.assert_allclose(
+        ds["high_tmpk"].values[-1], ds2["high_tmpk"].values
+    )
+
+
+def test_copy_payload():
+    """Test the binary COPY stream that bulk set_grids writes."""
+    high = np.array([[1.5, np.nan], [3.0, 4.0]], dtype="f4")
+    buf = iemre._copy_payload([high, np.arange(4).reshape(2, 2)])
+    assert buf.startswith(b"PGCOPY\n\xff\r\n\x00")
+    assert buf.endswith(b"\xff\xff")
+    # 19 byte header, 2 byte field count, then three length prefixed fields
+    assert len(buf) == 19 + 4 * (2 + 8 + 12 * 2) + 2
+    rows = np.frombuffer(
+        buf[19:-2],
+        dtype=[
+            ("nfields", ">i2"),
+            ("gidlen", ">i4"),
+            ("gid", ">i4"),
+            ("l0", ">i4"),
+            ("v0", ">f8"),
+            ("l1", ">i4"),
+            ("v1", ">f8"),
+        ],
+    )
+    np.testing.assert_equal(rows["gid"], [0, 1, 2, 3])
+    np.testing.assert_equal(rows["v0"], [1.5, np.nan, 3.0, 4.0])
+    np.testing.assert_equal(rows["v1"], [0, 1, 2, 3])
+
+
+def test_get_grids_range_columns(monkeypatch):
+    """Test that only the columns found within all tables are fetched."""
+    columns = {
+        "iemre_daily_2020": ["high_tmpk", "p01d"],
+        "iemre_daily_2021": ["p01d", "low_tmpk", "high_tmpk"],
+        "iemre_daily_2022": [],
+    }
+    monkeypatch.setattr(
+        iemre, "_get_table_columns", lambda _cursor, table: columns[table]
+    )
+    calls = []
+
+    def _copy_columns(_cursor, query, params, ncols):
+        """Return one row for each table."""
+        calls.append(len(params) // 4)
+        rows = np.zeros(
+            2,
+            dtype=[("gid", "i4"), ("tidx", "i4"), ("v0", "f8"), ("v1", "f8")],
+        )
+        rows["tidx"] = [0, 3]
+        rows["v1"] = 1
+        return rows
+
+    monkeypatch.setattr(iemre, "_copy_columns", _copy_columns)
+    ds = iemre.get_grids_range(
+        datetime.date(2020, 12, 30),
+        datetime.date(2022, 1, 1),
+        cursor=object(),
+    )
+    assert list(ds.data_vars) == ["high_tmpk", "p01d"]
+    # The table that does not exist is not unioned
+    assert calls == [2]
+    assert ds["p01d"].values[3, 0, 0] == 1
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_writing_grids(bulk):
     """Test letting the API write data from the future."""
     domain = "china"
     pgconn = database.get_dbconn(iemre.d2l(domain))
@@ -149,9 +257,14 @@ def test_writing_grids():
     # Set a sentinel value to see if it approximately round-trips
     sentinel = 251
     ds["high_tmpk"].values[140, 130] = sentinel
-    iemre.set_grids(valid, ds, domain=domain)
+    iemre.set_grids(valid, ds, domain=domain, bulk=bulk)
     ds = iemre.get_grids(valid, varnames=["high_tmpk"], domain=domain)
     assert abs(ds["high_tmpk"].values[140, 130] - sentinel) < 0.1
+    # Second write exercises the update path
+    ds["high_tmpk"].values[140, 130] = sentinel + 1
+    iemre.set_grids(valid, ds, domain=domain, bulk=bulk)
+    ds = iemre.get_grids(valid, varnames=["high_tmpk"], domain=domain)
+    assert abs(ds["high_tmpk"].values[140, 130] - sentinel - 1) < 0.1
     assert ds["high_tmpk"].lat[0] > 0
     # Cleanup after ourself
     cursor.execute(
@@ -173,6 +286,18 @@ def test_simple():
     assert j == 0
 
 
+def test_find_ij_many():
+    """Test the vectorized find_ij."""
+    lons = np.array([iemre.WEST, iemre.EAST_EDGE, -93.62])
+    lats = np.array([iemre.SOUTH, iemre.NORTH_EDGE, 42.02])
+    i, j, inbounds = iemre.find_ij_many(lons, lats)
+    assert inbounds.tolist() == [True, False, True]
+    assert (i[0], j[0]) == (0, 0)
+    assert (i[2], j[2]) == iemre.find_ij(-93.62, 42.02)
+    _i, _j, inbounds = iemre.find_ij_many(lons, lats, domain="china")
+    assert not inbounds.any()
+
+
 def test_hourly_offset():
     """Compute the offsets"""
     ts = utc(2013, 1, 1, 0, 0)
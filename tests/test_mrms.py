@@ -4,6 +4,7 @@ import datetime
 import os
 
 import httpx
+import numpy as np
 import pytest
 from pytest_httpx import HTTPXMock
 
@@ -14,6 +15,13 @@ PRODUCT = "PrecipRate"
 CENTERS = ["mtarchive", "", "bldr", "cprk"]
 
 
+def test_find_ij_many():
+    """Test the vectorized find_ij function."""
+    i, j, inbounds = mrms.find_ij_many([-42.0, -95.0], [95.0, 42.0])
+    assert inbounds.tolist() == [False, True]
+    assert (i[1], j[1]) == mrms.find_ij(-95.0, 42.0)
+
+
 def test_find_ij():
     """Test the find_ij function."""
     i, j = mrms.find_ij(-42.0, 95.0)
@@ -112,3 +120,20 @@ def test_reader():
     )
     metadata, _ = mrms.reader(fn)
     assert abs(metadata["ul_lat"] - 54.99) < 0.01
+
+
+def test_reader_bounds():
+    """Test reading a window of the legacy file."""
+    fn = (
+        f"{os.path.dirname(__file__)}/../data/product_examples/"
+        "1hrad.20130920.190000.gz"
+    )
+    _, full = mrms.reader(fn)
+    metadata, data = mrms.reader(
+        fn, dtype=np.float32, bounds=[-100, 40, -98, 44]
+    )
+    assert data.dtype == np.float32
+    assert data.shape == (400, 200)
+    assert abs(metadata["ul_lon"] - -100) < 0.001
+    assert abs(metadata["ll_lat"] - 40) < 0.001
+    np.testing.assert_allclose(data, full[1100:1500, 3000:3200])
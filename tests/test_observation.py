@@ -273,3 +273,37 @@ def test_which_table():
     assert f(datetime.date(2019, 1, 1)) == "summary"
     assert f(datetime.datetime(2019, 1, 1)) == "summary"
     assert f(datetime.date(2019, 4, 1)) == "summary_2019"
+
+
+def test_writer(iemob):
+    """Test the batch writer."""
+    writer = observation.ObservationWriter()
+    iemob.ob.data["tmpf"] = 55
+    writer.add(iemob.ob)
+    # A new summary day that needs an insert
+    ob = observation.Observation(
+        iemob.ob.data["station"], "FAKE", utc(2015, 9, 2, 1)
+    )
+    ob.data["tmpf"] = 60
+    writer.add(ob)
+    # Unknown station
+    writer.add(observation.Observation("HaHaHa", "FAKE", utc(2015, 9, 1)))
+    # Too far into the future
+    tomorrow = datetime.date.today() + datetime.timedelta(days=2)
+    writer.add(
+        observation.Observation(
+            iemob.ob.data["station"],
+            "FAKE",
+            utc(tomorrow.year, tomorrow.month, tomorrow.day, 12),
+        )
+    )
+    assert len(writer) == 4
+    assert writer.flush(iemob.cursor) == [True, True, False, False]
+    assert not writer
+    assert writer.stations
+    iemob.cursor.execute(
+        "SELECT day, max_tmpf from summary_2015 WHERE iemid = %s "
+        "ORDER by day ASC",
+        (iemob.iemid,),
+    )
+    assert [row["max_tmpf"] for row in iemob.cursor.fetchall()] == [55, 60]
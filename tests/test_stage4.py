@@ -40,3 +40,11 @@ def test_find_ij():
     i, j = stage4.find_ij(-119.07, 23.06)
     assert i is None
     assert j is None
+
+
+def test_find_ij_many():
+    """Test the vectorized find_ij function."""
+    i, j, inbounds = stage4.find_ij_many([-119.02, -119.07], [23.117, 23.06])
+    assert inbounds.tolist() == [True, False]
+    assert i[0] == 0
+    assert j[0] == 0
@@ -71,6 +71,23 @@ def test_archive_fetch_head():
         assert ctx == ""
 
 
+def test_archive_fetch_baseurl():
+    """Test that we fetch from the provided website location."""
+    with (
+        mock.patch.object(util.httpx, "request") as request,
+        util.archive_fetch(
+            "/2024/02/09/mesonet_1200.gif",
+            localdir="/nonexistent",
+            method="head",
+            baseurl="https://example.com/data",
+        ) as ctx,
+    ):
+        assert ctx == ""
+    assert request.call_args[0][1] == (
+        "https://example.com/data/2024/02/09/mesonet_1200.gif"
+    )
+
+
 def test_archive_fetch_remote_exists():
     """Test what happens when the remote file does exist."""
     with util.archive_fetch("2024/02/09/mesonet_1200.gif") as ctx:
@@ -395,3 +412,16 @@ def test_drct2text():
     # A hack to get move coverage
     for i in range(360):
         util.drct2text(i)
+
+
+def test_pool_imap():
+    """Test that the futures are yielded in order."""
+    res = [f.result() for f in util.pool_imap(abs, range(0, -20, -1), 2)]
+    assert res == list(range(20))
+    futures = util.pool_imap(int, ["1", "a"], 2, max_pending=1)
+    assert next(futures).result() == 1
+    assert isinstance(next(futures).exception(), ValueError)
+    # Stopping early does not finish the rest
+    futures = util.pool_imap(abs, range(1000), 2, max_pending=2)
+    assert next(futures).result() == 0
+    futures.close()
@@ -1,10 +1,36 @@
 """Test pyiem.wmo module."""
 
+import pytest
+
+from pyiem.exceptions import TextProductException
 from pyiem.util import get_test_file
-from pyiem.wmo import WMOProduct
+from pyiem.wmo import WMOProduct, _nth_line, parse_header
 
 
 def test_nullbyte():
     """Test the removal of a product that has a null byte."""
     prod = WMOProduct(get_test_file("METAR/nullbyte.txt"))
     assert "\x00" not in prod.unixtext
+
+
+def test_parse_header():
+    """Test that the header only parse agrees with WMOProduct."""
+    for fn in ["AFDPQ.txt", "METAR/nullbyte.txt", "TCPAT1.txt"]:
+        text = get_test_file(fn)
+        prod = WMOProduct(text)
+        assert parse_header(text) == (prod.source, prod.afos)
+
+
+def test_truncated_header():
+    """Test that a product without a WMO header line raises."""
+    with pytest.raises(TextProductException):
+        WMOProduct("\001\r\r\n241 \r\r\n")
+
+
+def test_nth_line():
+    """Test the line lookup that avoids splitting the text."""
+    text = "000 \nSXUS50 KWBC 011200\nAFDDMX\n"
+    assert _nth_line(text, 2) == "AFDDMX"
+    assert _nth_line(text, 3) == ""
+    assert _nth_line(text, 9) == ""
+    assert _nth_line(text, 0, 5, 11) == "SXUS50"
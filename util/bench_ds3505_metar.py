@@ -0,0 +1,76 @@
+"""Benchmark METAR generation throughput for DS3505 (ISD) records.
+
+A serial `gen_metar` loop over `parser` records is compared with
+`gen_metar_many` over the same records and over the `read_file` columns,
+using copies of the bundled example file.
+"""
+
+import logging
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from pyiem.ncei import ds3505
+from pyiem.util import get_test_filepath, logger
+
+LOG = logger(level=logging.INFO)
+COPIES = 20
+
+
+def serial(records):
+    """The previous way, one record at a time."""
+    res = []
+    for data in records:
+        ds3505.gen_metar(data)
+        res.append(data["metar"])
+    return res
+
+
+def timed(func, *args, **kwargs):
+    """Return the result and the seconds taken."""
+    sts = time.perf_counter()
+    res = func(*args, **kwargs)
+    return res, time.perf_counter() - sts
+
+
+def main():
+    """Go Main Go."""
+    with open(get_test_filepath("NCEI/DS3505.txt"), "rb") as fh:
+        content = fh.read()
+    with tempfile.NamedTemporaryFile(delete=False) as tmp:
+        tmp.write(content * COPIES)
+    with open(tmp.name, "rb") as fh:
+        records = [
+            ds3505.parser(line.decode("ascii").strip(), "ENJA") for line in fh
+        ]
+    df = pd.concat(
+        ds3505.read_file(tmp.name, "ENJA", codes=ds3505.METAR_CODES),
+        ignore_index=True,
+    )
+    os.unlink(tmp.name)
+    expected, elapsed = timed(serial, [dict(r) for r in records])
+    LOG.info(
+        "%s records serial gen_metar: %.2fs %.0f/s",
+        len(records),
+        elapsed,
+        len(records) / elapsed,
+    )
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        for label, data in [("records", records), ("columns", df)]:
+            res, elapsed = timed(
+                ds3505.gen_metar_many, data, workers=workers, chunksize=2000
+            )
+            LOG.info(
+                "gen_metar_many %-7s workers: %2s %.2fs %.0f/s same: %s",
+                label,
+                workers,
+                elapsed,
+                len(res) / elapsed,
+                res == expected,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark reading a DS3505 (ISD) file into pandas.
+
+The per line `parser` building a DataFrame from its dicts is compared with
+the vectorized `read_file`, over copies of the bundled example file.
+"""
+
+import logging
+import os
+import tempfile
+import timeit
+
+import pandas as pd
+
+from pyiem.ncei import ds3505
+from pyiem.util import get_test_filepath, logger
+
+LOG = logger(level=logging.INFO)
+CODES = ["AA1", "GF1", "MD1", "MW1"]
+
+
+def legacy(filename):
+    """Parse each line and then build the DataFrame."""
+    rows = []
+    with open(filename, "rb") as fh:
+        for line in fh:
+            data = ds3505.parser(line.decode("ascii").strip(), "ENJA")
+            if data is not None:
+                rows.append(data)
+    return pd.DataFrame(rows)
+
+
+def bulk(filename, codes=None):
+    """Read the file with the vectorized reader."""
+    return pd.concat(
+        ds3505.read_file(filename, "ENJA", codes=codes), ignore_index=True
+    )
+
+
+def main():
+    """Go Main Go."""
+    with open(get_test_filepath("NCEI/DS3505.txt"), "rb") as fh:
+        content = fh.read()
+    for copies in [1, 10, 50]:
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            tmp.write(content * copies)
+        res0 = legacy(tmp.name)
+        res1 = bulk(tmp.name)
+        same = res0["airtemp_c"].equals(res1["airtemp_c"]) and res0[
+            "valid"
+        ].equals(res1["valid"])
+        time0 = min(
+            timeit.repeat(lambda: legacy(tmp.name), number=1, repeat=3)
+        )
+        time1 = min(timeit.repeat(lambda: bulk(tmp.name), number=1, repeat=3))
+        time2 = min(
+            timeit.repeat(lambda: bulk(tmp.name, CODES), number=1, repeat=3)
+        )
+        LOG.info(
+            "%7s lines parser: %6.3fs read_file: %6.3fs (%5.1fx) "
+            "with %s codes: %6.3fs (%5.1fx) same: %s",
+            len(res0.index),
+            time0,
+            time1,
+            time0 / time1,
+            len(CODES),
+            time2,
+            time0 / time2,
+            same,
+        )
+        os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark writing IGRA soundings to the raob database.
+
+The per level INSERTs of `Sounding.sql` are compared with the COPY of
+`sql_many`, over copies of the bundled soundings shifted in time.  All is
+done within a transaction that is rolled back.
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from pyiem.database import get_dbconnc
+from pyiem.ncei import igra
+from pyiem.util import get_test_filepath, logger
+
+LOG = logger(name="bench_igra_sql", level=logging.INFO)
+COPIES = 200
+
+
+def build_soundings(offset: int) -> list:
+    """Build copies of the bundled soundings with unique valid times."""
+    base = list(igra.process_ytd(get_test_filepath("IGRA/OAX_ytd.txt")))
+    res = []
+    for i in range(COPIES):
+        for sounding in base:
+            header = sounding.model.header.model_copy(
+                update={
+                    "valid": sounding.model.header.valid
+                    + timedelta(hours=offset + 24 * i)
+                }
+            )
+            res.append(igra.Sounding(header, sounding.model.records))
+    return res
+
+
+def main():
+    """Go Main Go."""
+    pgconn, cursor = get_dbconnc("raob")
+    # Keep the library logging of each sounding out of the timing
+    logging.getLogger("pyiem").setLevel(logging.WARNING)
+    try:
+        for label, offset in [("sql", 1), ("sql_many", 2)]:
+            soundings = build_soundings(offset)
+            levels = sum(len(s.model.records) for s in soundings)
+            sts = time.perf_counter()
+            if label == "sql":
+                for sounding in soundings:
+                    sounding.sql(cursor)
+            else:
+                igra.sql_many(cursor, soundings)
+            elapsed = time.perf_counter() - sts
+            LOG.info(
+                "%-8s %s soundings %s levels %.2fs %.0f rows/s",
+                label,
+                len(soundings),
+                levels,
+                elapsed,
+                levels / elapsed,
+            )
+    finally:
+        pgconn.rollback()
+        pgconn.close()
+
+
+if __name__ == "__main__":
+    main()
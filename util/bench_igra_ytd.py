@@ -0,0 +1,75 @@
+"""Benchmark reading an IGRA yearly file with `process_ytd`.
+
+The previous line by line splitting of the file is compared with the
+memory mapped splitting, the record arrays and a pool of workers, over a
+file of the bundled soundings repeated.
+"""
+
+import logging
+import os
+import tempfile
+import time
+from io import StringIO
+
+from pyiem.ncei import igra
+from pyiem.util import get_test_filepath, logger
+
+LOG = logger(name="bench_igra_ytd", level=logging.INFO)
+COPIES = 500
+
+
+def legacy_process_ytd(filename: str):
+    """The previous implementation."""
+    sio = None
+    with open(filename) as fh:
+        for line in fh:
+            if line.strip() == "":
+                continue
+            if line.startswith("#"):
+                if sio is not None:
+                    yield igra.process_sounding(sio.getvalue())
+                sio = StringIO()
+            sio.write(line)
+    if sio is not None:
+        yield igra.process_sounding(sio.getvalue())
+
+
+def main():
+    """Go Main Go."""
+    with open(get_test_filepath("IGRA/OAX_ytd.txt")) as fh:
+        text = fh.read()
+    # Keep the library logging of invalid records out of the timing
+    logging.getLogger("pyiem").setLevel(logging.WARNING)
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as fh:
+        fh.write(text * COPIES)
+    try:
+        cpus = os.cpu_count() or 1
+        for label, func in [
+            ("legacy", legacy_process_ytd),
+            ("process_ytd", igra.process_ytd),
+            ("as_array", lambda fn: igra.process_ytd(fn, as_array=True)),
+            (
+                f"workers={cpus}",
+                lambda fn: igra.process_ytd(fn, workers=cpus),
+            ),
+            (
+                f"as_array workers={cpus}",
+                lambda fn: igra.process_ytd(fn, workers=cpus, as_array=True),
+            ),
+        ]:
+            sts = time.perf_counter()
+            count = sum(1 for _ in func(fh.name))
+            elapsed = time.perf_counter() - sts
+            LOG.info(
+                "%-24s %s soundings %.2fs %.0f soundings/s",
+                label,
+                count,
+                elapsed,
+                count / elapsed,
+            )
+    finally:
+        os.unlink(fh.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark the plot_values label culling.
+
+The previous figure sized pixel mask is compared with the LabelIndex
+spatial hash over random label boxes, like those plot_values computes for
+a figure full of station labels.
+"""
+
+import logging
+import timeit
+
+import numpy as np
+
+from pyiem.plot.util import LabelIndex
+from pyiem.util import logger
+
+LOG = logger(level=logging.INFO)
+
+
+def random_boxes(count, width, height, seed=0):
+    """Generate label boxes similar to what plot_values buffers."""
+    rng = np.random.default_rng(seed)
+    x0 = rng.integers(0, width, count)
+    y0 = rng.integers(0, height, count)
+    # Three to six characters of about 8 pixels, plus a 5 pixel buffer
+    x1 = np.minimum(width, x0 + rng.integers(3, 7, count) * 8 + 10)
+    y1 = np.minimum(height, y0 + 17 + 8)
+    zorder = rng.integers(1, 4, count)
+    return list(zip(x0, x1, y0, y1, zorder, strict=True))
+
+
+def pixel_mask(boxes, width, height):
+    """The previous implementation."""
+    textmask = np.zeros((width, height), np.int8)
+    placed = []
+    for x0, x1, y0, y1, zorder in boxes:
+        _cnt = np.sum(textmask[x0:x1, y0:y1] >= zorder)
+        if _cnt > 15:
+            continue
+        textmask[x0:x1, y0:y1] = np.where(
+            textmask[x0:x1, y0:y1] < zorder, zorder, textmask[x0:x1, y0:y1]
+        )
+        placed.append((x0, y0))
+    return placed
+
+
+def label_index(boxes, _width, _height):
+    """The spatial hash implementation."""
+    index = LabelIndex()
+    placed = []
+    for x0, x1, y0, y1, zorder in boxes:
+        if index.overlap(x0, x1, y0, y1, zorder, 15) > 15:
+            continue
+        index.add(x0, x1, y0, y1, zorder)
+        placed.append((x0, y0))
+    return placed
+
+
+def main():
+    """Go Main Go."""
+    for width, height in [(1024, 768), (2048, 1536)]:
+        for count in [1_000, 10_000, 50_000]:
+            boxes = random_boxes(count, width, height)
+            res0 = pixel_mask(boxes, width, height)
+            res1 = label_index(boxes, width, height)
+            time0 = min(
+                timeit.repeat(
+                    lambda b=boxes, w=width, h=height: pixel_mask(b, w, h),
+                    number=1,
+                    repeat=3,
+                )
+            )
+            time1 = min(
+                timeit.repeat(
+                    lambda b=boxes, w=width, h=height: label_index(b, w, h),
+                    number=1,
+                    repeat=3,
+                )
+            )
+            LOG.info(
+                "%sx%s candidates: %6s placed: %5s mask: %7.1fms "
+                "index: %6.1fms speedup: %4.1fx same: %s",
+                width,
+                height,
+                count,
+                len(res1),
+                time0 * 1000.0,
+                time1 * 1000.0,
+                time0 / time1,
+                res0 == res1,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Benchmark polygon_fill for a CONUS county fill.
+
+The previous per row implementation is kept here to compare against.  A
+minimal stand-in for MapPlot is used, so that only the fill is timed.
+"""
+
+import logging
+import timeit
+from io import BytesIO
+
+import matplotlib.colors as mpcolors
+import numpy as np
+import pandas as pd
+
+from pyiem.plot._mpl import GeoPanel
+from pyiem.plot.colormaps import stretch_cmap
+from pyiem.plot.geoplot import MAIN_AX_BOUNDS
+from pyiem.plot.use_agg import figure
+from pyiem.plot.util import polygon_fill
+from pyiem.reference import EPSG
+from pyiem.util import load_geodf, logger
+
+LOG = logger(level=logging.INFO)
+
+
+class FillTarget:
+    """Just enough of a MapPlot for polygon_fill."""
+
+    def __init__(self):
+        """Build a CONUS panel."""
+        self.fig = figure(figsize=(10.24, 7.68), dpi=100)
+        gp = GeoPanel(self.fig, MAIN_AX_BOUNDS, EPSG[5070])
+        gp.set_extent([-125, -66, 22, 50])
+        # geopandas may label the axes, which is not what we are comparing
+        gp.ax.set_axis_off()
+        self.panels = [gp]
+        self.labels = None
+
+    def plot_values(self, lons, lats, vals, **kwargs):
+        """Keep the labels around for comparison."""
+        self.labels = (list(lons), list(lats), list(vals))
+
+    def draw_colorbar(self, *args, **kwargs):
+        """Not timed."""
+
+
+def legacy_polygon_fill(mymap, geodf, data, **kwargs):
+    """The previous implementation, computing things one row at a time."""
+    bins = kwargs.get("bins", np.arange(0, 101, 10))
+    cmap = stretch_cmap(kwargs.get("cmap"), bins, extend=kwargs.get("extend"))
+    norm = mpcolors.BoundaryNorm(bins, cmap.N)
+    lblformat = kwargs.get("lblformat", "%s")
+    to_label = {"x": [], "y": [], "vals": []}
+    geodf["val"] = pd.Series(data)
+    geodf = geodf.sort_values("val", na_position="first")
+    for gp in mymap.panels:
+        native = geodf.to_crs(gp.crs).cx[
+            slice(*gp.get_xlim()), slice(*gp.get_ylim())
+        ]
+        native = native.copy()
+        native["fc"] = "white"
+        native["ec"] = "k"
+        for idx, row in native.iterrows():
+            lbl = "-" if pd.isna(row["val"]) else lblformat % (row["val"],)
+            native.at[idx, "fc"] = (
+                "white"
+                if pd.isna(row["val"])
+                else mpcolors.to_hex(cmap(norm([row["val"]]))[0])
+            )
+            if kwargs.get("ilabel", False):
+                mx = row.get("lon", native.at[idx, "geom"].centroid.x)
+                my = row.get("lat", native.at[idx, "geom"].centroid.y)
+                to_label["x"].append(mx)
+                to_label["y"].append(my)
+                to_label["vals"].append(lbl)
+        native.plot(
+            ax=gp.ax,
+            fc=native["fc"].values,
+            ec=native["ec"].values,
+            aspect=None,
+            zorder=3,
+            lw=0.1,
+        )
+    mymap.plot_values(to_label["x"], to_label["y"], to_label["vals"])
+
+
+def render(func, geodf, data, **kwargs):
+    """Fill and return the target along with the rendered image."""
+    mymap = FillTarget()
+    func(mymap, geodf.copy(), data, **kwargs)
+    buf = BytesIO()
+    mymap.fig.savefig(buf, format="png")
+    return mymap, buf.getvalue()
+
+
+def best_time(func, geodf, data, **kwargs) -> float:
+    """Return the best per call time in seconds, without rendering."""
+    return min(
+        timeit.repeat(
+            lambda: func(FillTarget(), geodf.copy(), data, **kwargs),
+            number=1,
+            repeat=3,
+        )
+    )
+
+
+def main():
+    """Go Main Go."""
+    geodf = load_geodf("ugcs_county", 5070)
+    # The previous implementation could not label duplicated UGCs
+    geodf = geodf[~geodf.index.duplicated()]
+    rng = np.random.default_rng(0)
+    data = dict(
+        zip(geodf.index, rng.uniform(0, 100, len(geodf.index)), strict=True)
+    )
+    baseline = best_time(lambda *_args, **_kw: None, geodf, data)
+    for ilabel in [False, True]:
+        map0, png0 = render(legacy_polygon_fill, geodf, data, ilabel=ilabel)
+        map1, png1 = render(
+            polygon_fill, geodf, data, ilabel=ilabel, draw_colorbar=False
+        )
+        time0 = best_time(legacy_polygon_fill, geodf, data, ilabel=ilabel)
+        time1 = best_time(
+            polygon_fill, geodf, data, ilabel=ilabel, draw_colorbar=False
+        )
+        LOG.info(
+            "%s counties ilabel: %s old: %.3fs new: %.3fs speedup: %.1fx "
+            "same labels: %s same image: %s",
+            len(geodf.index),
+            ilabel,
+            time0 - baseline,
+            time1 - baseline,
+            (time0 - baseline) / (time1 - baseline),
+            map0.labels == map1.labels,
+            png0 == png1,
+        )
+
+
+if __name__ == "__main__":
+    main()
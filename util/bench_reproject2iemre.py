@@ -0,0 +1,66 @@
+"""Benchmark nearest reproject2iemre with and without a cached plan."""
+
+import logging
+import timeit
+
+import numpy as np
+from rasterio.warp import Resampling
+
+from pyiem import era5land, iemre, mrms, stage4
+from pyiem.util import logger
+
+LOG = logger(level=logging.INFO)
+
+
+def timeit_reproject(grid, affine, crs, resampling, use_plan):
+    """Return the result and the best per call time in seconds."""
+    # warm up, which populates the plan cache that we want to measure
+    res = iemre.reproject2iemre(
+        grid, affine, crs, resampling, "conus", use_plan
+    )
+    best = min(
+        timeit.repeat(
+            lambda: iemre.reproject2iemre(
+                grid, affine, crs, resampling, "conus", use_plan
+            ),
+            number=10,
+            repeat=3,
+        )
+    )
+    return res, best / 10.0
+
+
+def main():
+    """Go Main Go."""
+    rng = np.random.default_rng(0)
+    meta = era5land.DOMAINS["conus"]
+    for label, shape, affine, crs in [
+        ("STAGE4", (stage4.NY, stage4.NX), stage4.AFFINE, stage4.PROJPARMS),
+        ("MRMS", (mrms.NY, mrms.NX), mrms.AFFINE, "EPSG:4326"),
+        (
+            "ERA5LAND",
+            (meta["NY"], meta["NX"]),
+            meta["AFFINE_NC"],
+            "EPSG:4326",
+        ),
+    ]:
+        grid = rng.random(shape)
+        res0, time0 = timeit_reproject(
+            grid, affine, crs, Resampling.nearest, False
+        )
+        res1, time1 = timeit_reproject(
+            grid, affine, crs, Resampling.nearest, True
+        )
+        LOG.info(
+            "%s rasterio: %.1fms plan: %.1fms speedup: %.1fx "
+            "cells differing: %.2f%%",
+            label,
+            time0 * 1000.0,
+            time1 * 1000.0,
+            time0 / time1,
+            np.ma.mean(res1 != res0) * 100.0,
+        )
+
+
+if __name__ == "__main__":
+    main()
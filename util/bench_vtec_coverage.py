@@ -0,0 +1,127 @@
+"""Benchmark the VTECProduct.sql UGC coverage check.
+
+The database status dataframe is synthesized from the product itself, so
+that no database is needed.  Each covered UGC gets a row along with one
+extra row per VTEC that the product does not cover.
+"""
+
+import glob
+import logging
+import os
+import timeit
+
+import pandas as pd
+
+from pyiem.nws.products._vtec_util import _coverage_keys, _find_missed_ugcs
+from pyiem.nws.products.vtec import parser
+from pyiem.util import logger
+
+LOG = logger(level=logging.INFO)
+EXAMPLES = os.path.join(
+    os.path.dirname(__file__), "..", "data", "product_examples"
+)
+
+
+def build_dbdf(prod) -> pd.DataFrame:
+    """Generate what _load_database_status could have returned."""
+    rows = []
+    for _seg, ugcs, vtec in prod.suv_iter():
+        if not ugcs:
+            continue
+        vtec.year = prod.valid.year
+        # One UGC the product does not cover
+        codes = [str(u) for u in ugcs] + [f"{ugcs[0].state}Z999"]
+        rows.extend(
+            {
+                "ugc": code,
+                "status": "NEW",
+                "year": vtec.year,
+                "phenomena": vtec.phenomena,
+                "significance": vtec.significance,
+                "etn": vtec.etn,
+            }
+            for code in codes
+        )
+    return pd.DataFrame(rows)
+
+
+def loc_masks(prod, dbdf):
+    """The previous implementation, O(segments x ugcs x rows)."""
+    dbdf["missed"] = True
+    for seg, _ugcs, vtec in prod.suv_iter():
+        for ugc in seg.ugcs:
+            dbdf.loc[
+                (dbdf["ugc"] == str(ugc))
+                & (dbdf["phenomena"] == vtec.phenomena)
+                & (dbdf["significance"] == vtec.significance)
+                & (dbdf["etn"] == vtec.etn)
+                & (dbdf["year"] == vtec.year),
+                "missed",
+            ] = False
+    return dbdf[dbdf["missed"]]
+
+
+def keyed_set(prod, dbdf):
+    """The keyed set implementation."""
+    covered = set()
+    for seg, _ugcs, vtec in prod.suv_iter():
+        covered.update(_coverage_keys(seg, vtec))
+    return _find_missed_ugcs(dbdf, covered)
+
+
+def best_time(func, prod, dbdf) -> float:
+    """Return the best per call time in seconds."""
+    return (
+        min(timeit.repeat(lambda: func(prod, dbdf.copy()), number=3, repeat=3))
+        / 3.0
+    )
+
+
+def main():
+    """Go Main Go."""
+    prods = []
+    for fn in glob.glob(f"{EXAMPLES}/**/*.txt", recursive=True):
+        with open(fn, "rb") as fh:
+            text = fh.read().decode("ascii", "ignore")
+        if text.find("/O.") == -1:
+            continue
+        try:
+            prod = parser(text, ugc_provider={})
+        except Exception:  # noqa
+            continue
+        size = sum(len(s.ugcs) * len(s.vtec) for s in prod.segments)
+        prods.append((size, os.path.relpath(fn, EXAMPLES), prod))
+    prods.sort(key=lambda x: x[0], reverse=True)
+    total0 = 0.0
+    total1 = 0.0
+    for size, label, prod in prods[:10]:
+        dbdf = build_dbdf(prod)
+        if dbdf.empty:
+            continue
+        res0 = loc_masks(prod, dbdf.copy())
+        res1 = keyed_set(prod, dbdf.copy())
+        time0 = best_time(loc_masks, prod, dbdf)
+        time1 = best_time(keyed_set, prod, dbdf)
+        total0 += time0
+        total1 += time1
+        LOG.info(
+            "%-24s ugc*vtec: %3s rows: %3s loc: %7.2fms set: %5.2fms "
+            "speedup: %5.1fx same: %s",
+            label,
+            size,
+            len(dbdf.index),
+            time0 * 1000.0,
+            time1 * 1000.0,
+            time0 / time1,
+            res0.index.equals(res1.index),
+        )
+    LOG.info(
+        "total loc: %.1fms set: %.1fms speedup: %.1fx",
+        total0 * 1000.0,
+        total1 * 1000.0,
+        total0 / total1,
+    )
+
+
+if __name__ == "__main__":
+    main()
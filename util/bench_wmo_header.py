@@ -0,0 +1,124 @@
+"""Benchmark WMOProduct header parsing over the product examples.
+
+The previous whole text conditioning, AFOS line and MND subject extraction
+are patched back in to compare per product latency before and after.
+"""
+
+import glob
+import logging
+import os
+import timeit
+from contextlib import contextmanager
+from unittest import mock
+
+from pyiem import wmo
+from pyiem.exceptions import TextProductException
+from pyiem.util import logger
+
+# Separate from the pyiem logger, which notes the AM/PM fixes as INFO
+LOG = logger(name="bench_wmo_header", level=logging.INFO)
+EXAMPLES = os.path.join(
+    os.path.dirname(__file__), "..", "data", "product_examples"
+)
+
+
+def legacy_condition_text(text: str) -> str:
+    """The previous implementation, which copied the text many times."""
+    text = text.replace("\r", "")
+    text = text.strip()
+    if text.startswith("\001"):
+        text = text.split("\n", 1)[1]
+    if not wmo.LDM_SEQUENCE_RE.match(text):
+        text = f"000 \n{text}"
+    line2 = text.split("\n")[1]
+    if not wmo.WMO_RE.match(line2):
+        msg = f"FATAL: Could not parse WMO header! `{line2}`"
+        raise TextProductException(msg)
+    text = text.rstrip("\003")
+    if not text.endswith("\n"):
+        text = text + "\n"
+    return text
+
+
+def legacy_parse_afos(self):
+    """The previous implementation, splitting the whole text."""
+    line3 = self.unixtext.split("\n")[2]
+    tokens = wmo.AFOSRE.findall(line3)
+    if tokens:
+        self.afos = tokens[0].strip()
+
+
+@contextmanager
+def legacy():
+    """Patch the previous implementation into place."""
+    with (
+        mock.patch.object(wmo, "_condition_text", legacy_condition_text),
+        mock.patch.object(
+            wmo, "_mnd_subject", lambda text: text.replace("\r", "")[:1000]
+        ),
+        mock.patch.object(wmo.WMOProduct, "parse_afos", legacy_parse_afos),
+    ):
+        yield
+
+
+def attrs(text):
+    """Return what we want to be the same between implementations."""
+    prod = wmo.WMOProduct(text)
+    return prod.unixtext, prod.source, prod.wmo, prod.afos, prod.valid
+
+
+def best_time(text) -> float:
+    """Return the best per call time in seconds."""
+    return (
+        min(timeit.repeat(lambda: wmo.WMOProduct(text), number=5, repeat=3))
+        / 5.0
+    )
+
+
+def main():
+    """Go Main Go."""
+    texts = []
+    for fn in glob.glob(f"{EXAMPLES}/**/*.txt", recursive=True):
+        with open(fn, "rb") as fh:
+            text = fh.read().decode("ascii", "ignore")
+        try:
+            wmo.WMOProduct(text)
+        except Exception:  # noqa
+            continue
+        texts.append((len(text), os.path.relpath(fn, EXAMPLES), text))
+    texts.sort(key=lambda x: x[0], reverse=True)
+    total0 = 0.0
+    total1 = 0.0
+    same = True
+    for i, (size, label, text) in enumerate(texts):
+        with legacy():
+            res0 = attrs(text)
+            time0 = best_time(text)
+        res1 = attrs(text)
+        time1 = best_time(text)
+        same = same and res0 == res1
+        total0 += time0
+        total1 += time1
+        if i < 10:
+            LOG.info(
+                "%-32s %7s bytes old: %7.1fus new: %6.1fus speedup: %5.1fx "
+                "same: %s",
+                label,
+                size,
+                time0 * 1e6,
+                time1 * 1e6,
+                time0 / time1,
+                res0 == res1,
+            )
+    LOG.info(
+        "%s products mean old: %.1fus new: %.1fus speedup: %.1fx same: %s",
+        len(texts),
+        total0 / len(texts) * 1e6,
+        total1 / len(texts) * 1e6,
+        total0 / total1,
+        same,
+    )
+
+
+if __name__ == "__main__":
+    main()